@@ -1,4 +1,7 @@
+import functools
+import json
 import pathlib
+import typing
 
 import deploy_base.model
 import pydantic
@@ -6,6 +9,7 @@ import pydantic
 REPO_PREFIX = 'deploy-'
 
 
+@functools.cache
 def get_pulumi_project():
     repo_dir = pathlib.Path().resolve()
 
@@ -35,20 +39,254 @@ class GoogleConfig(deploy_base.model.LocalBaseModel):
     client_secret: str | PulumiSecret
 
 
-class RedisConfig(deploy_base.model.LocalBaseModel):
+# Whole or fractional CPUs, or whole millicpus
+CpuQuantity = typing.Annotated[
+    str, pydantic.StringConstraints(pattern=r'^([0-9]+m|[0-9]*\.?[0-9]+)$')
+]
+
+
+class ResourceQuantitiesConfig(deploy_base.model.LocalBaseModel):
+    cpu: CpuQuantity | None = None
+    memory: str | None = None
+
+    @pydantic.field_validator('cpu', mode='before')
+    @classmethod
+    def cpu_to_string(cls, value: typing.Any) -> typing.Any:
+        """
+        Accepts unquoted CPU counts, which YAML loads as numbers.
+        """
+        if isinstance(value, int | float) and not isinstance(value, bool):
+            return str(value)
+        return value
+
+
+class ResourcesConfig(deploy_base.model.LocalBaseModel):
+    requests: ResourceQuantitiesConfig = pydantic.Field(default_factory=ResourceQuantitiesConfig)
+    limits: ResourceQuantitiesConfig = pydantic.Field(default_factory=ResourceQuantitiesConfig)
+    # Sets the limits to the requests. A pod is only in the Guaranteed QoS class if this holds
+    # for all of its containers, with whole CPUs it then gets exclusive cores on nodes running
+    # the static CPU manager policy.
+    guaranteed: bool = False
+
+    # Scheduling of the pod, taken from the resources of the main container of a workload
+    node_selector: dict[str, str] = pydantic.Field(alias='node-selector', default_factory=dict)
+    # Kubernetes affinity spec, keys as in the Kubernetes API
+    affinity: dict[str, typing.Any] | None = None
+    # Spread replicas over topology domains, soft prefers and hard requires an even spread
+    topology_spread: typing.Literal['none', 'soft', 'hard'] = pydantic.Field(
+        alias='topology-spread', default='none'
+    )
+    topology_key: str = pydantic.Field(alias='topology-key', default='kubernetes.io/hostname')
+
+    @pydantic.model_validator(mode='after')
+    def check_guaranteed(self) -> typing.Self:
+        if self.guaranteed:
+            if not self.requests.cpu or not self.requests.memory:
+                raise ValueError('guaranteed resources require cpu and memory requests')
+            if self.limits.cpu or self.limits.memory:
+                raise ValueError('guaranteed resources take their limits from the requests')
+        return self
+
+    def cpu_cores(self) -> int | None:
+        """
+        Returns the number of whole CPUs available to the container, if constrained.
+        """
+        cpu = self.limits.cpu or self.requests.cpu
+        if not cpu:
+            return None
+        cores = int(cpu[:-1]) / 1000 if cpu.endswith('m') else float(cpu)
+        return max(1, int(cores))
+
+
+RedisMemory = typing.Annotated[
+    str, pydantic.StringConstraints(pattern=r'^[0-9]+(k|kb|m|mb|g|gb)?$')
+]
+
+RedisEvictionPolicy = typing.Literal[
+    'noeviction',
+    'allkeys-lru',
+    'allkeys-lfu',
+    'allkeys-random',
+    'volatile-lru',
+    'volatile-lfu',
+    'volatile-random',
+    'volatile-ttl',
+]
+
+# none: in memory only, rdb: periodic snapshots, aof: append only file
+RedisPersistence = typing.Literal['none', 'rdb', 'aof']
+
+
+class RedisStorageConfig(deploy_base.model.LocalBaseModel):
+    size: str = '1Gi'
+    storage_class: str | None = pydantic.Field(alias='storage-class', default=None)
+
+
+class RedisServerConfig(deploy_base.model.LocalBaseModel):
+    # Upper bound for the dataset, unbounded if unset. A broker must not evict queued tasks, so
+    # with noeviction redis rejects new tasks once the limit is reached instead.
+    maxmemory: RedisMemory | None = None
+    maxmemory_policy: RedisEvictionPolicy = pydantic.Field(
+        alias='maxmemory-policy', default='noeviction'
+    )
+
+    persistence: RedisPersistence = 'rdb'
+    appendfsync: typing.Literal['always', 'everysec', 'no'] = 'everysec'
+    io_threads: int = pydantic.Field(alias='io-threads', default=1, ge=1)
+    tcp_keepalive: int = pydantic.Field(alias='tcp-keepalive', default=300, ge=0)
+
+    # Persistent volume for /data, without it snapshots only survive container restarts
+    storage: RedisStorageConfig | None = None
+    resources: ResourcesConfig = pydantic.Field(default_factory=ResourcesConfig)
+
+    def render(self) -> str:
+        lines = [
+            'protected-mode no',
+            'dir /data',
+            f'tcp-keepalive {self.tcp_keepalive}',
+            f'maxmemory-policy {self.maxmemory_policy}',
+        ]
+        if self.maxmemory:
+            lines.append(f'maxmemory {self.maxmemory}')
+        if self.io_threads > 1:
+            lines += [f'io-threads {self.io_threads}', 'io-threads-do-reads yes']
+
+        if self.persistence == 'rdb':
+            lines += ['save 3600 1 300 100 60 10000', 'appendonly no']
+        elif self.persistence == 'aof':
+            lines += ['save ""', 'appendonly yes', f'appendfsync {self.appendfsync}']
+        else:
+            lines += ['save ""', 'appendonly no']
+        return '\n'.join(lines) + '\n'
+
+
+class RedisCacheConfig(RedisServerConfig):
+    # A pure cache, evicting the least recently used keys is always fine
+    maxmemory: RedisMemory | None = '256mb'
+    maxmemory_policy: RedisEvictionPolicy = pydantic.Field(
+        alias='maxmemory-policy', default='allkeys-lru'
+    )
+    persistence: RedisPersistence = 'none'
+
+
+class RedisConfig(RedisServerConfig):
     version: str
 
+    # Separate redis instance for the django cache, so UI requests do not queue behind broker
+    # traffic. Runs the same redis version as the broker.
+    cache: RedisCacheConfig | None = None
 
-class TikaConfig(deploy_base.model.LocalBaseModel):
+
+class ConversionServiceConfig(deploy_base.model.LocalBaseModel):
     version: str
+    min_replicas: int = pydantic.Field(alias='min-replicas', default=1, ge=1)
+    max_replicas: int = pydantic.Field(alias='max-replicas', default=1, ge=1)
+    target_cpu_utilization: int = pydantic.Field(
+        alias='target-cpu-utilization', default=75, ge=1, le=100
+    )
+    resources: ResourcesConfig = pydantic.Field(default_factory=ResourcesConfig)
+
+    @property
+    def autoscaled(self) -> bool:
+        return self.max_replicas > self.min_replicas
+
+    @pydantic.model_validator(mode='after')
+    def check_replicas(self) -> typing.Self:
+        if self.max_replicas < self.min_replicas:
+            raise ValueError('max-replicas must not be lower than min-replicas')
+        if self.autoscaled and not self.resources.requests.cpu:
+            raise ValueError('autoscaling on cpu utilization requires a cpu request')
+        return self
+
 
+class TikaConfig(ConversionServiceConfig):
+    pass
 
-class GotenbergConfig(deploy_base.model.LocalBaseModel):
+
+class GotenbergConfig(ConversionServiceConfig):
+    # Gotenberg converts one document per chromium/libreoffice process at a time and queues the
+    # rest, so throughput is scaled with replicas rather than in-process concurrency.
+    max_queue_size: int = pydantic.Field(alias='max-queue-size', default=0, ge=0)
+    restart_after: int = pydantic.Field(alias='restart-after', default=10, ge=0)
+    auto_start: bool = pydantic.Field(alias='auto-start', default=True)
+    api_timeout: str = pydantic.Field(alias='api-timeout', default='30s')
+
+
+class PgBouncerConfig(deploy_base.model.LocalBaseModel):
     version: str
+    replicas: int = pydantic.Field(default=1, ge=1)
+    pool_mode: typing.Literal['session', 'transaction'] = pydantic.Field(
+        alias='pool-mode', default='transaction'
+    )
+    default_pool_size: int = pydantic.Field(alias='default-pool-size', default=20, ge=1)
+    min_pool_size: int = pydantic.Field(alias='min-pool-size', default=0, ge=0)
+    reserve_pool_size: int = pydantic.Field(alias='reserve-pool-size', default=5, ge=0)
+    max_client_conn: int = pydantic.Field(alias='max-client-conn', default=500, ge=1)
+    resources: ResourcesConfig = pydantic.Field(default_factory=ResourcesConfig)
+
+
+PostgresMemory = typing.Annotated[str, pydantic.StringConstraints(pattern=r'^[0-9]+(kB|MB|GB|TB)$')]
+
+POSTGRES_TUNING_PRESETS: dict[str, dict[str, str]] = {
+    'small': {
+        'effective_cache_size': '512MB',
+        'work_mem': '4MB',
+        'maintenance_work_mem': '64MB',
+        'random_page_cost': '1.1',
+        'autovacuum_vacuum_scale_factor': '0.1',
+        'autovacuum_analyze_scale_factor': '0.05',
+    },
+    'medium': {
+        'effective_cache_size': '2GB',
+        'work_mem': '16MB',
+        'maintenance_work_mem': '128MB',
+        'random_page_cost': '1.1',
+        'autovacuum_vacuum_scale_factor': '0.05',
+        'autovacuum_analyze_scale_factor': '0.02',
+    },
+    'large': {
+        'effective_cache_size': '6GB',
+        'work_mem': '32MB',
+        'maintenance_work_mem': '512MB',
+        'random_page_cost': '1.1',
+        'autovacuum_vacuum_scale_factor': '0.02',
+        'autovacuum_analyze_scale_factor': '0.01',
+    },
+}
+
+
+class PostgresTuningConfig(deploy_base.model.LocalBaseModel):
+    preset: typing.Literal['small', 'medium', 'large'] | None = None
+
+    # Explicit values take precedence over the preset
+    effective_cache_size: PostgresMemory | None = pydantic.Field(
+        alias='effective-cache-size', default=None
+    )
+    work_mem: PostgresMemory | None = pydantic.Field(alias='work-mem', default=None)
+    maintenance_work_mem: PostgresMemory | None = pydantic.Field(
+        alias='maintenance-work-mem', default=None
+    )
+    random_page_cost: float | None = pydantic.Field(alias='random-page-cost', default=None, gt=0)
+    autovacuum_vacuum_scale_factor: float | None = pydantic.Field(
+        alias='autovacuum-vacuum-scale-factor', default=None, ge=0, le=1
+    )
+    autovacuum_analyze_scale_factor: float | None = pydantic.Field(
+        alias='autovacuum-analyze-scale-factor', default=None, ge=0, le=1
+    )
+
+    def parameters(self) -> dict[str, str]:
+        parameters = dict(POSTGRES_TUNING_PRESETS[self.preset]) if self.preset else {}
+        for name in type(self).model_fields:
+            value = getattr(self, name)
+            if name != 'preset' and value is not None:
+                parameters[name] = str(value)
+        return parameters
 
 
 class PostgresConfig(deploy_base.model.LocalBaseModel):
     version: str
+    pgbouncer: PgBouncerConfig | None = None
+    tuning: PostgresTuningConfig | None = None
 
 
 class MailConfig(deploy_base.model.LocalBaseModel):
@@ -56,14 +294,465 @@ class MailConfig(deploy_base.model.LocalBaseModel):
     client_secret: str | PulumiSecret
 
 
+class WebserverConfig(deploy_base.model.LocalBaseModel):
+    replicas: int = pydantic.Field(default=1, ge=1)
+    # Derived from the CPU allocation if unset
+    workers: int | None = pydantic.Field(default=None, ge=1)
+    # Seconds until the webserver has to serve requests before it is restarted. 30 minutes in
+    # single mode if unset, where the image entrypoint applies the migrations first, 5 otherwise.
+    startup_timeout: int | None = pydantic.Field(alias='startup-timeout', default=None, ge=5)
+    resources: ResourcesConfig = pydantic.Field(default_factory=ResourcesConfig)
+
+
+class WorkerAutoscalingConfig(deploy_base.model.LocalBaseModel):
+    # With 0 the first task after an idle period waits for a worker pod to start
+    min_replicas: int = pydantic.Field(alias='min-replicas', default=1, ge=0)
+    max_replicas: int = pydantic.Field(alias='max-replicas', ge=1)
+    # Number of queued celery tasks per worker replica
+    queue_length: int = pydantic.Field(alias='queue-length', default=5, ge=1)
+    polling_interval: int = pydantic.Field(alias='polling-interval', default=15, ge=1)
+    cooldown_period: int = pydantic.Field(alias='cooldown-period', default=300, ge=0)
+    # The queue length only counts waiting tasks, it drops while the workers are still busy with
+    # the tasks they took. Scale down is based on the highest replica count of this window.
+    scale_down_stabilization: int = pydantic.Field(
+        alias='scale-down-stabilization', default=600, ge=0
+    )
+
+    @pydantic.model_validator(mode='after')
+    def check_replicas(self) -> typing.Self:
+        if self.max_replicas < self.min_replicas:
+            raise ValueError('max-replicas must not be lower than min-replicas')
+        return self
+
+
+class WorkerConfig(deploy_base.model.LocalBaseModel):
+    replicas: int = pydantic.Field(default=1, ge=1)
+    # Derived from the CPU allocation if unset, 4 each without one
+    workers: int | None = pydantic.Field(default=None, ge=1)
+    threads_per_worker: int | None = pydantic.Field(alias='threads-per-worker', default=None, ge=1)
+    # Seconds a task may run before celery kills it, the default of paperless
+    task_timeout: int = pydantic.Field(alias='task-timeout', default=1800, ge=1)
+    resources: ResourcesConfig = pydantic.Field(default_factory=ResourcesConfig)
+    autoscaling: WorkerAutoscalingConfig | None = None
+
+
+class ConsumerConfig(deploy_base.model.LocalBaseModel):
+    resources: ResourcesConfig = pydantic.Field(default_factory=ResourcesConfig)
+
+
+NFS_MOUNT_PRESETS: dict[str, dict[str, typing.Any]] = {
+    # Matches the previous free-form default
+    'compat': {'nfsvers': '4.1', 'sec': 'sys'},
+    # Large sequential reads of multi page scans over several TCP connections. Short attribute
+    # caching so that a polling consumer notices growing files quickly.
+    'throughput': {
+        'nfsvers': '4.1',
+        'sec': 'sys',
+        'hard': True,
+        'nconnect': 8,
+        'rsize': 1048576,
+        'wsize': 1048576,
+        'timeo': 600,
+        'retrans': 2,
+        'actimeo': 3,
+    },
+}
+
+
+class NfsMountOptionsConfig(deploy_base.model.LocalBaseModel):
+    preset: typing.Literal['compat', 'throughput'] = 'compat'
+
+    # Explicit values take precedence over the preset
+    nfsvers: typing.Literal['3', '4', '4.0', '4.1', '4.2'] | None = None
+    sec: typing.Literal['sys', 'krb5', 'krb5i', 'krb5p'] | None = None
+    nconnect: int | None = pydantic.Field(default=None, ge=1, le=16)
+    rsize: int | None = pydantic.Field(default=None, ge=4096, le=1048576, multiple_of=4096)
+    wsize: int | None = pydantic.Field(default=None, ge=4096, le=1048576, multiple_of=4096)
+    # Attribute cache timeout in seconds
+    actimeo: int | None = pydantic.Field(default=None, ge=0)
+    # hard retries forever, soft returns an error after retrans retries
+    hard: bool | None = None
+    # Timeout in tenths of a second
+    timeo: int | None = pydantic.Field(default=None, ge=1, le=6000)
+    retrans: int | None = pydantic.Field(default=None, ge=0, le=10)
+
+    @pydantic.model_validator(mode='before')
+    @classmethod
+    def parse_string(cls, data: typing.Any) -> typing.Any:
+        """
+        Accepts the previous free-form notation like 'nfsvers=4.1,sec=sys,hard'.
+        """
+        if not isinstance(data, str):
+            return data
+
+        options: dict[str, typing.Any] = {}
+        for option in filter(None, (o.strip() for o in data.split(','))):
+            name, _, value = option.partition('=')
+            if name in ('hard', 'soft') and not value:
+                options['hard'] = name == 'hard'
+            elif name == 'vers':
+                options['nfsvers'] = value
+            else:
+                options[name] = value
+        return options
+
+    @pydantic.field_validator('nfsvers', mode='before')
+    @classmethod
+    def version_to_string(cls, value: typing.Any) -> typing.Any:
+        """
+        Accepts unquoted versions, which YAML loads as numbers.
+        """
+        if isinstance(value, int | float) and not isinstance(value, bool):
+            return str(value)
+        return value
+
+    def options(self) -> dict[str, typing.Any]:
+        options = dict(NFS_MOUNT_PRESETS[self.preset])
+        for name in type(self).model_fields:
+            value = getattr(self, name)
+            if name != 'preset' and value is not None:
+                options[name] = value
+        return options
+
+    def render(self) -> str:
+        rendered = []
+        for name, value in self.options().items():
+            if name == 'hard':
+                rendered.append('hard' if value else 'soft')
+            else:
+                rendered.append(f'{name}={value}')
+        return ','.join(rendered)
+
+
+class ConsumeWatcherConfig(deploy_base.model.LocalBaseModel):
+    # Tag of the python image running the watcher
+    python_version: str = pydantic.Field(alias='python-version')
+    # A file is handed over once its size and mtime did not change for this long
+    stable_seconds: float = pydantic.Field(alias='stable-seconds', default=30, gt=0)
+    interval_seconds: float = pydantic.Field(alias='interval-seconds', default=5, gt=0)
+    verify_checksum: bool = pydantic.Field(alias='verify-checksum', default=True)
+    resources: ResourcesConfig = pydantic.Field(default_factory=ResourcesConfig)
+
+
+class SplitterConfig(deploy_base.model.LocalBaseModel):
+    replicas: int = pydantic.Field(default=1, ge=1)
+    # Pages scanned in parallel per pod, derived from the CPU allocation if unset
+    processes: int | None = pydantic.Field(default=None, ge=1)
+    # Only used when reading from the consume share, files staged by the watcher are complete
+    stable_seconds: float = pydantic.Field(alias='stable-seconds', default=30, gt=0)
+    interval_seconds: float = pydantic.Field(alias='interval-seconds', default=5, gt=0)
+    # Claims of splitters that died are returned to the source after this long
+    claim_timeout: float = pydantic.Field(alias='claim-timeout', default=900, gt=0)
+    resources: ResourcesConfig = pydantic.Field(default_factory=ResourcesConfig)
+
+
+class VolumeConfig(deploy_base.model.LocalBaseModel):
+    size: str = '100Gi'
+    storage_class: str | None = pydantic.Field(alias='storage-class', default=None)
+    # ReadWriteOnce in single and ReadWriteMany in split mode if unset
+    access_mode: typing.Literal['ReadWriteOnce', 'ReadWriteMany'] | None = pydantic.Field(
+        alias='access-mode', default=None
+    )
+    # Pre-provisioned claim mounted instead of creating one
+    existing_claim: str | None = pydantic.Field(alias='existing-claim', default=None)
+
+    @pydantic.model_validator(mode='after')
+    def check_existing_claim(self) -> typing.Self:
+        if self.existing_claim and (self.storage_class or self.access_mode):
+            raise ValueError('storage-class and access-mode do not apply to existing claims')
+        return self
+
+
+class StorageConfig(deploy_base.model.LocalBaseModel):
+    data: VolumeConfig = pydantic.Field(default_factory=VolumeConfig)
+    media: VolumeConfig = pydantic.Field(default_factory=VolumeConfig)
+    # Separate volume for the search index in the data directory, e.g. on a low latency class
+    index: VolumeConfig | None = None
+
+    def volumes(self) -> dict[str, VolumeConfig]:
+        volumes = {'data': self.data, 'media': self.media}
+        if self.index:
+            volumes['index'] = self.index
+        return volumes
+
+
+class ExportConfig(deploy_base.model.LocalBaseModel):
+    schedule: str = '0 2 * * *'
+    # NFS share the exporter writes to directly
+    server: str
+    share: str
+    mount_options: NfsMountOptionsConfig = pydantic.Field(
+        alias='mount-options', default_factory=NfsMountOptionsConfig
+    )
+
+    # Files already in the target are skipped if size and modification time match. Comparing
+    # checksums also catches changes keeping both, but reads every file on each run.
+    compare_checksums: bool = pydantic.Field(alias='compare-checksums', default=False)
+    # Remove files of deleted documents from the target
+    delete: bool = True
+    # Name files like the media directory instead of by document id
+    use_filename_format: bool = pydantic.Field(alias='use-filename-format', default=False)
+    # One manifest per document instead of a single one rewritten on every run
+    split_manifest: bool = pydantic.Field(alias='split-manifest', default=False)
+    # Thumbnails are regenerated on import if not exported
+    thumbnails: bool = True
+
+    # idle only reads from disk when nothing else does, best-effort at the lowest priority
+    io_class: typing.Literal['idle', 'best-effort'] = pydantic.Field(
+        alias='io-class', default='idle'
+    )
+    nice: int = pydantic.Field(default=19, ge=0, le=19)
+    resources: ResourcesConfig = pydantic.Field(default_factory=ResourcesConfig)
+
+
+class MaintenanceConfig(deploy_base.model.LocalBaseModel):
+    # Paperless retrains the classifier hourly and optimizes the search index daily at midnight
+    # in its celery workers. Scheduled tasks run as cron jobs instead and are disabled in
+    # paperless, unset keeps the schedule of paperless.
+    classifier_schedule: str | None = pydantic.Field(
+        alias='classifier-schedule', default='15 3 * * *'
+    )
+    index_schedule: str | None = pydantic.Field(alias='index-schedule', default='45 3 * * *')
+
+    io_class: typing.Literal['idle', 'best-effort'] = pydantic.Field(
+        alias='io-class', default='best-effort'
+    )
+    nice: int = pydantic.Field(default=19, ge=0, le=19)
+    resources: ResourcesConfig = pydantic.Field(default_factory=ResourcesConfig)
+
+
+class MigrationConfig(deploy_base.model.LocalBaseModel):
+    resources: ResourcesConfig = pydantic.Field(default_factory=ResourcesConfig)
+
+
+class ScratchConfig(deploy_base.model.LocalBaseModel):
+    # empty-dir: node local disk, or tmpfs counting against the memory limit with memory: true
+    # ephemeral: volume provisioned per pod from a (fast, local) storage class
+    kind: typing.Literal['empty-dir', 'ephemeral'] = 'empty-dir'
+    memory: bool = False
+    # Size limit of the empty dir or requested size of the ephemeral volume
+    size: str | None = None
+    storage_class: str | None = pydantic.Field(alias='storage-class', default=None)
+
+    @pydantic.model_validator(mode='after')
+    def check_kind(self) -> typing.Self:
+        if self.kind == 'ephemeral':
+            if not self.size:
+                raise ValueError('ephemeral scratch volumes require a size')
+            if self.memory:
+                raise ValueError('memory backed scratch volumes must be of kind empty-dir')
+        elif self.storage_class:
+            raise ValueError('storage-class is only supported for ephemeral scratch volumes')
+        return self
+
+
+OCR_PROFILES: dict[str, dict[str, typing.Any]] = {
+    # Born-digital documents are neither OCRed nor archived again, only the first pages of scans
+    # are searchable and huge images are not OCRed at all.
+    'fast': {
+        'mode': 'skip',
+        'skip_archive_file': 'with_text',
+        'pages': 3,
+        'output_type': 'pdf',
+        'clean': 'none',
+        'deskew': False,
+        'rotate_pages': False,
+        'max_image_pixels': 100_000_000,
+        'user_args': {'optimize': 0, 'skip_big': 50, 'tesseract_timeout': 120},
+    },
+    # Paperless defaults, but pages above 200 megapixels are passed through without OCR
+    'balanced': {
+        'mode': 'skip',
+        'skip_archive_file': 'never',
+        'pages': 0,
+        'output_type': 'pdfa',
+        'clean': 'clean',
+        'deskew': True,
+        'rotate_pages': True,
+        'max_image_pixels': 500_000_000,
+        'user_args': {'optimize': 1, 'skip_big': 200},
+    },
+    # Every page is cleaned and OCRed, archive files are PDF/A-2 with the cleaned images
+    'archival': {
+        'mode': 'skip',
+        'skip_archive_file': 'never',
+        'pages': 0,
+        'output_type': 'pdfa-2',
+        'clean': 'clean-final',
+        'deskew': True,
+        'rotate_pages': True,
+        'max_image_pixels': 0,
+        'user_args': {'optimize': 1},
+    },
+}
+
+
+class OcrConfig(deploy_base.model.LocalBaseModel):
+    language: str = 'deu+eng'
+    # Without a profile paperless uses its own defaults
+    profile: typing.Literal['fast', 'balanced', 'archival'] | None = None
+
+    # Explicit values take precedence over the profile
+    # skip: only OCR pages without text, redo: replace existing text layers, force: rasterize
+    #       and OCR everything
+    mode: typing.Literal['skip', 'redo', 'force'] | None = None
+    skip_archive_file: typing.Literal['never', 'with_text', 'always'] | None = pydantic.Field(
+        alias='skip-archive-file', default=None
+    )
+    # Number of pages from the start to OCR, 0 for all
+    pages: int | None = pydantic.Field(default=None, ge=0)
+    output_type: typing.Literal['pdf', 'pdfa', 'pdfa-1', 'pdfa-2', 'pdfa-3'] | None = (
+        pydantic.Field(alias='output-type', default=None)
+    )
+    clean: typing.Literal['clean', 'clean-final', 'none'] | None = None
+    deskew: bool | None = None
+    rotate_pages: bool | None = pydantic.Field(alias='rotate-pages', default=None)
+    # Images above this size are rejected as decompression bombs, 0 disables the check
+    max_image_pixels: int | None = pydantic.Field(alias='max-image-pixels', default=None, ge=0)
+    # Additional ocrmypdf arguments, merged over the ones of the profile
+    user_args: dict[str, typing.Any] = pydantic.Field(alias='user-args', default_factory=dict)
+
+    @pydantic.model_validator(mode='after')
+    def check_mode(self) -> typing.Self:
+        options = self.options()
+        if options.get('mode') == 'redo':
+            # ocrmypdf refuses to modify the page images while redoing the text layer
+            if options.get('clean') == 'clean-final':
+                raise ValueError('ocr mode redo is incompatible with clean-final')
+            if options.get('deskew'):
+                raise ValueError('ocr mode redo is incompatible with deskew')
+        return self
+
+    def options(self) -> dict[str, typing.Any]:
+        options = dict(OCR_PROFILES[self.profile]) if self.profile else {}
+        for name in type(self).model_fields:
+            value = getattr(self, name)
+            if name in ('language', 'profile', 'user_args') or value is None:
+                continue
+            options[name] = value
+        if user_args := options.get('user_args', {}) | self.user_args:
+            options['user_args'] = user_args
+        return options
+
+    def env_vars(self) -> dict[str, str]:
+        env_vars = {'PAPERLESS_OCR_LANGUAGE': self.language}
+        for name, value in self.options().items():
+            if name == 'user_args':
+                rendered = json.dumps(value)
+            elif isinstance(value, bool):
+                rendered = str(value).lower()
+            else:
+                rendered = str(value)
+            env_vars[f'PAPERLESS_OCR_{name.upper()}'] = rendered
+        return env_vars
+
+
+class IngressConfig(deploy_base.model.LocalBaseModel):
+    # Compress responses at the edge, already encoded responses are passed through
+    compress: bool = True
+    # Browser cache lifetime of /static/ assets. The frontend bundles are content hashed, the
+    # remaining assets only change with paperless upgrades.
+    static_max_age: int = pydantic.Field(alias='static-max-age', default=86400, ge=0)
+    # Browser cache lifetime of document thumbnails. Thumbnails are only regenerated when a
+    # document is reprocessed, so a stale thumbnail is shown for at most this long.
+    thumbnail_max_age: int = pydantic.Field(alias='thumbnail-max-age', default=3600, ge=0)
+
+
 class PaperlessConfig(deploy_base.model.LocalBaseModel):
     version: str
 
+    # single: webserver, celery and consumer share one StatefulSet pod
+    # split: webserver and celery workers scale independently, consumer and scheduler run in
+    #        a singleton pod, all sharing the data and media volumes
+    mode: typing.Literal['single', 'split'] = 'single'
+    resources: ResourcesConfig = pydantic.Field(default_factory=ResourcesConfig)
+    webserver: WebserverConfig = pydantic.Field(default_factory=WebserverConfig)
+    worker: WorkerConfig = pydantic.Field(default_factory=WorkerConfig)
+    # Separate celery workers for mail fetching and the documents from mails, so that a large
+    # OCR backlog does not delay mail processing and vice versa
+    mail_worker: WorkerConfig | None = pydantic.Field(alias='mail-worker', default=None)
+    consumer: ConsumerConfig = pydantic.Field(default_factory=ConsumerConfig)
+    storage: StorageConfig = pydantic.Field(default_factory=StorageConfig)
+
     consume_server: str = pydantic.Field(alias='consume-server')
     consume_share: str = pydantic.Field(alias='consume-share')
-    consume_mount_options: str = pydantic.Field(
-        alias='consume-mount-options', default='nfsvers=4.1,sec=sys'
+    consume_mount_options: NfsMountOptionsConfig = pydantic.Field(
+        alias='consume-mount-options', default_factory=NfsMountOptionsConfig
     )
+    consume_watcher: ConsumeWatcherConfig | None = pydantic.Field(
+        alias='consume-watcher', default=None
+    )
+    # Splits multi-document scans at their barcodes in a pool of pods before paperless consumes
+    # them, instead of one page after the other in the consume task
+    splitter: SplitterConfig | None = None
+    scratch: ScratchConfig | None = None
+    export: ExportConfig | None = None
+    maintenance: MaintenanceConfig | None = None
+    # Resources of the job applying the database migrations before the split workloads roll out.
+    # Their containers do not run the image entrypoint, which applies them in single mode.
+    migration: MigrationConfig | None = None
+    ocr: OcrConfig = pydantic.Field(default_factory=OcrConfig)
+    ingress: IngressConfig = pydantic.Field(default_factory=IngressConfig)
+
+    @pydantic.model_validator(mode='after')
+    def check_mode(self) -> typing.Self:
+        if self.worker.autoscaling and self.mode != 'split':
+            raise ValueError('worker autoscaling requires split mode')
+        if self.mail_worker and self.mode != 'split':
+            raise ValueError('mail-worker requires split mode')
+        # Hands over to the consumer on the shared data volume
+        if self.splitter and self.mode != 'split':
+            raise ValueError('splitter requires split mode')
+        # The data and media claims of the StatefulSet do not exist before its first rollout
+        if self.migration and self.mode != 'split':
+            raise ValueError('migration requires split mode')
+        # The single pod runs one replica with the resources of this section, the split workloads
+        # have their own. Settings of the other mode would be ignored silently otherwise.
+        if self.mode == 'split':
+            if 'resources' in self.model_fields_set:
+                raise ValueError('resources require single mode, split mode sets them per workload')
+        else:
+            workloads = {
+                'webserver': self.webserver,
+                'worker': self.worker,
+                'consumer': self.consumer,
+            }
+            for name, workload in workloads.items():
+                for key in ('replicas', 'resources'):
+                    if key in workload.model_fields_set:
+                        raise ValueError(f'{name} {key} require split mode')
+        return self
+
+
+class ExporterConfig(deploy_base.model.LocalBaseModel):
+    version: str
+    resources: ResourcesConfig = pydantic.Field(default_factory=ResourcesConfig)
+
+
+class MonitoringConfig(deploy_base.model.LocalBaseModel):
+    # Labels of the ServiceMonitors and PodMonitors, e.g. to match the selectors of prometheus
+    labels: dict[str, str] = pydantic.Field(default_factory=dict)
+    interval: str = '30s'
+
+    # Celery task and queue metrics from the task events sent by the workers
+    celery_exporter: ExporterConfig | None = pydantic.Field(alias='celery-exporter', default=None)
+    redis_exporter: ExporterConfig | None = pydantic.Field(alias='redis-exporter', default=None)
+    postgres_exporter: ExporterConfig | None = pydantic.Field(
+        alias='postgres-exporter', default=None
+    )
+    # Gunicorn request metrics, sent by the webserver via statsd
+    statsd_exporter: ExporterConfig | None = pydantic.Field(alias='statsd-exporter', default=None)
+    # Tika JVM metrics, read via JMX by a sidecar
+    jmx_exporter: ExporterConfig | None = pydantic.Field(alias='jmx-exporter', default=None)
+    # Gotenberg exposes its metrics itself
+    gotenberg: bool = True
+    # Grafana dashboard config map, picked up by the grafana dashboard sidecar
+    dashboard: bool = True
+
+
+class PrepullConfig(deploy_base.model.LocalBaseModel):
+    # Scheduling of the pre-pull pods, e.g. to the nodes paperless may run on
+    resources: ResourcesConfig = pydantic.Field(default_factory=ResourcesConfig)
 
 
 class ComponentConfig(deploy_base.model.LocalBaseModel):
@@ -77,6 +766,9 @@ class ComponentConfig(deploy_base.model.LocalBaseModel):
     postgres: PostgresConfig
     tika: TikaConfig
     gotenberg: GotenbergConfig
+    # Pulls the paperless, tika and gotenberg images on every node ahead of a rollout
+    prepull: PrepullConfig | None = None
+    monitoring: MonitoringConfig | None = None
 
 
 class StackConfig(deploy_base.model.LocalBaseModel):
@@ -0,0 +1,106 @@
+import json
+import pathlib
+
+import pulumi as p
+import pulumi_kubernetes as k8s
+
+from paperless.config import ConsumeWatcherConfig, SplitterConfig
+from paperless.utils import container_resources
+
+INGEST_PACKAGE_DIR = pathlib.Path(__file__).parent / 'ingest'
+INGEST_DIR = '/opt/ingest'
+
+
+def create_ingest_volume(opts: p.ResourceOptions) -> k8s.core.v1.VolumeArgsDict:
+    """
+    Ships the standalone ingest package to the pods.
+
+    Mounted as a package directory below INGEST_DIR, so its modules can be run with `python -m`.
+    """
+    config_map = k8s.core.v1.ConfigMap(
+        'ingest',
+        data={path.name: path.read_text() for path in sorted(INGEST_PACKAGE_DIR.glob('*.py'))},
+        opts=opts,
+    )
+    return {'name': 'ingest', 'config_map': {'name': config_map.metadata.name}}
+
+
+def ingest_container(
+    name: str,
+    image: str,
+    module: str,
+    args: list[str],
+    volume_mounts: list[k8s.core.v1.VolumeMountArgsDict],
+) -> k8s.core.v1.ContainerArgsDict:
+    return {
+        'name': name,
+        'image': image,
+        'command': ['python', '-m', f'ingest.{module}', *args],
+        'env': [
+            {'name': 'PYTHONPATH', 'value': INGEST_DIR},
+            {'name': 'PYTHONDONTWRITEBYTECODE', 'value': '1'},
+            {'name': 'PYTHONUNBUFFERED', 'value': '1'},
+        ],
+        'volume_mounts': [
+            {'name': 'ingest', 'mount_path': f'{INGEST_DIR}/ingest', 'read_only': True},
+            *volume_mounts,
+        ],
+    }
+
+
+def consume_watcher_container(
+    watcher_config: ConsumeWatcherConfig,
+    source_mount: k8s.core.v1.VolumeMountArgsDict,
+    target_mount: k8s.core.v1.VolumeMountArgsDict,
+    ignore_patterns: list[str],
+) -> k8s.core.v1.ContainerArgsDict:
+    container = ingest_container(
+        'consume-watcher',
+        f'docker.io/library/python:{watcher_config.python_version}',
+        'watcher',
+        [
+            f'--source={source_mount["mount_path"]}',
+            f'--target={target_mount["mount_path"]}',
+            f'--stable-seconds={watcher_config.stable_seconds}',
+            f'--interval-seconds={watcher_config.interval_seconds}',
+            f'--ignore-patterns={json.dumps(ignore_patterns)}',
+            '--verify-checksum' if watcher_config.verify_checksum else '--no-verify-checksum',
+        ],
+        [source_mount, target_mount],
+    )
+    # Staged files must be owned by the paperless user so that it can remove them after consumption
+    container['security_context'] = {'run_as_user': 1000, 'run_as_group': 1000}
+    if resources := container_resources(watcher_config.resources):
+        container['resources'] = resources
+    return container
+
+
+def splitter_container(
+    splitter_config: SplitterConfig,
+    image: str,
+    processes: int,
+    stable_seconds: float,
+    source_mount: k8s.core.v1.VolumeMountArgsDict,
+    target_mount: k8s.core.v1.VolumeMountArgsDict,
+    ignore_patterns: list[str],
+) -> k8s.core.v1.ContainerArgsDict:
+    # Runs in the paperless image, which has the libraries paperless detects barcodes with
+    container = ingest_container(
+        'splitter',
+        image,
+        'splitter',
+        [
+            f'--source={source_mount["mount_path"]}',
+            f'--target={target_mount["mount_path"]}',
+            f'--stable-seconds={stable_seconds}',
+            f'--interval-seconds={splitter_config.interval_seconds}',
+            f'--ignore-patterns={json.dumps(ignore_patterns)}',
+            f'--claim-timeout={splitter_config.claim_timeout}',
+            f'--processes={processes}',
+        ],
+        [source_mount, target_mount],
+    )
+    container['security_context'] = {'run_as_user': 1000, 'run_as_group': 1000}
+    if resources := container_resources(splitter_config.resources):
+        container['resources'] = resources
+    return container
@@ -0,0 +1,72 @@
+"""
+Django settings layered over the stock paperless settings.
+
+Some tuning knobs are not exposed as PAPERLESS_* environment variables. These are set in a
+settings module that star-imports the paperless settings and is selected with
+DJANGO_SETTINGS_MODULE in all paperless containers.
+"""
+
+from paperless.config import ComponentConfig, PaperlessConfig
+
+# Queue of the default celery workers
+DEFAULT_QUEUE = 'celery'
+# Queue of the mail workers if enabled
+MAIL_QUEUE = 'mail'
+
+# Mail fetching and the actions on processed mails, the documents from mail attachments are
+# routed by the source of the consumed document.
+MAIL_TASKS = (
+    'paperless_mail.tasks.process_mail_accounts',
+    'paperless_mail.mail.apply_mail_action',
+    'paperless_mail.mail.error_callback',
+)
+MAIL_ROUTER = f"""\
+def route_task(name, args, kwargs, options, task=None, **kw):
+    if name in {MAIL_TASKS!r}:
+        return {{'queue': {MAIL_QUEUE!r}}}
+    if name == 'documents.tasks.consume_file' and args:
+        from documents.data_models import DocumentSource
+
+        if args[0].source == DocumentSource.MailFetch:
+            return {{'queue': {MAIL_QUEUE!r}}}
+    return None
+
+
+CELERY_TASK_ROUTES = (route_task,)"""
+
+
+def task_queues(paperless_config: PaperlessConfig) -> list[str]:
+    queues = [DEFAULT_QUEUE]
+    if paperless_config.mail_worker:
+        queues.append(MAIL_QUEUE)
+    return queues
+
+
+def settings_override(component_config: ComponentConfig) -> str | None:
+    lines = []
+
+    pgbouncer_config = component_config.postgres.pgbouncer
+    if pgbouncer_config and pgbouncer_config.pool_mode == 'transaction':
+        lines += [
+            '# Server side cursors do not survive the end of a transaction behind PgBouncer',
+            "DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True",
+        ]
+
+    if component_config.redis.cache:
+        lines += [
+            '# UI cache lookups should not queue behind celery broker traffic',
+            "CACHES['default']['LOCATION'] = os.environ['PAPERLESS_CACHE_REDIS']  # noqa: F405",
+        ]
+
+    if component_config.paperless.mail_worker:
+        lines += [
+            '# Mail tasks run on the mail workers, everything else on the default queue',
+            MAIL_ROUTER,
+        ]
+
+    if not lines:
+        return None
+
+    return '\n'.join(
+        ['import os', '', 'from paperless.settings import *  # noqa: F403', '', *lines, '']
+    )
@@ -0,0 +1,7 @@
+"""
+Standalone helpers running next to paperless in the cluster.
+
+The modules in this package are shipped to the pods as a ConfigMap, so they must not import
+anything from the surrounding deployment code. They only depend on the standard library and run
+with a stock python image, except for the splitter, which runs in the paperless image.
+"""
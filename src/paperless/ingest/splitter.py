@@ -0,0 +1,287 @@
+"""
+Splits scans of several documents at their barcodes before paperless consumes them.
+
+Paperless rasterizes every page and scans it for barcodes in the consume task, one page after
+the other, before OCR starts. This splitter runs as a pool of pods in front of paperless. Each
+pod claims stable files from the source directory, scans their pages in parallel worker
+processes and hands one PDF per document to paperless. As with the paperless defaults, separator
+pages are dropped and pages with an ASN barcode start a new document, which leaves paperless only
+the ASN barcode on the first page to read.
+
+Files are claimed by renaming them in place, which only succeeds for one pod. Claims of pods that
+died while splitting are returned to the source after a timeout. Files that are no PDFs, do not
+contain barcodes or fail to split are handed over unchanged.
+
+Unlike the other ingest modules the splitter runs in the paperless image and uses the libraries
+paperless detects barcodes with. They are imported where they are used, so that the module can
+be imported without them.
+"""
+
+# The libraries are only installed in the paperless image
+# pyright: reportMissingImports=false
+
+import argparse
+import concurrent.futures
+import concurrent.futures.process
+import functools
+import json
+import logging
+import os
+import pathlib
+import shutil
+import time
+
+from .watcher import PARTIAL_SUFFIX, StabilityTracker, scan, unique_destination
+
+logger = logging.getLogger(__name__)
+
+# Defaults of PAPERLESS_CONSUMER_BARCODE_STRING, PAPERLESS_CONSUMER_ASN_BARCODE_PREFIX and
+# PAPERLESS_CONSUMER_BARCODE_DPI
+SEPARATOR_BARCODE = 'PATCHT'
+ASN_PREFIX = 'ASN'
+DPI = 300
+
+CLAIM_SUFFIX = '.splitting'
+
+
+def page_barcodes(path: pathlib.Path, dpi: int, page: int) -> list[str]:
+    """
+    Returns the barcodes on a page of a PDF, counted from zero.
+    """
+    import pdf2image
+    import zxingcpp
+
+    images = pdf2image.convert_from_path(
+        path, dpi=dpi, first_page=page + 1, last_page=page + 1, grayscale=True
+    )
+    return [result.text for image in images for result in zxingcpp.read_barcodes(image)]
+
+
+def page_count(path: pathlib.Path) -> int | None:
+    """
+    Returns the number of pages of a PDF, None if it cannot be read, e.g. if encrypted.
+    """
+    import pikepdf
+
+    try:
+        with pikepdf.open(path) as pdf:
+            return len(pdf.pages)
+    except pikepdf.PdfError:
+        return None
+
+
+def detect(
+    path: pathlib.Path, pages: int, dpi: int, executor: concurrent.futures.Executor
+) -> list[list[str]]:
+    """
+    Scans all pages of a PDF for barcodes in parallel.
+    """
+    return list(executor.map(functools.partial(page_barcodes, path, dpi), range(pages)))
+
+
+def separate(barcodes: list[list[str]], separator: str, asn_prefix: str) -> list[list[int]]:
+    """
+    Groups the pages into documents by the barcodes found on each page.
+
+    A separator page ends a document and is dropped, a page with an ASN barcode starts one.
+    """
+    documents: list[list[int]] = [[]]
+    for page, codes in enumerate(barcodes):
+        if separator in codes:
+            documents.append([])
+        elif any(code.startswith(asn_prefix) for code in codes):
+            documents.append([page])
+        else:
+            documents[-1].append(page)
+    return [document for document in documents if document]
+
+
+def claim(path: pathlib.Path) -> pathlib.Path | None:
+    """
+    Hides a file from the other splitters, returns None if another one claimed it first.
+    """
+    claimed = path.with_name(f'.{path.name}{CLAIM_SUFFIX}')
+    try:
+        path.rename(claimed)
+    except FileNotFoundError:
+        return None
+    # Renaming keeps the modification time, the claim timeout starts now
+    os.utime(claimed)
+    return claimed
+
+
+def unclaimed(claimed: pathlib.Path) -> pathlib.Path:
+    return claimed.with_name(claimed.name[1 : -len(CLAIM_SUFFIX)])
+
+
+def recover(source: pathlib.Path, timeout: float, now: float) -> list[pathlib.Path]:
+    """
+    Returns files claimed longer than the timeout ago to the source.
+    """
+    recovered = []
+    for claimed in source.rglob(f'.*{CLAIM_SUFFIX}'):
+        try:
+            if now - claimed.stat().st_mtime < timeout:
+                continue
+            claimed.rename(unclaimed(claimed))
+        except FileNotFoundError:
+            continue
+        recovered.append(unclaimed(claimed))
+    return recovered
+
+
+def hand_over(path: pathlib.Path, destination: pathlib.Path) -> pathlib.Path:
+    destination = unique_destination(destination)
+    # Paperless ignores files with unsupported extensions, so the partial copy is never consumed
+    partial = destination.with_name(f'.{destination.name}{PARTIAL_SUFFIX}')
+    shutil.copyfile(path, partial)
+    partial.replace(destination)
+    return destination
+
+
+def split(
+    path: pathlib.Path, documents: list[list[int]], destination: pathlib.Path
+) -> list[pathlib.Path]:
+    """
+    Writes one PDF per document, named like the ones paperless creates when splitting.
+    """
+    import pikepdf
+
+    outputs = []
+    try:
+        with pikepdf.open(path) as pdf:
+            for index, pages in enumerate(documents, 1):
+                output = unique_destination(destination.with_stem(f'{destination.stem}_{index}'))
+                partial = output.with_name(f'.{output.name}{PARTIAL_SUFFIX}')
+                outputs.append(partial)
+                with pikepdf.Pdf.new() as document:
+                    document.pages.extend(pdf.pages[page] for page in pages)
+                    document.save(partial)
+                partial.replace(output)
+                outputs[-1] = output
+    except BaseException:
+        # Paperless would consume the documents written so far again with the whole file
+        for output in outputs:
+            output.unlink(missing_ok=True)
+        raise
+    return outputs
+
+
+def process(
+    claimed: pathlib.Path,
+    source: pathlib.Path,
+    target: pathlib.Path,
+    executor: concurrent.futures.Executor,
+    dpi: int,
+    separator: str,
+    asn_prefix: str,
+) -> list[pathlib.Path]:
+    """
+    Splits a claimed file into the target directory, keeping its path relative to the source.
+
+    Files that fail to split are handed over unchanged, as splitting them again would fail again.
+    A broken process pool is raised after handing over the file, the pool has to be replaced.
+    """
+    destination = target / unclaimed(claimed).relative_to(source)
+    destination.parent.mkdir(parents=True, exist_ok=True)
+
+    outputs = None
+    failure = None
+    try:
+        if destination.suffix.lower() == '.pdf' and (pages := page_count(claimed)):
+            documents = separate(detect(claimed, pages, dpi, executor), separator, asn_prefix)
+            if documents not in ([], [list(range(pages))]):
+                outputs = split(claimed, documents, destination)
+    except Exception as error:
+        logger.exception('Failed to split %s, handing it over unchanged', unclaimed(claimed))
+        failure = error
+
+    if outputs is None:
+        outputs = [hand_over(claimed, destination)]
+    claimed.unlink()
+    if isinstance(failure, concurrent.futures.process.BrokenProcessPool):
+        raise failure
+    return outputs
+
+
+def run(
+    source: pathlib.Path,
+    target: pathlib.Path,
+    stable_seconds: float,
+    interval_seconds: float,
+    ignore_patterns: list[str],
+    claim_timeout: float,
+    processes: int | None,
+    dpi: int = DPI,
+    separator: str = SEPARATOR_BARCODE,
+    asn_prefix: str = ASN_PREFIX,
+    iterations: int | None = None,
+):
+    # Claimed files and partial copies of the watcher
+    ignore_patterns = [*ignore_patterns, f'.*{CLAIM_SUFFIX}', f'.*{PARTIAL_SUFFIX}']
+    tracker = StabilityTracker(stable_seconds)
+    executor = concurrent.futures.ProcessPoolExecutor(processes)
+    try:
+        iteration = 0
+        while iterations is None or iteration < iterations:
+            iteration += 1
+            for path in recover(source, claim_timeout, time.time()):
+                logger.warning('Returned %s, its splitter did not finish in time', path)
+
+            files = scan(source, ignore_patterns)
+            for path in tracker.update(files, time.monotonic()):
+                tracker.forget(path)
+                if not (claimed := claim(path)):
+                    continue
+                try:
+                    outputs = process(claimed, source, target, executor, dpi, separator, asn_prefix)
+                except concurrent.futures.process.BrokenProcessPool:
+                    # A worker process died, e.g. killed for running out of memory, the pool
+                    # rejects all further pages
+                    logger.warning('Restarting the worker processes')
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    executor = concurrent.futures.ProcessPoolExecutor(processes)
+                    continue
+                except Exception:
+                    # The claim is returned after the timeout
+                    logger.exception('Failed to hand over %s', path)
+                    continue
+                logger.info('Handed over %s as %s', path, ', '.join(map(str, outputs)))
+
+            if iterations is None or iteration < iterations:
+                time.sleep(interval_seconds)
+    finally:
+        executor.shutdown()
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--source', type=pathlib.Path, required=True)
+    parser.add_argument('--target', type=pathlib.Path, required=True)
+    parser.add_argument('--stable-seconds', type=float, default=30)
+    parser.add_argument('--interval-seconds', type=float, default=5)
+    parser.add_argument('--ignore-patterns', type=json.loads, default=[])
+    parser.add_argument('--claim-timeout', type=float, default=900)
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--dpi', type=int, default=DPI)
+    parser.add_argument('--separator', default=SEPARATOR_BARCODE)
+    parser.add_argument('--asn-prefix', default=ASN_PREFIX)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    run(
+        args.source,
+        args.target,
+        args.stable_seconds,
+        args.interval_seconds,
+        args.ignore_patterns,
+        args.claim_timeout,
+        args.processes,
+        args.dpi,
+        args.separator,
+        args.asn_prefix,
+    )
+
+
+if __name__ == '__main__':
+    main()
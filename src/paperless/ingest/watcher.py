@@ -0,0 +1,192 @@
+"""
+Hands over files from the consume share to paperless once they stopped changing.
+
+Scanners like the HP one rewrite their PDFs after every page. Instead of letting paperless poll
+the network share with long delays, this watcher polls the share itself and copies a file into
+a local staging directory once its size and modification time did not change for a configurable
+window. Paperless watches the staging directory with inotify and only ever sees complete files,
+the final rename into place is atomic.
+"""
+
+import argparse
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import shutil
+import time
+
+logger = logging.getLogger(__name__)
+
+PARTIAL_SUFFIX = '.partial'
+
+
+@dataclasses.dataclass(frozen=True)
+class FileState:
+    size: int
+    mtime_ns: int
+
+    @classmethod
+    def from_stat(cls, stat: os.stat_result) -> 'FileState':
+        return cls(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+
+
+class StabilityTracker:
+    """
+    Remembers since when each file is in its current state.
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self._since: dict[pathlib.Path, tuple[FileState, float]] = {}
+
+    def update(self, files: dict[pathlib.Path, FileState], now: float) -> list[pathlib.Path]:
+        """
+        Records the current state of all files and returns the ones that are stable.
+        """
+        stable = []
+        for path, state in sorted(files.items()):
+            previous = self._since.get(path)
+            if previous is None or previous[0] != state:
+                self._since[path] = (state, now)
+            elif now - previous[1] >= self.window:
+                stable.append(path)
+
+        for path in self._since.keys() - files.keys():
+            del self._since[path]
+
+        return stable
+
+    def forget(self, path: pathlib.Path):
+        self._since.pop(path, None)
+
+
+def is_ignored(relative_path: pathlib.PurePath, ignore_patterns: list[str]) -> bool:
+    # Same semantics as PAPERLESS_CONSUMER_IGNORE_PATTERNS
+    return any(relative_path.match(pattern) for pattern in ignore_patterns)
+
+
+def scan(source: pathlib.Path, ignore_patterns: list[str]) -> dict[pathlib.Path, FileState]:
+    files = {}
+    for root, _, filenames in os.walk(source):
+        for filename in filenames:
+            path = pathlib.Path(root, filename)
+            if is_ignored(path.relative_to(source), ignore_patterns):
+                continue
+            try:
+                state = FileState.from_stat(path.stat())
+            except FileNotFoundError:
+                continue
+            # Scanners create the file before writing to it
+            if state.size:
+                files[path] = state
+    return files
+
+
+CHECKSUM_CHUNK_SIZE = 1024 * 1024
+
+
+def checksum(path: pathlib.Path) -> str:
+    # hashlib.file_digest needs python 3.11, the watcher runs on any configured python image
+    digest = hashlib.sha256()
+    with path.open('rb') as f:
+        while chunk := f.read(CHECKSUM_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def unique_destination(destination: pathlib.Path) -> pathlib.Path:
+    candidate = destination
+    counter = 1
+    while candidate.exists():
+        candidate = destination.with_stem(f'{destination.stem}-{counter}')
+        counter += 1
+    return candidate
+
+
+def transfer(
+    path: pathlib.Path,
+    source: pathlib.Path,
+    target: pathlib.Path,
+    state: FileState,
+    verify_checksum: bool,
+) -> pathlib.Path | None:
+    """
+    Moves a stable file into the target directory, keeping its path relative to the source.
+
+    Returns None and leaves the source untouched if the file changed while being copied.
+    """
+    destination = unique_destination(target / path.relative_to(source))
+    destination.parent.mkdir(parents=True, exist_ok=True)
+
+    # Paperless ignores files with unsupported extensions, so the partial copy is never consumed
+    partial = destination.with_name(f'.{destination.name}{PARTIAL_SUFFIX}')
+    shutil.copyfile(path, partial)
+
+    unchanged = FileState.from_stat(path.stat()) == state
+    if unchanged and verify_checksum:
+        unchanged = checksum(path) == checksum(partial)
+    if not unchanged:
+        partial.unlink()
+        return None
+
+    partial.replace(destination)
+    path.unlink()
+    return destination
+
+
+def run(
+    source: pathlib.Path,
+    target: pathlib.Path,
+    stable_seconds: float,
+    interval_seconds: float,
+    ignore_patterns: list[str],
+    verify_checksum: bool,
+    iterations: int | None = None,
+):
+    tracker = StabilityTracker(stable_seconds)
+    iteration = 0
+    while iterations is None or iteration < iterations:
+        iteration += 1
+        files = scan(source, ignore_patterns)
+        for path in tracker.update(files, time.monotonic()):
+            tracker.forget(path)
+            try:
+                destination = transfer(path, source, target, files[path], verify_checksum)
+            except OSError:
+                logger.exception('Failed to transfer %s', path)
+                continue
+            if destination:
+                logger.info('Handed over %s as %s', path, destination)
+            else:
+                logger.info('%s changed while copying, waiting for it to settle', path)
+
+        if iterations is None or iteration < iterations:
+            time.sleep(interval_seconds)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--source', type=pathlib.Path, required=True)
+    parser.add_argument('--target', type=pathlib.Path, required=True)
+    parser.add_argument('--stable-seconds', type=float, default=30)
+    parser.add_argument('--interval-seconds', type=float, default=5)
+    parser.add_argument('--ignore-patterns', type=json.loads, default=[])
+    parser.add_argument('--verify-checksum', action=argparse.BooleanOptionalAction, default=True)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    run(
+        args.source,
+        args.target,
+        args.stable_seconds,
+        args.interval_seconds,
+        args.ignore_patterns,
+        args.verify_checksum,
+    )
+
+
+if __name__ == '__main__':
+    main()
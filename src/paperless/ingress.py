@@ -0,0 +1,110 @@
+import typing
+
+import pulumi as p
+import pulumi_kubernetes as k8s
+
+from paperless.config import IngressConfig
+
+TRAEFIK_API_VERSION = 'traefik.io/v1alpha1'
+
+STATIC_PATH_PREFIX = '/static/'
+THUMBNAIL_PATH_REGEXP = '^/api/documents/[0-9]+/thumb/$'
+
+
+def middleware_specs(ingress_config: IngressConfig) -> dict[str, dict[str, typing.Any]]:
+    """
+    Returns the Traefik middleware specs by name.
+    """
+    specs: dict[str, dict[str, typing.Any]] = {}
+    if ingress_config.compress:
+        specs['compress'] = {'compress': {}}
+    if ingress_config.static_max_age:
+        specs['static-cache'] = {
+            'headers': {
+                'customResponseHeaders': {
+                    'Cache-Control': f'public, max-age={ingress_config.static_max_age}',
+                },
+            },
+        }
+    if ingress_config.thumbnail_max_age:
+        # Thumbnails require authentication and must not end up in shared caches. Paperless
+        # itself sends no-cache, so browsers revalidate every thumbnail on every page.
+        specs['thumbnail-cache'] = {
+            'headers': {
+                'customResponseHeaders': {
+                    'Cache-Control': f'private, max-age={ingress_config.thumbnail_max_age}',
+                },
+            },
+        }
+    return specs
+
+
+def ingress_routes(
+    fqdn: str,
+    service: dict[str, p.Input[typing.Any]],
+    ingress_config: IngressConfig,
+) -> list[dict[str, typing.Any]]:
+    """
+    Returns the IngressRoute routes, with static assets and thumbnails on separate routes.
+
+    Traefik prefers longer rules, so the path specific routes take precedence over the catch-all.
+    """
+    middlewares = middleware_specs(ingress_config)
+
+    def route(match: str, *names: str) -> dict[str, typing.Any]:
+        spec: dict[str, typing.Any] = {'kind': 'Rule', 'match': match, 'services': [service]}
+        if refs := [{'name': name} for name in names if name in middlewares]:
+            spec['middlewares'] = refs
+        return spec
+
+    host = f'Host(`{fqdn}`)'
+    return [
+        route(f'{host} && PathPrefix(`{STATIC_PATH_PREFIX}`)', 'compress', 'static-cache'),
+        # Thumbnails are webp images, compressing them again only costs CPU
+        route(f'{host} && PathRegexp(`{THUMBNAIL_PATH_REGEXP}`)', 'thumbnail-cache'),
+        route(host, 'compress'),
+    ]
+
+
+def create_ingress(
+    fqdn: str,
+    service: k8s.core.v1.Service,
+    port: int,
+    ingress_config: IngressConfig,
+    opts: p.ResourceOptions,
+):
+    middlewares = [
+        k8s.apiextensions.CustomResource(
+            name,
+            api_version=TRAEFIK_API_VERSION,
+            kind='Middleware',
+            metadata={'name': name},
+            spec=spec,
+            opts=opts,
+        )
+        for name, spec in middleware_specs(ingress_config).items()
+    ]
+
+    k8s.apiextensions.CustomResource(
+        'ingress',
+        api_version=TRAEFIK_API_VERSION,
+        kind='IngressRoute',
+        metadata={
+            'name': 'ingress',
+        },
+        spec={
+            'entryPoints': ['websecure'],
+            'routes': ingress_routes(
+                fqdn,
+                {
+                    'name': service.metadata.name,
+                    'namespace': service.metadata.namespace,
+                    'port': port,
+                },
+                ingress_config,
+            ),
+            # use default wildcard certificate:
+            'tls': {},
+        },
+        opts=p.ResourceOptions.merge(opts, p.ResourceOptions(depends_on=middlewares)),
+    )
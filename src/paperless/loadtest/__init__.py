@@ -0,0 +1,15 @@
+"""
+Synthetic ingestion load tests against a running paperless.
+
+Generates PDFs, scans, images and mails, hands them to paperless through the consume directory
+or the upload API and polls the task API until every document is processed. The report contains
+the throughput and latency percentiles per stage, so deployments with different settings can be
+compared before rolling them out.
+
+    python -m paperless.loadtest --url http://localhost:8000 --token ... --documents 50
+
+A local stand-in for the deployed stack can be started with the compose file next to this
+package. Its consume directory is ./consume relative to the compose file.
+
+The barcode detection of the splitter is benchmarked without paperless, see split_benchmark.
+"""
@@ -0,0 +1,3 @@
+from paperless.loadtest.runner import main
+
+main()
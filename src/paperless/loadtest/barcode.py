@@ -0,0 +1,48 @@
+"""
+Code 128 (code set B), as used for paperless separator and ASN barcodes.
+"""
+
+# Bar and space widths in modules of the symbols 0 to 106, starting with a bar
+PATTERNS = [
+    '212222', '222122', '222221', '121223', '121322', '131222', '122213', '122312', '132212',
+    '221213', '221312', '231212', '112232', '122132', '122231', '113222', '123122', '123221',
+    '223211', '221132', '221231', '213212', '223112', '312131', '311222', '321122', '321221',
+    '312212', '322112', '322211', '212123', '212321', '232121', '111323', '131123', '131321',
+    '112313', '132113', '132311', '211313', '231113', '231311', '112133', '112331', '132131',
+    '113123', '113321', '133121', '313121', '211331', '231131', '213113', '213311', '213131',
+    '311123', '311321', '331121', '312113', '312311', '332111', '314111', '221411', '431111',
+    '111224', '111422', '121124', '121421', '141122', '141221', '112214', '112412', '122114',
+    '122411', '142112', '142211', '241211', '221114', '413111', '241112', '134111', '111242',
+    '121142', '121241', '114212', '124112', '124211', '411212', '421112', '421211', '212141',
+    '214121', '412121', '111143', '111341', '131141', '114113', '114311', '411113', '411311',
+    '113141', '114131', '311141', '411131', '211412', '211214', '211232', '2331112',
+]  # fmt: skip
+
+START_B = 104
+STOP = 106
+# Quiet zone on both sides, in modules
+QUIET_ZONE = 10
+
+
+def symbols(text: str) -> list[int]:
+    values = []
+    for char in text:
+        value = ord(char) - 32
+        if not 0 <= value <= 94:
+            raise ValueError(f'{char!r} cannot be encoded in code set B')
+        values.append(value)
+
+    check = (START_B + sum(position * value for position, value in enumerate(values, 1))) % 103
+    return [START_B, *values, check, STOP]
+
+
+def modules(text: str) -> list[bool]:
+    """
+    Returns the barcode as a row of modules including the quiet zones, True is a bar.
+    """
+    row = [False] * QUIET_ZONE
+    for symbol in symbols(text):
+        for index, width in enumerate(PATTERNS[symbol]):
+            row += [index % 2 == 0] * int(width)
+    row += [False] * QUIET_ZONE
+    return row
@@ -0,0 +1,281 @@
+"""
+Synthetic documents for load tests.
+
+Everything is generated with the standard library: born-digital PDFs with a text layer, scanned
+PDFs with only page images, PNG images and mails. Each file contains random content so paperless
+never rejects it as a duplicate. Multi-document files contain separator pages and documents can
+start with an ASN barcode, both as paperless expects them with its default barcode settings.
+"""
+
+import dataclasses
+import email.message
+import email.utils
+import random
+import struct
+import typing
+import zlib
+
+from paperless.loadtest import barcode
+
+SEPARATOR_BARCODE = 'PATCHT'
+ASN_PREFIX = 'ASN'
+
+# A4 in points
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+SCAN_DPI = 150
+
+WORDS = (
+    'invoice contract insurance policy amount total payment due date customer account number '
+    'delivery address tax office reference period balance statement order quantity price net '
+    'gross discount bank transfer notice renewal premium claim report annual monthly service'
+).split()
+
+FixtureKind = typing.Literal['pdf', 'scan', 'png', 'eml']
+
+
+@dataclasses.dataclass(frozen=True)
+class FixtureSpec:
+    kind: FixtureKind = 'pdf'
+    # Pages per document
+    pages: int = 1
+    # Documents per file, separated by separator pages
+    documents: int = 1
+    # Start every document with an ASN barcode
+    asn: bool = False
+
+
+@dataclasses.dataclass(frozen=True)
+class Fixture:
+    name: str
+    data: bytes
+    # Number of documents paperless creates from the file
+    documents: int
+
+
+@dataclasses.dataclass(frozen=True)
+class Page:
+    lines: list[str]
+    barcode: str | None = None
+
+
+def document_pages(
+    spec: FixtureSpec,
+    title: str,
+    rng: random.Random,
+    asns: typing.Iterator[int],
+) -> list[Page]:
+    pages = []
+    for document in range(spec.documents):
+        if document:
+            pages.append(Page([], SEPARATOR_BARCODE))
+        for page in range(spec.pages):
+            lines = [f'{title} document {document + 1} page {page + 1}']
+            lines += [' '.join(rng.choices(WORDS, k=rng.randint(6, 12))) for _ in range(30)]
+            asn = f'{ASN_PREFIX}{next(asns):05d}' if spec.asn and not page else None
+            pages.append(Page(lines, asn))
+    return pages
+
+
+def bar_runs(code: str) -> list[tuple[int, int]]:
+    """
+    Returns the bars of a barcode as (offset, width) in modules.
+    """
+    runs = []
+    for offset, bar in enumerate(barcode.modules(code)):
+        if not bar:
+            continue
+        if runs and runs[-1][0] + runs[-1][1] == offset:
+            runs[-1] = (runs[-1][0], runs[-1][1] + 1)
+        else:
+            runs.append((offset, 1))
+    return runs
+
+
+class PdfWriter:
+    def __init__(self):
+        self.objects: list[bytes] = []
+
+    def add(self, body: bytes = b'') -> int:
+        self.objects.append(body)
+        return len(self.objects)
+
+    def set(self, number: int, body: bytes):
+        self.objects[number - 1] = body
+
+    def add_stream(self, data: bytes, dictionary: bytes = b'') -> int:
+        compressed = zlib.compress(data)
+        return self.add(
+            b'<< %b /Filter /FlateDecode /Length %d >>\nstream\n%b\nendstream'
+            % (dictionary, len(compressed), compressed)
+        )
+
+    def render(self, root: int) -> bytes:
+        output = bytearray(b'%PDF-1.7\n%\xe2\xe3\xcf\xd3\n')
+        offsets = []
+        for number, body in enumerate(self.objects, 1):
+            offsets.append(len(output))
+            output += b'%d 0 obj\n%b\nendobj\n' % (number, body)
+
+        xref = len(output)
+        output += b'xref\n0 %d\n0000000000 65535 f \n' % (len(self.objects) + 1)
+        for offset in offsets:
+            output += b'%010d 00000 n \n' % offset
+        output += b'trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (
+            len(self.objects) + 1,
+            root,
+            xref,
+        )
+        return bytes(output)
+
+
+def pdf_text(text: str) -> bytes:
+    escaped = text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+    return escaped.encode('latin-1', 'replace')
+
+
+def text_page_content(page: Page) -> bytes:
+    content = bytearray()
+    if page.lines:
+        content += b'BT /F1 11 Tf 14 TL 72 770 Td\n'
+        for line in page.lines:
+            content += b'(%b) Tj T*\n' % pdf_text(line)
+        content += b'ET\n'
+    if page.barcode:
+        module = 1.5
+        for offset, width in bar_runs(page.barcode):
+            content += b'%.2f 40 %.2f 50 re\n' % (72 + offset * module, width * module)
+        content += b'f\n'
+    return bytes(content)
+
+
+def pdf(pages: list[Page], scanned: bool, rng: random.Random) -> bytes:
+    """
+    Renders the pages as text, or as page images if scanned, so that paperless has to OCR them.
+    """
+    writer = PdfWriter()
+    catalog = writer.add()
+    page_tree = writer.add()
+    font = writer.add(b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>')
+
+    kids = []
+    for page in pages:
+        if scanned:
+            width, height, pixels = raster_page(page, rng)
+            image = writer.add_stream(
+                pixels,
+                b'/Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceGray '
+                b'/BitsPerComponent 8' % (width, height),
+            )
+            content = writer.add_stream(b'q %d 0 0 %d 0 0 cm /Im1 Do Q' % (PAGE_WIDTH, PAGE_HEIGHT))
+            resources = b'<< /XObject << /Im1 %d 0 R >> >>' % image
+        else:
+            content = writer.add_stream(text_page_content(page))
+            resources = b'<< /Font << /F1 %d 0 R >> >>' % font
+        kids.append(
+            writer.add(
+                b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] /Resources %b '
+                b'/Contents %d 0 R >>' % (page_tree, PAGE_WIDTH, PAGE_HEIGHT, resources, content)
+            )
+        )
+
+    writer.set(
+        page_tree,
+        b'<< /Type /Pages /Kids [%b] /Count %d >>'
+        % (b' '.join(b'%d 0 R' % kid for kid in kids), len(kids)),
+    )
+    writer.set(catalog, b'<< /Type /Catalog /Pages %d 0 R >>' % page_tree)
+    return writer.render(catalog)
+
+
+def raster_page(page: Page, rng: random.Random) -> tuple[int, int, bytes]:
+    """
+    Renders a page as 8 bit grayscale pixels: blocks looking like lines of text, scanner noise
+    and the barcode.
+    """
+    width = PAGE_WIDTH * SCAN_DPI // 72
+    height = PAGE_HEIGHT * SCAN_DPI // 72
+    pixels = bytearray(b'\xff' * width * height)
+
+    def fill(x: int, y: int, w: int, h: int, value: int):
+        for row in range(y, min(y + h, height)):
+            start = row * width + x
+            pixels[start : start + min(w, width - x)] = bytes([value]) * min(w, width - x)
+
+    margin = SCAN_DPI
+    y = margin
+    for line in page.lines:
+        x = margin
+        for word in line.split():
+            word_width = len(word) * SCAN_DPI // 12
+            if x + word_width > width - margin:
+                break
+            fill(x, y, word_width, SCAN_DPI // 8, rng.randint(0, 60))
+            x += word_width + SCAN_DPI // 10
+        y += SCAN_DPI // 4
+        if y > height - 3 * margin:
+            break
+
+    if page.barcode:
+        module = 3
+        for offset, bar_width in bar_runs(page.barcode):
+            fill(margin + offset * module, height - 2 * margin, bar_width * module, margin, 0)
+
+    for _ in range(width * height // 500):
+        pixels[rng.randrange(len(pixels))] = rng.randint(0, 200)
+
+    return width, height, bytes(pixels)
+
+
+def png(page: Page, rng: random.Random) -> bytes:
+    width, height, pixels = raster_page(page, rng)
+    rows = b''.join(b'\x00' + pixels[row * width : (row + 1) * width] for row in range(height))
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return (
+            struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+        )
+
+    return b''.join(
+        [
+            b'\x89PNG\r\n\x1a\n',
+            chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 0, 0, 0, 0)),
+            chunk(b'IDAT', zlib.compress(rows)),
+            chunk(b'IEND', b''),
+        ]
+    )
+
+
+def eml(title: str, pages: list[Page], rng: random.Random) -> bytes:
+    message = email.message.EmailMessage()
+    message['Subject'] = title
+    message['From'] = 'Load Test <loadtest@example.com>'
+    message['To'] = 'paperless@example.com'
+    message['Date'] = email.utils.formatdate()
+    message['Message-ID'] = email.utils.make_msgid(domain='example.com')
+    message.set_content('\n'.join(pages[0].lines))
+    if len(pages) > 1:
+        message.add_attachment(
+            pdf(pages[1:], scanned=False, rng=rng),
+            maintype='application',
+            subtype='pdf',
+            filename=f'{title}.pdf',
+        )
+    return message.as_bytes()
+
+
+def generate(
+    spec: FixtureSpec,
+    name: str,
+    rng: random.Random,
+    asns: typing.Iterator[int],
+) -> Fixture:
+    pages = document_pages(spec, name, rng, asns)
+    if spec.kind == 'pdf':
+        return Fixture(f'{name}.pdf', pdf(pages, scanned=False, rng=rng), spec.documents)
+    if spec.kind == 'scan':
+        return Fixture(f'{name}.pdf', pdf(pages, scanned=True, rng=rng), spec.documents)
+    # Images and mails are always consumed as a single document without barcode detection
+    if spec.kind == 'png':
+        return Fixture(f'{name}.png', png(pages[0], rng), 1)
+    return Fixture(f'{name}.eml', eml(name, pages, rng), 1)
@@ -0,0 +1,235 @@
+"""
+Hands synthetic documents to paperless and measures how long it takes to consume them.
+
+Stages per file, from the timestamps of the paperless tasks:
+  pickup:     submitted until paperless created the consume task
+  queue:      task created until a worker started it, if the API reports the start
+  processing: task started (or created) until the last document of the file was stored
+  total:      submitted until the last document of the file was stored
+
+The pickup stage compares local with server time, keep the clocks in sync.
+"""
+
+import argparse
+import dataclasses
+import datetime
+import itertools
+import json
+import logging
+import os
+import pathlib
+import random
+import time
+import typing
+
+import requests
+
+from paperless.loadtest.fixtures import Fixture, FixtureKind, FixtureSpec, generate
+from paperless.loadtest.stats import Summary, throughput
+
+logger = logging.getLogger(__name__)
+
+STAGES = ('pickup', 'queue', 'processing', 'total')
+
+
+class PaperlessClient:
+    def __init__(self, url: str, token: str, timeout: float = 30):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers['Authorization'] = f'Token {token}'
+
+    def tasks(self) -> list[dict[str, typing.Any]]:
+        response = self.session.get(f'{self.url}/api/tasks/', timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def upload(self, fixture: Fixture) -> str:
+        response = self.session.post(
+            f'{self.url}/api/documents/post_document/',
+            files={'document': (fixture.name, fixture.data)},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return response.json()
+
+
+@dataclasses.dataclass
+class Submission:
+    fixture: Fixture
+    submitted: float
+    stages: dict[str, float] = dataclasses.field(default_factory=dict)
+    error: str | None = None
+    done: bool = False
+
+    @property
+    def stem(self) -> str:
+        return pathlib.PurePath(self.fixture.name).stem
+
+
+def drop(fixture: Fixture, consume_dir: pathlib.Path):
+    # Ignored by paperless and the consume watcher until renamed
+    partial = consume_dir / f'._{fixture.name}'
+    partial.write_bytes(fixture.data)
+    partial.replace(consume_dir / fixture.name)
+
+
+def timestamp(value: str | None) -> float | None:
+    return datetime.datetime.fromisoformat(value).timestamp() if value else None
+
+
+def update(submission: Submission, tasks: list[dict[str, typing.Any]]):
+    """
+    Evaluates the tasks of a submission, split files create one task per part.
+    """
+    own = [t for t in tasks if (t.get('task_file_name') or '').startswith(submission.stem)]
+    if failed := [t for t in own if t['status'] == 'FAILURE']:
+        submission.error = failed[0].get('result') or 'failed'
+        submission.done = True
+        return
+
+    stored = [t for t in own if t['status'] == 'SUCCESS' and t.get('related_document')]
+    if len(stored) < submission.fixture.documents:
+        return
+
+    created = min(typing.cast(float, timestamp(t['date_created'])) for t in own)
+    started = [s for t in own if (s := timestamp(t.get('date_started')))]
+    finished = max(typing.cast(float, timestamp(t['date_done'])) for t in stored)
+
+    submission.stages['pickup'] = created - submission.submitted
+    if started:
+        submission.stages['queue'] = min(started) - created
+    submission.stages['processing'] = finished - (min(started) if started else created)
+    submission.stages['total'] = finished - submission.submitted
+    submission.done = True
+
+
+def run(
+    client: PaperlessClient,
+    fixtures: typing.Iterable[Fixture],
+    consume_dir: pathlib.Path | None,
+    interval: float,
+    poll_interval: float,
+    timeout: float,
+) -> list[Submission]:
+    submissions = []
+    for fixture in fixtures:
+        if consume_dir:
+            drop(fixture, consume_dir)
+        else:
+            client.upload(fixture)
+        submissions.append(Submission(fixture, time.time()))
+        logger.info('Submitted %s', fixture.name)
+        time.sleep(interval)
+
+    deadline = time.monotonic() + timeout
+    while pending := [s for s in submissions if not s.done]:
+        if time.monotonic() > deadline:
+            for submission in pending:
+                submission.error = 'timeout'
+            break
+        time.sleep(poll_interval)
+        tasks = client.tasks()
+        for submission in pending:
+            update(submission, tasks)
+        logger.info('%d of %d files processed', len(submissions) - len(pending), len(submissions))
+
+    return submissions
+
+
+def report(submissions: list[Submission]) -> dict[str, typing.Any]:
+    completed = [s for s in submissions if s.done and not s.error]
+    result: dict[str, typing.Any] = {
+        'files': len(submissions),
+        'documents': sum(s.fixture.documents for s in completed),
+        'failures': {s.fixture.name: s.error for s in submissions if s.error},
+        'stages': {},
+    }
+    if completed:
+        start = min(s.submitted for s in submissions)
+        end = max(s.submitted + s.stages['total'] for s in completed)
+        result['documents_per_minute'] = throughput(result['documents'], start, end)
+        for stage in STAGES:
+            if values := [s.stages[stage] for s in completed if stage in s.stages]:
+                result['stages'][stage] = dataclasses.asdict(Summary.of(values))
+    return result
+
+
+def format_report(result: dict[str, typing.Any]) -> str:
+    lines = [
+        f'files: {result["files"]}, documents: {result["documents"]}, '
+        f'failures: {len(result["failures"])}',
+    ]
+    if 'documents_per_minute' in result:
+        lines.append(f'throughput: {result["documents_per_minute"]:.1f} documents/minute')
+    lines.append(f'{"stage":<12}{"p50":>10}{"p95":>10}{"p99":>10}{"max":>10}')
+    for stage, summary in result['stages'].items():
+        lines.append(
+            f'{stage:<12}'
+            + ''.join(f'{summary[key]:>9.1f}s' for key in ('p50', 'p95', 'p99', 'max'))
+        )
+    lines += [f'failed: {name}: {error}' for name, error in result['failures'].items()]
+    return '\n'.join(lines)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--url', required=True)
+    parser.add_argument('--token', default=os.environ.get('PAPERLESS_TOKEN'))
+    parser.add_argument(
+        '--consume-dir',
+        type=pathlib.Path,
+        help='drop files into this directory instead of uploading them through the API',
+    )
+    parser.add_argument('--files', type=int, default=20)
+    parser.add_argument(
+        '--kind',
+        type=lambda kinds: kinds.split(','),
+        default=['pdf'],
+        help='comma separated fixture kinds used in turn: pdf, scan, png, eml',
+    )
+    parser.add_argument('--pages', type=int, default=1, help='pages per document')
+    parser.add_argument('--documents-per-file', type=int, default=1)
+    parser.add_argument('--asn', action='store_true', help='start documents with ASN barcodes')
+    parser.add_argument('--asn-start', type=int, default=int(time.time()) % 100000 * 10)
+    parser.add_argument('--interval', type=float, default=0, help='seconds between files')
+    parser.add_argument('--poll-interval', type=float, default=2)
+    parser.add_argument('--timeout', type=float, default=3600)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--json', type=pathlib.Path, help='write the report to this file')
+    args = parser.parse_args(argv)
+
+    if not args.token:
+        parser.error('--token or PAPERLESS_TOKEN is required')
+    for kind in args.kind:
+        if kind not in typing.get_args(FixtureKind):
+            parser.error(f'unknown fixture kind {kind}')
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+
+    rng = random.Random(args.seed)
+    asns = itertools.count(args.asn_start)
+    run_id = f'loadtest-{datetime.datetime.now():%Y%m%d%H%M%S}'
+    kinds = itertools.cycle(args.kind)
+    fixtures = (
+        generate(
+            FixtureSpec(next(kinds), args.pages, args.documents_per_file, args.asn),
+            f'{run_id}-{index:05d}',
+            rng,
+            asns,
+        )
+        for index in range(args.files)
+    )
+
+    submissions = run(
+        PaperlessClient(args.url, args.token),
+        fixtures,
+        args.consume_dir,
+        args.interval,
+        args.poll_interval,
+        args.timeout,
+    )
+    result = report(submissions)
+    print(format_report(result))
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=2))
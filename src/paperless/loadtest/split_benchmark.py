@@ -0,0 +1,118 @@
+"""
+Benchmarks the barcode detection of the splitter on synthetic multi-document scans.
+
+Detects the barcodes of the same files with each of the given numbers of worker processes and
+reports the pages per second and the time per file. Every file must be split into the documents
+it was generated with, otherwise it is reported as a mismatch.
+
+    python -m paperless.loadtest.split_benchmark --files 4 --documents-per-file 5 --processes 1,2,4
+
+Needs the libraries of the splitter: zxing-cpp, pdf2image with poppler-utils and pikepdf.
+"""
+
+import argparse
+import concurrent.futures
+import dataclasses
+import json
+import pathlib
+import random
+import tempfile
+import time
+
+from paperless.ingest.splitter import (
+    ASN_PREFIX,
+    DPI,
+    SEPARATOR_BARCODE,
+    detect,
+    page_count,
+    separate,
+)
+from paperless.loadtest.fixtures import Fixture, FixtureSpec, generate
+from paperless.loadtest.stats import Summary
+
+
+@dataclasses.dataclass(frozen=True)
+class Result:
+    processes: int
+    pages: int
+    seconds: float
+    files: Summary
+    mismatches: list[str]
+
+    @property
+    def pages_per_second(self) -> float:
+        return self.pages / self.seconds if self.seconds else 0.0
+
+
+def benchmark(files: list[tuple[pathlib.Path, Fixture]], processes: int, dpi: int = DPI) -> Result:
+    pages = 0
+    durations = []
+    mismatches = []
+    with concurrent.futures.ProcessPoolExecutor(processes) as executor:
+        start = time.perf_counter()
+        for path, fixture in files:
+            file_start = time.perf_counter()
+            count = page_count(path) or 0
+            documents = separate(detect(path, count, dpi, executor), SEPARATOR_BARCODE, ASN_PREFIX)
+            durations.append(time.perf_counter() - file_start)
+            pages += count
+            if len(documents) != fixture.documents:
+                mismatches.append(fixture.name)
+        seconds = time.perf_counter() - start
+    return Result(processes, pages, seconds, Summary.of(durations), mismatches)
+
+
+def format_results(results: list[Result]) -> str:
+    lines = [f'{"processes":<12}{"pages/s":>10}{"speedup":>10}{"p50":>10}{"max":>10}']
+    for result in results:
+        speedup = result.pages_per_second / results[0].pages_per_second
+        lines.append(
+            f'{result.processes:<12}{result.pages_per_second:>10.1f}{speedup:>9.1f}x'
+            f'{result.files.p50:>9.1f}s{result.files.max:>9.1f}s'
+        )
+    lines += [
+        f'mismatch with {result.processes} processes: {name}'
+        for result in results
+        for name in result.mismatches
+    ]
+    return '\n'.join(lines)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--files', type=int, default=4)
+    parser.add_argument('--kind', choices=['pdf', 'scan'], default='scan')
+    parser.add_argument('--pages', type=int, default=2, help='pages per document')
+    parser.add_argument('--documents-per-file', type=int, default=5)
+    parser.add_argument('--asn', action=argparse.BooleanOptionalAction, default=True)
+    parser.add_argument(
+        '--processes',
+        type=lambda counts: [int(count) for count in counts.split(',')],
+        default=[1, 2, 4],
+        help='comma separated numbers of worker processes',
+    )
+    parser.add_argument('--dpi', type=int, default=DPI)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--json', type=pathlib.Path, help='write the results to this file')
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    asns = iter(range(1, args.files * args.documents_per_file + 1))
+    spec = FixtureSpec(args.kind, args.pages, args.documents_per_file, args.asn)
+    with tempfile.TemporaryDirectory() as directory:
+        files = []
+        for index in range(args.files):
+            fixture = generate(spec, f'split-{index:05d}', rng, asns)
+            path = pathlib.Path(directory, fixture.name)
+            path.write_bytes(fixture.data)
+            files.append((path, fixture))
+
+        results = [benchmark(files, processes, args.dpi) for processes in args.processes]
+
+    print(format_results(results))
+    if args.json:
+        args.json.write_text(json.dumps([dataclasses.asdict(r) for r in results], indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+import dataclasses
+import math
+import typing
+
+
+def percentile(values: typing.Sequence[float], q: float) -> float:
+    """
+    Returns the q-th percentile, linearly interpolated between the closest ranks.
+    """
+    if not values:
+        raise ValueError('percentile of an empty sequence')
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    lower = math.floor(rank)
+    upper = math.ceil(rank)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+@dataclasses.dataclass(frozen=True)
+class Summary:
+    count: int
+    mean: float
+    p50: float
+    p95: float
+    p99: float
+    max: float
+
+    @classmethod
+    def of(cls, values: typing.Sequence[float]) -> 'Summary':
+        return cls(
+            count=len(values),
+            mean=sum(values) / len(values),
+            p50=percentile(values, 50),
+            p95=percentile(values, 95),
+            p99=percentile(values, 99),
+            max=max(values),
+        )
+
+
+def throughput(documents: int, start: float, end: float) -> float:
+    """
+    Returns documents per minute between the start and end timestamps in seconds.
+    """
+    if end <= start:
+        return 0.0
+    return documents * 60 / (end - start)
@@ -0,0 +1,485 @@
+"""
+Prometheus exporters, monitors and the grafana dashboard.
+
+Standalone exporters get a ServiceMonitor, metrics served from containers of the paperless, tika
+and gotenberg pods are scraped with PodMonitors from container ports named metrics.
+"""
+
+import json
+import typing
+
+import pulumi as p
+import pulumi_kubernetes as k8s
+
+from paperless.config import ExporterConfig, MonitoringConfig
+from paperless.redis import REDIS_PORT
+from paperless.utils import add_pod_scheduling, container_resources
+
+CELERY_EXPORTER_PORT = 9808
+REDIS_EXPORTER_PORT = 9121
+POSTGRES_EXPORTER_PORT = 9187
+STATSD_EXPORTER_PORT = 9102
+STATSD_PORT = 9125
+JMX_EXPORTER_PORT = 9404
+JMX_PORT = 9010
+
+PROMETHEUS_API_VERSION = 'monitoring.coreos.com/v1'
+
+CONSUME_TASK = 'documents.tasks.consume_file'
+
+# Consuming a large scan takes minutes, the default buckets end at 10s
+CELERY_RUNTIME_BUCKETS = '0.5,1,2.5,5,10,30,60,120,300,600,1800'
+
+# Gunicorn statsd metrics, prefixed with paperless
+GUNICORN_STATSD_ARGS = f'--statsd-host=localhost:{STATSD_PORT} --statsd-prefix=paperless'
+STATSD_MAPPING = """\
+defaults:
+  observer_type: histogram
+  histogram_options:
+    buckets: [0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+mappings:
+  - match: paperless.gunicorn.request.status.*
+    name: gunicorn_responses_total
+    labels:
+      status: $1
+  - match: paperless.gunicorn.request.duration
+    name: gunicorn_request_duration_seconds
+  - match: paperless.gunicorn.requests
+    name: gunicorn_requests_total
+  - match: paperless.gunicorn.workers
+    name: gunicorn_workers
+  - match: paperless.gunicorn.log.*
+    name: gunicorn_log_total
+    labels:
+      level: $1
+"""
+
+# Remote JMX restricted to the loopback interface, it is unauthenticated
+TIKA_JMX_OPTIONS = ' '.join(
+    [
+        f'-Dcom.sun.management.jmxremote.port={JMX_PORT}',
+        f'-Dcom.sun.management.jmxremote.rmi.port={JMX_PORT}',
+        '-Dcom.sun.management.jmxremote.host=127.0.0.1',
+        '-Djava.rmi.server.hostname=127.0.0.1',
+        '-Dcom.sun.management.jmxremote.authenticate=false',
+        '-Dcom.sun.management.jmxremote.ssl=false',
+    ]
+)
+JMX_EXPORTER_CONFIG = f"""\
+hostPort: 127.0.0.1:{JMX_PORT}
+lowercaseOutputName: true
+lowercaseOutputLabelNames: true
+whitelistObjectNames:
+  - java.lang:*
+"""
+
+
+def exporter_container(
+    name: str,
+    image: str,
+    port: int,
+    exporter_config: ExporterConfig,
+) -> k8s.core.v1.ContainerArgsDict:
+    container: k8s.core.v1.ContainerArgsDict = {
+        'name': name,
+        'image': image,
+        'ports': [{'name': 'metrics', 'container_port': port}],
+    }
+    if resources := container_resources(exporter_config.resources):
+        container['resources'] = resources
+    return container
+
+
+def statsd_exporter_container(exporter_config: ExporterConfig) -> k8s.core.v1.ContainerArgsDict:
+    """
+    Sidecar of the webserver translating the gunicorn statsd metrics.
+    """
+    container = exporter_container(
+        'statsd-exporter',
+        f'docker.io/prom/statsd-exporter:{exporter_config.version}',
+        STATSD_EXPORTER_PORT,
+        exporter_config,
+    )
+    container['args'] = [
+        f'--statsd.listen-udp=:{STATSD_PORT}',
+        '--statsd.listen-tcp=',
+        '--statsd.mapping-config=/etc/statsd-exporter/mapping.yaml',
+    ]
+    container['volume_mounts'] = [
+        {'name': 'statsd-exporter', 'mount_path': '/etc/statsd-exporter', 'read_only': True},
+    ]
+    return container
+
+
+def create_statsd_exporter_volume(opts: p.ResourceOptions) -> k8s.core.v1.VolumeArgsDict:
+    config_map = k8s.core.v1.ConfigMap(
+        'statsd-exporter',
+        data={'mapping.yaml': STATSD_MAPPING},
+        opts=opts,
+    )
+    return {'name': 'statsd-exporter', 'config_map': {'name': config_map.metadata.name}}
+
+
+def jmx_exporter_container(exporter_config: ExporterConfig) -> k8s.core.v1.ContainerArgsDict:
+    """
+    Sidecar of tika reading the JVM metrics via remote JMX.
+    """
+    container = exporter_container(
+        'jmx-exporter',
+        f'docker.io/bitnami/jmx-exporter:{exporter_config.version}',
+        JMX_EXPORTER_PORT,
+        exporter_config,
+    )
+    container['args'] = [str(JMX_EXPORTER_PORT), '/etc/jmx-exporter/config.yaml']
+    container['volume_mounts'] = [
+        {'name': 'jmx-exporter', 'mount_path': '/etc/jmx-exporter', 'read_only': True},
+    ]
+    return container
+
+
+def create_jmx_exporter_volume(opts: p.ResourceOptions) -> k8s.core.v1.VolumeArgsDict:
+    config_map = k8s.core.v1.ConfigMap(
+        'jmx-exporter',
+        data={'config.yaml': JMX_EXPORTER_CONFIG},
+        opts=opts,
+    )
+    return {'name': 'jmx-exporter', 'config_map': {'name': config_map.metadata.name}}
+
+
+def create_exporter(
+    name: str,
+    container: k8s.core.v1.ContainerArgsDict,
+    port: int,
+    exporter_config: ExporterConfig,
+    monitoring_config: MonitoringConfig,
+    opts: p.ResourceOptions,
+):
+    app_labels = {'app': name}
+    pod_spec: k8s.core.v1.PodSpecArgsDict = {'containers': [container]}
+    add_pod_scheduling(pod_spec, exporter_config.resources, app_labels)
+    k8s.apps.v1.Deployment(
+        name,
+        metadata={'name': name},
+        spec={
+            'replicas': 1,
+            'selector': {'match_labels': app_labels},
+            'template': {
+                'metadata': {'labels': app_labels},
+                'spec': pod_spec,
+            },
+        },
+        opts=opts,
+    )
+    # ServiceMonitors select services by their labels
+    k8s.core.v1.Service(
+        name,
+        metadata={'name': name, 'labels': app_labels},
+        spec={
+            'ports': [{'name': 'metrics', 'port': port}],
+            'selector': app_labels,
+        },
+        opts=opts,
+    )
+    k8s.apiextensions.CustomResource(
+        name,
+        api_version=PROMETHEUS_API_VERSION,
+        kind='ServiceMonitor',
+        metadata={'name': name, 'labels': monitoring_config.labels},
+        spec={
+            'selector': {'matchLabels': app_labels},
+            'endpoints': [{'port': 'metrics', 'interval': monitoring_config.interval}],
+        },
+        opts=opts,
+    )
+
+
+def create_pod_monitor(
+    name: str,
+    labels: dict[str, str],
+    port: str,
+    path: str,
+    monitoring_config: MonitoringConfig,
+    opts: p.ResourceOptions,
+):
+    k8s.apiextensions.CustomResource(
+        name,
+        api_version=PROMETHEUS_API_VERSION,
+        kind='PodMonitor',
+        metadata={'name': name, 'labels': monitoring_config.labels},
+        spec={
+            'selector': {'matchLabels': labels},
+            'podMetricsEndpoints': [
+                {'port': port, 'path': path, 'interval': monitoring_config.interval},
+            ],
+        },
+        opts=opts,
+    )
+
+
+def create_monitoring(
+    monitoring_config: MonitoringConfig,
+    redis_services: dict[str, k8s.core.v1.Service],
+    queues: list[str],
+    postgres_service: p.Input[str],
+    postgres_port: p.Input[int],
+    database_name: p.Input[str],
+    username: p.Input[str],
+    config_secret: k8s.core.v1.Secret,
+    opts: p.ResourceOptions,
+):
+    """
+    Deploys the enabled exporters and monitors as well as the dashboard.
+    """
+    broker_url = p.Output.format('redis://{}:{}', redis_services['redis'].metadata.name, REDIS_PORT)
+
+    if exporter_config := monitoring_config.celery_exporter:
+        container = exporter_container(
+            'celery-exporter',
+            f'docker.io/danihodovic/celery-exporter:{exporter_config.version}',
+            CELERY_EXPORTER_PORT,
+            exporter_config,
+        )
+        container['env'] = [
+            {'name': 'CE_BROKER_URL', 'value': broker_url},
+            {'name': 'CE_BUCKETS', 'value': CELERY_RUNTIME_BUCKETS},
+        ]
+        create_exporter(
+            'celery-exporter',
+            container,
+            CELERY_EXPORTER_PORT,
+            exporter_config,
+            monitoring_config,
+            opts,
+        )
+
+    if exporter_config := monitoring_config.redis_exporter:
+        for name, service in redis_services.items():
+            container = exporter_container(
+                'redis-exporter',
+                f'docker.io/oliver006/redis_exporter:{exporter_config.version}',
+                REDIS_EXPORTER_PORT,
+                exporter_config,
+            )
+            container['env'] = [
+                {
+                    'name': 'REDIS_ADDR',
+                    'value': p.Output.format('redis://{}:{}', service.metadata.name, REDIS_PORT),
+                },
+            ]
+            if service is redis_services['redis']:
+                # Length of the celery queues
+                container['env'].append(
+                    {'name': 'REDIS_EXPORTER_CHECK_SINGLE_KEYS', 'value': ','.join(queues)}
+                )
+            create_exporter(
+                f'{name}-exporter',
+                container,
+                REDIS_EXPORTER_PORT,
+                exporter_config,
+                monitoring_config,
+                opts,
+            )
+
+    if exporter_config := monitoring_config.postgres_exporter:
+        container = exporter_container(
+            'postgres-exporter',
+            f'quay.io/prometheuscommunity/postgres-exporter:{exporter_config.version}',
+            POSTGRES_EXPORTER_PORT,
+            exporter_config,
+        )
+        container['env'] = [
+            {
+                'name': 'DATA_SOURCE_URI',
+                'value': p.Output.format(
+                    '{}:{}/{}?sslmode=disable', postgres_service, postgres_port, database_name
+                ),
+            },
+            {'name': 'DATA_SOURCE_USER', 'value': username},
+            {
+                'name': 'DATA_SOURCE_PASS',
+                'value_from': {
+                    'secret_key_ref': {
+                        'name': config_secret.metadata.name,
+                        'key': 'PAPERLESS_DBPASS',
+                    },
+                },
+            },
+        ]
+        create_exporter(
+            'postgres-exporter',
+            container,
+            POSTGRES_EXPORTER_PORT,
+            exporter_config,
+            monitoring_config,
+            opts,
+        )
+
+    if monitoring_config.statsd_exporter:
+        # Only the pods running the webserver have a metrics port
+        create_pod_monitor(
+            'paperless-webserver',
+            {'app': 'paperless'},
+            'metrics',
+            '/metrics',
+            monitoring_config,
+            opts,
+        )
+    if monitoring_config.jmx_exporter:
+        create_pod_monitor('tika', {'app': 'tika'}, 'metrics', '/metrics', monitoring_config, opts)
+    if monitoring_config.gotenberg:
+        create_pod_monitor(
+            'gotenberg',
+            {'app': 'gotenberg'},
+            'http',
+            '/prometheus/metrics',
+            monitoring_config,
+            opts,
+        )
+
+    if monitoring_config.dashboard:
+        k8s.core.v1.ConfigMap(
+            'paperless-dashboard',
+            metadata={'labels': {'grafana_dashboard': '1'}},
+            data={'paperless.json': json.dumps(dashboard(), indent=2)},
+            opts=opts,
+        )
+
+
+def dashboard() -> dict[str, typing.Any]:
+    """
+    Returns the grafana dashboard covering ingest throughput and latencies.
+    """
+    datasource = {'type': 'prometheus', 'uid': '${datasource}'}
+
+    def quantiles(metric: str, selector: str = '', by: str = 'le') -> list[tuple[str, str]]:
+        return [
+            (
+                f'p{int(q * 100)}',
+                f'histogram_quantile({q}, sum by ({by}) (rate({metric}_bucket{selector}[5m])))',
+            )
+            for q in (0.5, 0.95, 0.99)
+        ]
+
+    rows: list[tuple[str, str, list[tuple[str, str]]]] = [
+        (
+            'Documents per minute',
+            'short',
+            [
+                (
+                    'consumed',
+                    f'sum(rate(celery_task_succeeded_total{{name="{CONSUME_TASK}"}}[5m])) * 60',
+                ),
+                (
+                    'failed',
+                    f'sum(rate(celery_task_failed_total{{name="{CONSUME_TASK}"}}[5m])) * 60',
+                ),
+            ],
+        ),
+        (
+            'Consume task duration',
+            's',
+            quantiles('celery_task_runtime', f'{{name="{CONSUME_TASK}"}}'),
+        ),
+        (
+            'Queue length',
+            'short',
+            [('{{queue_name}}', 'sum by (queue_name) (celery_queue_length)')],
+        ),
+        (
+            'Task duration p95 by task',
+            's',
+            [
+                (
+                    '{{name}}',
+                    'histogram_quantile(0.95, sum by (le, name) '
+                    '(rate(celery_task_runtime_bucket[5m])))',
+                ),
+            ],
+        ),
+        (
+            'Webserver request duration',
+            's',
+            quantiles('gunicorn_request_duration_seconds'),
+        ),
+        (
+            'Webserver responses',
+            'reqps',
+            [('{{status}}', 'sum by (status) (rate(gunicorn_responses_total[5m]))')],
+        ),
+        (
+            # Neither tika nor gotenberg expose request latencies, queued conversions show
+            # when they are the bottleneck.
+            'Conversion backlog',
+            'short',
+            [
+                ('chromium', 'sum(gotenberg_chromium_requests_queue_size)'),
+                ('libreoffice', 'sum(gotenberg_libreoffice_requests_queue_size)'),
+            ],
+        ),
+        (
+            'Tika JVM heap',
+            'bytes',
+            [
+                ('used {{pod}}', 'java_lang_memory_heapmemoryusage_used{pod=~"tika-.*"}'),
+                ('max {{pod}}', 'java_lang_memory_heapmemoryusage_max{pod=~"tika-.*"}'),
+            ],
+        ),
+        (
+            'Redis memory',
+            'bytes',
+            [
+                ('used {{service}}', 'redis_memory_used_bytes'),
+                ('max {{service}}', 'redis_memory_max_bytes'),
+            ],
+        ),
+        (
+            'Database transactions',
+            'ops',
+            [
+                (
+                    '{{datname}}',
+                    'sum by (datname) (rate(pg_stat_database_xact_commit[5m]) '
+                    '+ rate(pg_stat_database_xact_rollback[5m]))',
+                ),
+            ],
+        ),
+    ]
+
+    panels = [
+        {
+            'id': index + 1,
+            'type': 'timeseries',
+            'title': title,
+            'datasource': datasource,
+            'gridPos': {'x': index % 2 * 12, 'y': index // 2 * 8, 'w': 12, 'h': 8},
+            'fieldConfig': {'defaults': {'unit': unit}, 'overrides': []},
+            'targets': [
+                {
+                    'refId': chr(ord('A') + target_index),
+                    'datasource': datasource,
+                    'expr': expr,
+                    'legendFormat': legend,
+                }
+                for target_index, (legend, expr) in enumerate(targets)
+            ],
+        }
+        for index, (title, unit, targets) in enumerate(rows)
+    ]
+
+    return {
+        'uid': 'paperless',
+        'title': 'Paperless',
+        'schemaVersion': 39,
+        'refresh': '1m',
+        'time': {'from': 'now-6h', 'to': 'now'},
+        'templating': {
+            'list': [
+                {
+                    'name': 'datasource',
+                    'type': 'datasource',
+                    'query': 'prometheus',
+                },
+            ],
+        },
+        'panels': panels,
+    }
@@ -1,18 +1,117 @@
 import json
+import math
+import typing
 
-import deploy_base.opnsense.unbound.host_override
 import pulumi as p
 import pulumi_kubernetes as k8s
 import pulumi_postgresql as postgresql
 import pulumi_random as random
 
-from paperless.config import ComponentConfig
+from paperless.config import (
+    ComponentConfig,
+    ConsumeWatcherConfig,
+    ConversionServiceConfig,
+    ExportConfig,
+    ExporterConfig,
+    MaintenanceConfig,
+    MigrationConfig,
+    NfsMountOptionsConfig,
+    PrepullConfig,
+    ResourcesConfig,
+    ScratchConfig,
+    SplitterConfig,
+    VolumeConfig,
+    WebserverConfig,
+    WorkerAutoscalingConfig,
+    WorkerConfig,
+)
+from paperless.django_settings import (
+    DEFAULT_QUEUE,
+    MAIL_QUEUE,
+    settings_override,
+    task_queues,
+)
+from paperless.ingress import create_ingress
+from paperless.redis import REDIS_PORT, create_redis
+from paperless.utils import add_pod_scheduling, container_resources
 
-REDIS_PORT = 6379
 PAPERLESS_PORT = 8000
 TIKA_PORT = 9998
 GOTENBERG_PORT = 3000
 
+PAPERLESS_DIR = '/usr/src/paperless'
+
+# Assumed CPU allocation for deriving process counts of unconstrained containers
+DEFAULT_CPU_CORES = 4
+# Celery workers and threads of unconstrained containers
+DEFAULT_TASK_WORKERS = 4
+DEFAULT_THREADS_PER_WORKER = 4
+# Time for celery to shut down on top of the task timeout
+WORKER_SHUTDOWN_SECONDS = 60
+
+# Default startup budget of the webserver, migrations of an upgrade can take a lot longer
+SINGLE_STARTUP_SECONDS = 30 * 60
+SPLIT_STARTUP_SECONDS = 5 * 60
+STARTUP_PROBE_PERIOD_SECONDS = 5
+
+# Mount path of the export share in the export job
+EXPORT_DIR = '/export'
+
+# Directory on the data volume paperless consumes from when the consume watcher is enabled
+CONSUME_STAGING_DIR = 'consume'
+# Directory on the data volume the consume watcher stages to for the splitter
+SPLITTER_STAGING_DIR = 'split'
+
+# The image entrypoint starts all paperless services in one container. The split workloads and
+# the jobs replace it with the single process they run, as the paperless user.
+WEBSERVER_COMMAND = [
+    'gunicorn',
+    '-c',
+    f'{PAPERLESS_DIR}/gunicorn.conf.py',
+    'paperless.asgi:application',
+]
+WORKER_COMMAND = [
+    'celery',
+    '--app',
+    'paperless',
+    'worker',
+    '--loglevel',
+    'INFO',
+    '--without-mingle',
+    '--without-gossip',
+]
+SCHEDULER_COMMAND = ['celery', '--app', 'paperless', 'beat']
+CONSUMER_COMMAND = ['python3', 'manage.py', 'document_consumer']
+# Also does what the entrypoint does besides the migrations before starting the services
+MIGRATE_COMMAND = [
+    '/bin/sh',
+    '-c',
+    f'mkdir -p {PAPERLESS_DIR}/data/index {PAPERLESS_DIR}/media/documents/originals'
+    f' {PAPERLESS_DIR}/media/documents/thumbnails'
+    ' && python3 manage.py migrate --no-input'
+    ' && python3 manage.py manage_superuser',
+]
+
+# Keeps the pre-pull pods running after their init containers pulled the images
+PAUSE_IMAGE = 'registry.k8s.io/pause:3.10'
+
+CONSUMER_IGNORE_PATTERNS = [
+    '._*',
+    '.DS_Store',
+    '.DS_STORE',
+    '.localized/*',
+    '.stfolder/*',
+    '.stversions/*',
+    '@eaDir/*',
+    '#recycle/*',
+    'desktop.ini',
+    'Thumbs.db',
+]
+
+# Django settings module layered over the stock paperless settings, see django_settings.py
+SETTINGS_OVERRIDE_FILE = 'settings_override.py'
+SETTINGS_OVERRIDE_MODULE = 'paperless.settings_override'
+
 
 class Paperless(p.ComponentResource):
     def __init__(
@@ -63,19 +162,39 @@ class Paperless(p.ComponentResource):
             provider=namespaced_provider,
         )
 
-        redis_service = create_redis(component_config, k8s_opts)
+        redis_config = component_config.redis
+        redis_service = create_redis('redis', redis_config.version, redis_config, k8s_opts)
+        redis_services = {'redis': redis_service}
         tika_service = create_tika(component_config, k8s_opts)
         gotenberg_service = create_gotenberg(component_config, k8s_opts)
 
-        env_vars = {
+        # Modules of optional features are imported where they are used, so that stacks without
+        # them neither import these nor the kubernetes API groups they reference.
+        if pgbouncer_config := component_config.postgres.pgbouncer:
+            from paperless.pgbouncer import PGBOUNCER_PORT, create_pgbouncer
+
+            pgbouncer_service = create_pgbouncer(
+                pgbouncer_config,
+                postgres_service,
+                postgres_port,
+                database.name,
+                postgres_user.name,
+                postgres_password.result,
+                k8s_opts,
+            )
+            db_host: p.Input[str] = pgbouncer_service.metadata.name
+            db_port: p.Input[str] = str(PGBOUNCER_PORT)
+        else:
+            db_host = postgres_service
+            db_port = p.Output.from_input(postgres_port).apply(lambda port: str(port))
+
+        env_vars: dict[str, p.Input[str]] = {
             'PAPERLESS_REDIS': p.Output.format(
                 'redis://{}:{}',
                 redis_service.metadata.name,
                 REDIS_PORT,
             ),
             'PAPERLESS_CONSUMER_POLLING': '30',
-            'PAPERLESS_TASK_WORKERS': '4',
-            'PAPERLESS_THREADS_PER_WORKER': '4',
             # Extend the polling delay to account for HP bitch iteratively updating its PDFs after
             # scanning each page.
             'PAPERLESS_CONSUMER_POLLING_DELAY': '30',
@@ -85,7 +204,7 @@ class Paperless(p.ComponentResource):
             # https://docs.paperless-ngx.com/troubleshooting/#gunicorn-fails-to-start-with-is-not-a-valid-port-number
             'PAPERLESS_PORT': str(PAPERLESS_PORT),
             'PAPERLESS_ADMIN_USER': admin_username,
-            'PAPERLESS_OCR_LANGUAGE': 'deu+eng',
+            **component_config.paperless.ocr.env_vars(),
             # Authentication
             'PAPERLESS_APPS': ','.join(
                 (
@@ -96,28 +215,15 @@ class Paperless(p.ComponentResource):
             'PAPERLESS_ACCOUNT_EMAIL_VERIFICATION': 'none',
             'PAPERLESS_OIDC_DEFAULT_GROUP': 'readers',
             'PAPERLESS_DBENGINE': 'postgresql',
-            'PAPERLESS_DBHOST': postgres_service,
-            'PAPERLESS_DBPORT': p.Output.from_input(postgres_port).apply(lambda port: str(port)),
+            'PAPERLESS_DBHOST': db_host,
+            'PAPERLESS_DBPORT': db_port,
             'PAPERLESS_DBNAME': database.name,
             'PAPERLESS_DBUSER': postgres_user.name,
             'PAPERLESS_CONSUMER_ENABLE_BARCODES': 'true',
             'PAPERLESS_CONSUMER_ENABLE_ASN_BARCODE': 'true',
             'PAPERLESS_CONSUMER_BARCODE_SCANNER': 'ZXING',
             'PAPERLESS_CONSUMER_RECURSIVE': 'true',
-            'PAPERLESS_CONSUMER_IGNORE_PATTERNS': json.dumps(
-                [
-                    '._*',
-                    '.DS_Store',
-                    '.DS_STORE',
-                    '.localized/*',
-                    '.stfolder/*',
-                    '.stversions/*',
-                    '@eaDir/*',
-                    '#recycle/*',
-                    'desktop.ini',
-                    'Thumbs.db',
-                ]
-            ),
+            'PAPERLESS_CONSUMER_IGNORE_PATTERNS': json.dumps(CONSUMER_IGNORE_PATTERNS),
             'PAPERLESS_TIKA_ENABLED': 'true',
             'PAPERLESS_TIKA_ENDPOINT': p.Output.format(
                 'http://{}:{}', tika_service.metadata.name, TIKA_PORT
@@ -126,9 +232,39 @@ class Paperless(p.ComponentResource):
                 'http://{}:{}', gotenberg_service.metadata.name, GOTENBERG_PORT
             ),
             'PAPERLESS_GMAIL_OAUTH_CLIENT_ID': component_config.mail.client_id,
-            'PAPERLESS_WEBSERVER_WORKERS': '4',
         }
 
+        if redis_config.cache:
+            redis_cache_service = create_redis(
+                'redis-cache', redis_config.version, redis_config.cache, k8s_opts
+            )
+            redis_services['redis-cache'] = redis_cache_service
+            # Picked up by the settings override
+            env_vars['PAPERLESS_CACHE_REDIS'] = p.Output.format(
+                'redis://{}:{}', redis_cache_service.metadata.name, REDIS_PORT
+            )
+
+        if component_config.paperless.splitter:
+            # The splitter pods only hand over complete files, but write from other nodes. These
+            # changes are not seen by inotify on a shared volume.
+            env_vars['PAPERLESS_CONSUMER_POLLING'] = '5'
+            del env_vars['PAPERLESS_CONSUMER_POLLING_DELAY']
+            del env_vars['PAPERLESS_CONSUMER_POLLING_RETRY_COUNT']
+            # Split before, only the ASN barcode on the first page of each document is left
+            env_vars['PAPERLESS_CONSUMER_BARCODE_MAX_PAGES'] = '1'
+        elif component_config.paperless.consume_watcher:
+            # The watcher sidecar only hands over complete files, paperless can use inotify
+            env_vars['PAPERLESS_CONSUMER_POLLING'] = '0'
+            del env_vars['PAPERLESS_CONSUMER_POLLING_DELAY']
+            del env_vars['PAPERLESS_CONSUMER_POLLING_RETRY_COUNT']
+
+        if maintenance_config := component_config.paperless.maintenance:
+            # Runs as cron jobs, see create_maintenance
+            if maintenance_config.classifier_schedule:
+                env_vars['PAPERLESS_TRAIN_TASK_CRON'] = 'disable'
+            if maintenance_config.index_schedule:
+                env_vars['PAPERLESS_INDEX_TASK_CRON'] = 'disable'
+
         config_secret = k8s.core.v1.Secret(
             'paperless-config',
             string_data={
@@ -207,97 +343,81 @@ class Paperless(p.ComponentResource):
             opts=k8s_opts,
         )
 
-        app_labels = {'app': 'paperless'}
-        sts = k8s.apps.v1.StatefulSet(
-            'paperless',
-            metadata={'name': 'paperless'},
-            spec={
-                'replicas': 1,
-                'selector': {'match_labels': app_labels},
-                'service_name': 'paperless-headless',
-                'template': {
-                    'metadata': {'labels': app_labels},
-                    'spec': {
-                        'containers': [
-                            {
-                                'name': 'paperless',
-                                'image': f'ghcr.io/paperless-ngx/paperless-ngx:{component_config.paperless.version}',
-                                'env': [
-                                    *[{'name': k, 'value': v} for k, v in env_vars.items()],
-                                ],
-                                'env_from': [
-                                    {
-                                        'secret_ref': {
-                                            'name': config_secret.metadata.name,
-                                        },
-                                    },
-                                ],
-                                'ports': [{'container_port': PAPERLESS_PORT}],
-                                'volume_mounts': [
-                                    {
-                                        'name': 'data',
-                                        'mount_path': '/usr/src/paperless/data',
-                                    },
-                                    {
-                                        'name': 'media',
-                                        'mount_path': '/usr/src/paperless/media',
-                                    },
-                                    {
-                                        'name': 'consume',
-                                        'mount_path': '/usr/src/paperless/consume',
-                                    },
-                                ],
-                            },
-                        ],
-                        'volumes': [
-                            {
-                                'name': 'consume',
-                                'csi': {
-                                    'driver': 'nfs.csi.k8s.io',
-                                    'volume_attributes': {
-                                        'server': component_config.paperless.consume_server,
-                                        'share': component_config.paperless.consume_share,
-                                        'mount_options': component_config.paperless.consume_mount_options,
-                                    },
-                                },
-                            },
-                        ],
-                        'security_context': {
-                            'fs_group': 1000,
-                        },
-                    },
-                },
-                'volume_claim_templates': [
-                    {
-                        'metadata': {'name': 'data'},
-                        'spec': {
-                            'access_modes': ['ReadWriteOnce'],
-                            'resources': {'requests': {'storage': '100Gi'}},
-                        },
-                    },
-                    {
-                        'metadata': {'name': 'media'},
-                        'spec': {
-                            'access_modes': ['ReadWriteOnce'],
-                            'resources': {'requests': {'storage': '100Gi'}},
-                        },
-                    },
-                ],
-            },
-            opts=k8s_opts,
-        )
+        pod = PaperlessPod(component_config, env_vars, config_secret)
+        if settings := settings_override(component_config):
+            pod.add_settings_override(settings, k8s_opts)
+        if watcher_config := component_config.paperless.consume_watcher:
+            add_consume_watcher(pod, watcher_config, k8s_opts)
+        if component_config.paperless.splitter:
+            # Paperless consumes what the splitter hands over, see create_splitter
+            pod.mounts['consume'] = consume_staging_mount()
+        if scratch_config := component_config.paperless.scratch:
+            add_scratch_volume(pod, scratch_config)
+        monitoring_config = component_config.monitoring
+        if monitoring_config and monitoring_config.statsd_exporter:
+            add_webserver_metrics(pod, monitoring_config.statsd_exporter, k8s_opts)
+
+        workload_opts = k8s_opts
+        if prepull_config := component_config.prepull:
+            # Rolls out once the images are on all nodes, instead of pulling them on demand
+            prepull = create_prepull(component_config, prepull_config, k8s_opts)
+            workload_opts = p.ResourceOptions.merge(
+                k8s_opts, p.ResourceOptions(depends_on=[prepull])
+            )
+
+        if component_config.paperless.mode == 'split':
+            webserver = create_split_workloads(pod, redis_service, workload_opts)
+        else:
+            webserver = create_single_workload(pod, workload_opts)
+
+        if tuning_config := component_config.postgres.tuning:
+            from paperless.postgres_tuning import create_postgres_tuning_job
+
+            # The workloads are ready once the migrations created the tables to tune
+            create_postgres_tuning_job(
+                tuning_config,
+                paperless_image(component_config),
+                postgres_service,
+                postgres_port,
+                database.name,
+                postgres_user.name,
+                config_secret,
+                p.ResourceOptions.merge(k8s_opts, p.ResourceOptions(depends_on=[webserver])),
+            )
+
+        if export_config := component_config.paperless.export:
+            create_export(pod, export_config, k8s_opts)
+        if maintenance_config:
+            create_maintenance(pod, maintenance_config, k8s_opts)
+
+        if monitoring_config:
+            from paperless.monitoring import create_monitoring
+
+            create_monitoring(
+                monitoring_config,
+                redis_services,
+                task_queues(component_config.paperless),
+                postgres_service,
+                postgres_port,
+                database.name,
+                postgres_user.name,
+                config_secret,
+                k8s_opts,
+            )
 
         service_paperless = k8s.core.v1.Service(
             'paperless',
             metadata={'name': 'paperless'},
             spec={
                 'ports': [{'port': PAPERLESS_PORT}],
-                'selector': sts.spec.selector.match_labels,
+                'selector': webserver.spec.selector.match_labels,
             },
             opts=k8s_opts,
         )
 
         # Create local DNS record
+        import deploy_base.opnsense.unbound.host_override
+
         traefic_service = k8s.core.v1.Service.get(
             'traefik-service', 'traefik/traefik', opts=k8s_opts
         )
@@ -309,150 +429,1056 @@ class Paperless(p.ComponentResource):
             ipaddress=traefic_service.status.load_balancer.ingress[0].ip,
         )
 
-        fqdn = f'paperless.{component_config.cloudflare.zone}'
-        k8s.apiextensions.CustomResource(
-            'ingress',
-            api_version='traefik.io/v1alpha1',
-            kind='IngressRoute',
-            metadata={
-                'name': 'ingress',
+        create_ingress(
+            f'paperless.{component_config.cloudflare.zone}',
+            service_paperless,
+            PAPERLESS_PORT,
+            component_config.paperless.ingress,
+            k8s_opts,
+        )
+
+        p.export(
+            'paperless_url',
+            p.Output.format('https://{}.{}', record.host, record.domain),
+        )
+
+        self.register_outputs({})
+
+
+def create_tika(component_config: ComponentConfig, opts: p.ResourceOptions) -> k8s.core.v1.Service:
+    container: k8s.core.v1.ContainerArgsDict = {
+        'name': 'tika',
+        'image': tika_image(component_config),
+        'ports': [{'container_port': TIKA_PORT}],
+        'readiness_probe': {
+            'http_get': {'path': '/tika', 'port': TIKA_PORT},
+            'initial_delay_seconds': 10,
+            'period_seconds': 10,
+        },
+    }
+    sidecars: list[k8s.core.v1.ContainerArgsDict] = []
+    volumes: list[k8s.core.v1.VolumeArgsDict] = []
+
+    monitoring_config = component_config.monitoring
+    if monitoring_config and (exporter_config := monitoring_config.jmx_exporter):
+        from paperless.monitoring import (
+            TIKA_JMX_OPTIONS,
+            create_jmx_exporter_volume,
+            jmx_exporter_container,
+        )
+
+        # The forked tika child process would inherit the JMX options and fail to bind the
+        # JMX port, kubernetes restarts the container on failures instead of the watchdog.
+        container['args'] = ['-noFork']
+        container['env'] = [{'name': 'JAVA_TOOL_OPTIONS', 'value': TIKA_JMX_OPTIONS}]
+        sidecars.append(jmx_exporter_container(exporter_config))
+        volumes.append(create_jmx_exporter_volume(opts))
+
+    return create_conversion_service(
+        'tika',
+        component_config.tika,
+        container,
+        TIKA_PORT,
+        opts,
+        sidecars,
+        volumes,
+    )
+
+
+def create_gotenberg(
+    component_config: ComponentConfig, opts: p.ResourceOptions
+) -> k8s.core.v1.Service:
+    gotenberg_config = component_config.gotenberg
+    auto_start = str(gotenberg_config.auto_start).lower()
+    return create_conversion_service(
+        'gotenberg',
+        gotenberg_config,
+        {
+            'name': 'gotenberg',
+            'image': gotenberg_image(component_config),
+            # The gotenberg chromium route is used to convert .eml files. We do not
+            # want to allow external content like tracking pixels or even javascript.
+            'command': [
+                'gotenberg',
+                '--chromium-disable-javascript=true',
+                '--chromium-allow-list=file:///tmp/.*',
+                # Start chromium and libreoffice with the pod so that the readiness probe only
+                # passes once the pod can actually convert documents.
+                f'--chromium-auto-start={auto_start}',
+                f'--libreoffice-auto-start={auto_start}',
+                f'--chromium-restart-after={gotenberg_config.restart_after}',
+                f'--libreoffice-restart-after={gotenberg_config.restart_after}',
+                f'--chromium-max-queue-size={gotenberg_config.max_queue_size}',
+                f'--libreoffice-max-queue-size={gotenberg_config.max_queue_size}',
+                f'--api-timeout={gotenberg_config.api_timeout}',
+            ],
+            'ports': [{'name': 'http', 'container_port': GOTENBERG_PORT}],
+            'readiness_probe': {
+                'http_get': {'path': '/health', 'port': GOTENBERG_PORT},
+                'initial_delay_seconds': 5,
+                'period_seconds': 10,
             },
+        },
+        GOTENBERG_PORT,
+        opts,
+    )
+
+
+def create_conversion_service(
+    name: str,
+    service_config: ConversionServiceConfig,
+    container: k8s.core.v1.ContainerArgsDict,
+    port: int,
+    opts: p.ResourceOptions,
+    sidecars: list[k8s.core.v1.ContainerArgsDict] | None = None,
+    volumes: list[k8s.core.v1.VolumeArgsDict] | None = None,
+) -> k8s.core.v1.Service:
+    if resources_spec := container_resources(service_config.resources):
+        container['resources'] = resources_spec
+
+    app_labels = {'app': name}
+    pod_spec: k8s.core.v1.PodSpecArgsDict = {'containers': [container, *(sidecars or [])]}
+    if volumes:
+        pod_spec['volumes'] = volumes
+    add_pod_scheduling(pod_spec, service_config.resources, app_labels)
+    spec: k8s.apps.v1.DeploymentSpecArgsDict = {
+        'selector': {'match_labels': app_labels},
+        'template': {
+            'metadata': {'labels': app_labels},
+            'spec': pod_spec,
+        },
+    }
+    if not service_config.autoscaled:
+        spec['replicas'] = service_config.min_replicas
+
+    deployment = k8s.apps.v1.Deployment(
+        name,
+        metadata={'name': name},
+        spec=spec,
+        opts=opts,
+    )
+
+    if service_config.autoscaled:
+        k8s.autoscaling.v2.HorizontalPodAutoscaler(
+            name,
+            metadata={'name': name},
             spec={
-                'entryPoints': ['websecure'],
-                'routes': [
+                'scale_target_ref': {
+                    'api_version': 'apps/v1',
+                    'kind': 'Deployment',
+                    'name': deployment.metadata.name,
+                },
+                'min_replicas': service_config.min_replicas,
+                'max_replicas': service_config.max_replicas,
+                'metrics': [
                     {
-                        'kind': 'Rule',
-                        'match': p.Output.concat('Host(`', fqdn, '`)'),
-                        'services': [
-                            {
-                                'name': service_paperless.metadata.name,
-                                'namespace': service_paperless.metadata.namespace,
-                                'port': PAPERLESS_PORT,
+                        'type': 'Resource',
+                        'resource': {
+                            'name': 'cpu',
+                            'target': {
+                                'type': 'Utilization',
+                                'average_utilization': service_config.target_cpu_utilization,
                             },
-                        ],
-                    }
+                        },
+                    },
                 ],
-                # use default wildcard certificate:
-                'tls': {},
             },
-            opts=k8s_opts,
+            opts=opts,
         )
 
-        p.export(
-            'paperless_url',
-            p.Output.format('https://{}.{}', record.host, record.domain),
+    return k8s.core.v1.Service(
+        name,
+        metadata={'name': name},
+        spec={
+            'ports': [{'port': port}],
+            'selector': deployment.spec.selector.match_labels,
+        },
+        opts=opts,
+    )
+
+
+def webserver_env_vars(
+    webserver_config: WebserverConfig, resources: ResourcesConfig
+) -> dict[str, p.Input[str]]:
+    # One gunicorn worker per core
+    workers = webserver_config.workers or resources.cpu_cores() or DEFAULT_CPU_CORES
+    return {'PAPERLESS_WEBSERVER_WORKERS': str(workers)}
+
+
+def worker_env_vars(
+    worker_config: WorkerConfig, resources: ResourcesConfig
+) -> dict[str, p.Input[str]]:
+    cores = resources.cpu_cores()
+    if cores is None:
+        # Unconstrained containers keep the counts they ran with before they were derived
+        workers = worker_config.workers or DEFAULT_TASK_WORKERS
+        threads = worker_config.threads_per_worker or DEFAULT_THREADS_PER_WORKER
+    else:
+        # Keeps workers times threads at the number of cores, tesseract runs one thread per page
+        # and parallel documents use the cores better than more threads per document.
+        workers = worker_config.workers or max(1, cores // 2)
+        threads = worker_config.threads_per_worker or max(1, cores // workers)
+    return {
+        'PAPERLESS_TASK_WORKERS': str(workers),
+        'PAPERLESS_THREADS_PER_WORKER': str(threads),
+        'PAPERLESS_WORKER_TIMEOUT': str(worker_config.task_timeout),
+    }
+
+
+def paperless_image(component_config: ComponentConfig) -> str:
+    return f'ghcr.io/paperless-ngx/paperless-ngx:{component_config.paperless.version}'
+
+
+def tika_image(component_config: ComponentConfig) -> str:
+    return f'docker.io/apache/tika:{component_config.tika.version}'
+
+
+def gotenberg_image(component_config: ComponentConfig) -> str:
+    return f'docker.io/gotenberg/gotenberg:{component_config.gotenberg.version}'
+
+
+def add_webserver_probes(container: k8s.core.v1.ContainerArgsDict, startup_seconds: int):
+    """
+    Only routes requests to paperless once it serves them and restarts it if it stops to.
+
+    The startup probe covers the database checks and migrations of the image entrypoint in single
+    mode, the other probes only start after it succeeded.
+    """
+    # localhost is always an allowed host of paperless
+    http_get: k8s.core.v1.HTTPGetActionArgsDict = {
+        'path': '/',
+        'port': PAPERLESS_PORT,
+        'http_headers': [{'name': 'Host', 'value': 'localhost'}],
+    }
+    container['startup_probe'] = {
+        'http_get': http_get,
+        'period_seconds': STARTUP_PROBE_PERIOD_SECONDS,
+        'timeout_seconds': 5,
+        'failure_threshold': math.ceil(startup_seconds / STARTUP_PROBE_PERIOD_SECONDS),
+    }
+    container['readiness_probe'] = {
+        'http_get': http_get,
+        'period_seconds': 10,
+        'timeout_seconds': 5,
+        'failure_threshold': 3,
+    }
+    container['liveness_probe'] = {
+        'http_get': http_get,
+        'period_seconds': 30,
+        'timeout_seconds': 10,
+        'failure_threshold': 4,
+    }
+
+
+class PaperlessPod:
+    """
+    Container and pod settings shared by all workloads running the paperless image.
+    """
+
+    def __init__(
+        self,
+        component_config: ComponentConfig,
+        env_vars: dict[str, p.Input[str]],
+        config_secret: k8s.core.v1.Secret,
+    ):
+        self.component_config = component_config
+        self.env_vars = env_vars
+        self.config_secret = config_secret
+        self.volumes: list[k8s.core.v1.VolumeArgsDict] = [consume_volume(component_config)]
+        # Paperless directories backed by something else than the pod volume of the same name
+        self.mounts: dict[str, k8s.core.v1.VolumeMountArgsDict] = {}
+        if component_config.paperless.storage.index:
+            self.mounts['index'] = {'name': 'index', 'mount_path': f'{PAPERLESS_DIR}/data/index'}
+        # Mounted into every paperless container in addition to the requested volumes
+        self.volume_mounts: list[k8s.core.v1.VolumeMountArgsDict] = []
+        # Run next to the document consumer
+        self.consumer_sidecars: list[k8s.core.v1.ContainerArgsDict] = []
+        # Run next to the webserver, which gets the additional environment variables
+        self.webserver_sidecars: list[k8s.core.v1.ContainerArgsDict] = []
+        self.webserver_env_vars: dict[str, p.Input[str]] = {}
+
+    def add_settings_override(self, settings: str, opts: p.ResourceOptions):
+        settings_config_map = k8s.core.v1.ConfigMap(
+            'paperless-settings',
+            data={SETTINGS_OVERRIDE_FILE: settings},
+            opts=opts,
+        )
+        self.env_vars['DJANGO_SETTINGS_MODULE'] = SETTINGS_OVERRIDE_MODULE
+        self.volumes.append(
+            {'name': 'settings', 'config_map': {'name': settings_config_map.metadata.name}}
+        )
+        self.volume_mounts.append(
+            {
+                'name': 'settings',
+                'mount_path': f'{PAPERLESS_DIR}/src/paperless/{SETTINGS_OVERRIDE_FILE}',
+                'sub_path': SETTINGS_OVERRIDE_FILE,
+                'read_only': True,
+            }
         )
 
-        self.register_outputs({})
+    def container(
+        self,
+        name: str,
+        volumes: typing.Iterable[str],
+        resources: ResourcesConfig,
+        command: list[str] | None = None,
+        env_vars: dict[str, p.Input[str]] | None = None,
+        volume_mounts: list[k8s.core.v1.VolumeMountArgsDict] | None = None,
+    ) -> k8s.core.v1.ContainerArgsDict:
+        if 'data' in volumes and 'index' in self.mounts:
+            # The search index is part of the data directory
+            volumes = [*volumes, 'index']
+        container: k8s.core.v1.ContainerArgsDict = {
+            'name': name,
+            'image': paperless_image(self.component_config),
+            'env': [
+                *[{'name': k, 'value': v} for k, v in (self.env_vars | (env_vars or {})).items()],
+            ],
+            'env_from': [
+                {
+                    'secret_ref': {
+                        'name': self.config_secret.metadata.name,
+                    },
+                },
+            ],
+            'volume_mounts': [
+                *[
+                    self.mounts.get(
+                        volume,
+                        {
+                            'name': volume,
+                            'mount_path': f'{PAPERLESS_DIR}/{volume}',
+                        },
+                    )
+                    for volume in volumes
+                ],
+                *self.volume_mounts,
+                *(volume_mounts or []),
+            ],
+        }
+        if command:
+            container['command'] = command
+            container['working_dir'] = f'{PAPERLESS_DIR}/src'
+            container['security_context'] = {'run_as_user': 1000, 'run_as_group': 1000}
+        if resources_spec := container_resources(resources):
+            container['resources'] = resources_spec
+        return container
+
+    def spec(
+        self,
+        containers: list[k8s.core.v1.ContainerArgsDict],
+        resources: ResourcesConfig,
+        labels: dict[str, str],
+    ) -> k8s.core.v1.PodSpecArgsDict:
+        spec: k8s.core.v1.PodSpecArgsDict = {
+            'containers': containers,
+            'volumes': self.volumes,
+            'security_context': {
+                'fs_group': 1000,
+            },
+        }
+        add_pod_scheduling(spec, resources, labels)
+        return spec
+
+
+def nfs_volume(
+    name: str, server: str, share: str, mount_options: NfsMountOptionsConfig
+) -> k8s.core.v1.VolumeArgsDict:
+    return {
+        'name': name,
+        'csi': {
+            'driver': 'nfs.csi.k8s.io',
+            'volume_attributes': {
+                'server': server,
+                'share': share,
+                # The csi driver expects camel case here, the key is passed through verbatim
+                'mountOptions': mount_options.render(),
+            },
+        },
+    }
+
+
+def consume_volume(component_config: ComponentConfig) -> k8s.core.v1.VolumeArgsDict:
+    paperless_config = component_config.paperless
+    return nfs_volume(
+        'consume',
+        paperless_config.consume_server,
+        paperless_config.consume_share,
+        paperless_config.consume_mount_options,
+    )
+
 
+def claim_spec(
+    volume_config: VolumeConfig, access_mode: str
+) -> k8s.core.v1.PersistentVolumeClaimSpecArgsDict:
+    spec: k8s.core.v1.PersistentVolumeClaimSpecArgsDict = {
+        'access_modes': [volume_config.access_mode or access_mode],
+        'resources': {'requests': {'storage': volume_config.size}},
+    }
+    if volume_config.storage_class:
+        spec['storage_class_name'] = volume_config.storage_class
+    return spec
 
-def create_redis(component_config: ComponentConfig, opts: p.ResourceOptions) -> k8s.core.v1.Service:
-    app_labels_redis = {'app': 'redis'}
-    redis_sts = k8s.apps.v1.StatefulSet(
-        'redis',
-        metadata={'name': 'redis'},
+
+def create_single_workload(pod: PaperlessPod, opts: p.ResourceOptions) -> k8s.apps.v1.StatefulSet:
+    paperless_config = pod.component_config.paperless
+    claim_templates: list[k8s.core.v1.PersistentVolumeClaimArgsDict] = []
+    for name, volume_config in paperless_config.storage.volumes().items():
+        if volume_config.existing_claim:
+            pod.volumes.append(
+                {
+                    'name': name,
+                    'persistent_volume_claim': {'claim_name': volume_config.existing_claim},
+                }
+            )
+        else:
+            claim_templates.append(
+                {'metadata': {'name': name}, 'spec': claim_spec(volume_config, 'ReadWriteOnce')}
+            )
+
+    container = pod.container(
+        'paperless',
+        ('data', 'media', 'consume'),
+        paperless_config.resources,
+        env_vars=webserver_env_vars(paperless_config.webserver, paperless_config.resources)
+        | worker_env_vars(paperless_config.worker, paperless_config.resources)
+        | pod.webserver_env_vars,
+    )
+    container['ports'] = [{'container_port': PAPERLESS_PORT}]
+    add_webserver_probes(
+        container, paperless_config.webserver.startup_timeout or SINGLE_STARTUP_SECONDS
+    )
+
+    app_labels = {'app': 'paperless'}
+    return k8s.apps.v1.StatefulSet(
+        'paperless',
+        metadata={'name': 'paperless'},
         spec={
             'replicas': 1,
-            'selector': {'match_labels': app_labels_redis},
-            'service_name': 'redis-headless',
+            'selector': {'match_labels': app_labels},
+            'service_name': 'paperless-headless',
             'template': {
-                'metadata': {'labels': app_labels_redis},
-                'spec': {
-                    'containers': [
-                        {
-                            'name': 'redis',
-                            'image': f'docker.io/library/redis:{component_config.redis.version}',
-                            'ports': [{'container_port': REDIS_PORT}],
-                        },
-                    ],
-                },
+                'metadata': {'labels': app_labels},
+                'spec': pod.spec(
+                    [container, *pod.webserver_sidecars, *pod.consumer_sidecars],
+                    paperless_config.resources,
+                    app_labels,
+                ),
             },
+            'volume_claim_templates': claim_templates,
         },
         opts=opts,
     )
-    return k8s.core.v1.Service(
-        'redis',
-        metadata={'name': 'redis'},
+
+
+def create_split_workloads(
+    pod: PaperlessPod,
+    redis_service: k8s.core.v1.Service,
+    opts: p.ResourceOptions,
+) -> k8s.apps.v1.Deployment:
+    """
+    Runs webserver, celery workers and the consumer/scheduler as separate workloads.
+
+    All of them need the same data and media directories, so these are shared claims instead of
+    per pod volume claim templates.
+    """
+    paperless_config = pod.component_config.paperless
+    for name, volume_config in paperless_config.storage.volumes().items():
+        claim_name: p.Input[str]
+        if volume_config.existing_claim:
+            claim_name = volume_config.existing_claim
+        else:
+            claim_name = k8s.core.v1.PersistentVolumeClaim(
+                f'paperless-{name}',
+                metadata={'name': f'paperless-{name}'},
+                spec=claim_spec(volume_config, 'ReadWriteMany'),
+                opts=opts,
+            ).metadata.name
+        pod.volumes.append({'name': name, 'persistent_volume_claim': {'claim_name': claim_name}})
+
+    if splitter_config := paperless_config.splitter:
+        create_splitter(pod, splitter_config, opts)
+
+    # The workloads do not run the image entrypoint, which applies the migrations otherwise
+    migration = create_migration(pod, paperless_config.migration or MigrationConfig(), opts)
+    opts = p.ResourceOptions.merge(opts, p.ResourceOptions(depends_on=[migration]))
+
+    # Uploads are written to the scratch dir by the webserver and picked up from there by the
+    # workers, so it has to live on a shared volume.
+    webserver_container = pod.container(
+        'webserver',
+        ('data', 'media'),
+        paperless_config.webserver.resources,
+        WEBSERVER_COMMAND,
+        env_vars={
+            'PAPERLESS_SCRATCH_DIR': f'{PAPERLESS_DIR}/data/scratch',
+            **webserver_env_vars(paperless_config.webserver, paperless_config.webserver.resources),
+            **pod.webserver_env_vars,
+        },
+    )
+    webserver_container['ports'] = [{'container_port': PAPERLESS_PORT}]
+    add_webserver_probes(
+        webserver_container, paperless_config.webserver.startup_timeout or SPLIT_STARTUP_SECONDS
+    )
+    webserver_labels = {'app': 'paperless', 'component': 'webserver'}
+    webserver = k8s.apps.v1.Deployment(
+        'paperless-webserver',
+        metadata={'name': 'paperless-webserver'},
         spec={
-            'ports': [{'port': REDIS_PORT}],
-            'selector': redis_sts.spec.selector.match_labels,
+            'replicas': paperless_config.webserver.replicas,
+            'selector': {'match_labels': webserver_labels},
+            'template': {
+                'metadata': {'labels': webserver_labels},
+                'spec': pod.spec(
+                    [webserver_container, *pod.webserver_sidecars],
+                    paperless_config.webserver.resources,
+                    webserver_labels,
+                ),
+            },
         },
         opts=opts,
     )
 
+    create_worker_pool(pod, 'worker', paperless_config.worker, DEFAULT_QUEUE, redis_service, opts)
+    if mail_worker_config := paperless_config.mail_worker:
+        create_worker_pool(pod, 'mail-worker', mail_worker_config, MAIL_QUEUE, redis_service, opts)
 
-def create_tika(component_config: ComponentConfig, opts: p.ResourceOptions) -> k8s.core.v1.Service:
-    app_labels_tika = {'app': 'tika'}
-    tika_sts = k8s.apps.v1.Deployment(
-        'tika',
-        metadata={'name': 'tika'},
+    # The consumer and the celery beat scheduler must not run more than once.
+    consumer_labels = {'app': 'paperless', 'component': 'consumer'}
+    k8s.apps.v1.Deployment(
+        'paperless-consumer',
+        metadata={'name': 'paperless-consumer'},
         spec={
             'replicas': 1,
-            'selector': {'match_labels': app_labels_tika},
+            'strategy': {'type': 'Recreate'},
+            'selector': {'match_labels': consumer_labels},
             'template': {
-                'metadata': {'labels': app_labels_tika},
-                'spec': {
-                    'containers': [
-                        {
-                            'name': 'tika',
-                            'image': f'docker.io/apache/tika:{component_config.tika.version}',
-                            'ports': [{'container_port': TIKA_PORT}],
-                        },
+                'metadata': {'labels': consumer_labels},
+                'spec': pod.spec(
+                    [
+                        pod.container(
+                            'consumer',
+                            ('data', 'media', 'consume'),
+                            paperless_config.consumer.resources,
+                            CONSUMER_COMMAND,
+                        ),
+                        pod.container(
+                            'scheduler',
+                            ('data',),
+                            paperless_config.consumer.resources,
+                            SCHEDULER_COMMAND,
+                        ),
+                        *pod.consumer_sidecars,
                     ],
-                },
+                    paperless_config.consumer.resources,
+                    consumer_labels,
+                ),
             },
         },
         opts=opts,
     )
-    return k8s.core.v1.Service(
-        'tika',
-        metadata={'name': 'tika'},
+
+    return webserver
+
+
+def create_worker_pool(
+    pod: PaperlessPod,
+    name: str,
+    worker_config: WorkerConfig,
+    queue: str,
+    redis_service: k8s.core.v1.Service,
+    opts: p.ResourceOptions,
+) -> k8s.apps.v1.Deployment:
+    """
+    Celery workers consuming a single queue, scaled with its length if autoscaling is enabled.
+    """
+    command = WORKER_COMMAND if queue == DEFAULT_QUEUE else [*WORKER_COMMAND, '--queues', queue]
+    labels = {'app': 'paperless', 'component': name}
+    pod_spec = pod.spec(
+        [
+            pod.container(
+                name,
+                ('data', 'media', 'consume'),
+                worker_config.resources,
+                command,
+                env_vars=worker_env_vars(worker_config, worker_config.resources),
+            ),
+        ],
+        worker_config.resources,
+        labels,
+    )
+    # Celery finishes running tasks on SIGTERM, these must not be killed on scale down or rollout
+    pod_spec['termination_grace_period_seconds'] = (
+        worker_config.task_timeout + WORKER_SHUTDOWN_SECONDS
+    )
+    spec: k8s.apps.v1.DeploymentSpecArgsDict = {
+        'selector': {'match_labels': labels},
+        'template': {
+            'metadata': {'labels': labels},
+            'spec': pod_spec,
+        },
+    }
+    if not (autoscaling := worker_config.autoscaling):
+        spec['replicas'] = worker_config.replicas
+
+    worker = k8s.apps.v1.Deployment(
+        f'paperless-{name}',
+        metadata={'name': f'paperless-{name}'},
+        spec=spec,
+        opts=opts,
+    )
+
+    if autoscaling:
+        create_worker_autoscaler(name, worker, queue, redis_service, autoscaling, opts)
+    return worker
+
+
+def create_worker_autoscaler(
+    name: str,
+    worker: k8s.apps.v1.Deployment,
+    queue: str,
+    redis_service: k8s.core.v1.Service,
+    autoscaling: WorkerAutoscalingConfig,
+    opts: p.ResourceOptions,
+) -> k8s.apiextensions.CustomResource:
+    """
+    Scales the celery workers with the length of their queue in redis using KEDA.
+
+    The replica count of the worker deployment is owned by the generated HPA in this case.
+    """
+    return k8s.apiextensions.CustomResource(
+        f'paperless-{name}',
+        api_version='keda.sh/v1alpha1',
+        kind='ScaledObject',
+        metadata={'name': f'paperless-{name}'},
         spec={
-            'ports': [{'port': TIKA_PORT}],
-            'selector': tika_sts.spec.selector.match_labels,
+            'scaleTargetRef': {'name': worker.metadata.name},
+            'minReplicaCount': autoscaling.min_replicas,
+            'maxReplicaCount': autoscaling.max_replicas,
+            'pollingInterval': autoscaling.polling_interval,
+            'cooldownPeriod': autoscaling.cooldown_period,
+            'advanced': {
+                'horizontalPodAutoscalerConfig': {
+                    'behavior': {
+                        # Removes one worker at a time, each one finishes its tasks first
+                        'scaleDown': {
+                            'stabilizationWindowSeconds': autoscaling.scale_down_stabilization,
+                            'policies': [{'type': 'Pods', 'value': 1, 'periodSeconds': 60}],
+                        },
+                    },
+                },
+            },
+            'triggers': [
+                {
+                    'type': 'redis',
+                    'metadata': {
+                        'address': p.Output.format(
+                            '{}.{}.svc.cluster.local:{}',
+                            redis_service.metadata.name,
+                            redis_service.metadata.namespace,
+                            REDIS_PORT,
+                        ),
+                        # Celery queues are redis lists named after the queue
+                        'listName': queue,
+                        'listLength': str(autoscaling.queue_length),
+                        'activationListLength': '0',
+                    },
+                },
+            ],
         },
         opts=opts,
     )
 
 
-def create_gotenberg(
-    component_config: ComponentConfig, opts: p.ResourceOptions
-) -> k8s.core.v1.Service:
-    app_labels_gotenberg = {'app': 'gotenberg'}
-    gotenberg_sts = k8s.apps.v1.Deployment(
-        'gotenberg',
-        metadata={'name': 'gotenberg'},
+def add_consume_watcher(
+    pod: PaperlessPod, watcher_config: ConsumeWatcherConfig, opts: p.ResourceOptions
+):
+    """
+    Stages files from the consume share on the data volume before paperless sees them.
+
+    Paperless consumes from the staging directory instead of the share. The share is only
+    mounted into the watcher sidecar running next to the consumer.
+    """
+    from paperless.consume import consume_watcher_container
+
+    add_ingest_volume(pod, opts)
+    pod.mounts['consume'] = consume_staging_mount()
+    # The splitter hands over to paperless instead
+    staging_dir = SPLITTER_STAGING_DIR if pod.component_config.paperless.splitter else None
+    pod.consumer_sidecars.append(
+        consume_watcher_container(
+            watcher_config,
+            {'name': 'consume', 'mount_path': '/source'},
+            {
+                'name': 'data',
+                'mount_path': '/staging',
+                'sub_path': staging_dir or CONSUME_STAGING_DIR,
+            },
+            CONSUMER_IGNORE_PATTERNS,
+        )
+    )
+
+
+def add_ingest_volume(pod: PaperlessPod, opts: p.ResourceOptions):
+    from paperless.consume import create_ingest_volume
+
+    # Shared by the consume watcher and the splitter
+    if not any(volume['name'] == 'ingest' for volume in pod.volumes):
+        pod.volumes.append(create_ingest_volume(opts))
+
+
+def consume_staging_mount() -> k8s.core.v1.VolumeMountArgsDict:
+    return {
+        'name': 'data',
+        'mount_path': f'{PAPERLESS_DIR}/consume',
+        'sub_path': CONSUME_STAGING_DIR,
+    }
+
+
+def create_splitter(
+    pod: PaperlessPod, splitter_config: SplitterConfig, opts: p.ResourceOptions
+) -> k8s.apps.v1.Deployment:
+    """
+    Splits scans at their barcodes in a pool of pods and hands the documents to paperless.
+
+    Reads from the consume share, or from the staging directory of the consume watcher if
+    enabled. Has to be created after the shared data claim.
+    """
+    from paperless.consume import splitter_container
+
+    add_ingest_volume(pod, opts)
+    if pod.component_config.paperless.consume_watcher:
+        # Staged files are complete once they appear
+        source_mount: k8s.core.v1.VolumeMountArgsDict = {
+            'name': 'data',
+            'mount_path': '/source',
+            'sub_path': SPLITTER_STAGING_DIR,
+        }
+        stable_seconds = 0.0
+    else:
+        source_mount = {'name': 'consume', 'mount_path': '/source'}
+        stable_seconds = splitter_config.stable_seconds
+
+    container = splitter_container(
+        splitter_config,
+        paperless_image(pod.component_config),
+        splitter_config.processes or splitter_config.resources.cpu_cores() or DEFAULT_CPU_CORES,
+        stable_seconds,
+        source_mount,
+        {'name': 'data', 'mount_path': '/target', 'sub_path': CONSUME_STAGING_DIR},
+        CONSUMER_IGNORE_PATTERNS,
+    )
+    mounted = {'ingest', 'data', source_mount['name']}
+    labels = {'app': 'paperless', 'component': 'splitter'}
+    pod_spec: k8s.core.v1.PodSpecArgsDict = {
+        'containers': [container],
+        'volumes': [volume for volume in pod.volumes if volume['name'] in mounted],
+    }
+    add_pod_scheduling(pod_spec, splitter_config.resources, labels)
+    return k8s.apps.v1.Deployment(
+        'paperless-splitter',
+        metadata={'name': 'paperless-splitter'},
         spec={
-            'replicas': 1,
-            'selector': {'match_labels': app_labels_gotenberg},
+            'replicas': splitter_config.replicas,
+            'selector': {'match_labels': labels},
             'template': {
-                'metadata': {'labels': app_labels_gotenberg},
+                'metadata': {'labels': labels},
+                'spec': pod_spec,
+            },
+        },
+        opts=opts,
+    )
+
+
+def add_webserver_metrics(
+    pod: PaperlessPod, exporter_config: ExporterConfig, opts: p.ResourceOptions
+):
+    """
+    Exposes the gunicorn request metrics through a statsd exporter next to the webserver.
+    """
+    from paperless.monitoring import (
+        GUNICORN_STATSD_ARGS,
+        create_statsd_exporter_volume,
+        statsd_exporter_container,
+    )
+
+    pod.volumes.append(create_statsd_exporter_volume(opts))
+    pod.webserver_sidecars.append(statsd_exporter_container(exporter_config))
+    pod.webserver_env_vars['GUNICORN_CMD_ARGS'] = GUNICORN_STATSD_ARGS
+
+
+def low_priority_command(io_class: typing.Literal['idle', 'best-effort'], nice: int) -> list[str]:
+    """
+    Prefix running a command at a low CPU and I/O priority.
+    """
+    io_class_args = ['-c', '3'] if io_class == 'idle' else ['-c', '2', '-n', '7']
+    return [
+        '/usr/bin/ionice',
+        *io_class_args,
+        '/usr/bin/nice',
+        '-n',
+        str(nice),
+    ]
+
+
+def job_pod_spec(
+    pod: PaperlessPod,
+    container: k8s.core.v1.ContainerArgsDict,
+    resources: ResourcesConfig,
+    labels: dict[str, str],
+    extra_volumes: typing.Sequence[k8s.core.v1.VolumeArgsDict] = (),
+) -> k8s.core.v1.PodSpecArgsDict:
+    """
+    Runs a paperless container to completion with the data and media volumes of the workloads.
+
+    In split mode these are the shared claims once created. In single mode these are the claims
+    of the StatefulSet, which can only be mounted on the node running paperless.
+    """
+    volumes: list[k8s.core.v1.VolumeArgsDict] = [*pod.volumes, *extra_volumes]
+    paperless_config = pod.component_config.paperless
+    storage_volumes = paperless_config.storage.volumes()
+    single = paperless_config.mode == 'single'
+    if single:
+        for volume_name, volume_config in storage_volumes.items():
+            if not volume_config.existing_claim:
+                volumes.append(
+                    {
+                        'name': volume_name,
+                        'persistent_volume_claim': {'claim_name': f'{volume_name}-paperless-0'},
+                    }
+                )
+    # Only attach what the container mounts, e.g. not the consume share
+    mounts = typing.cast(list[k8s.core.v1.VolumeMountArgsDict], container.get('volume_mounts', []))
+    mounted = {mount['name'] for mount in mounts}
+
+    pod_spec = pod.spec([container], resources, labels)
+    pod_spec['volumes'] = [volume for volume in volumes if volume['name'] in mounted]
+    pod_spec['restart_policy'] = 'Never'
+    if single:
+        # Passed through verbatim like configured affinities, so the keys have to be camel case
+        affinity = dict(resources.affinity or {})
+        affinity['podAffinity'] = {
+            'requiredDuringSchedulingIgnoredDuringExecution': [
+                {
+                    'labelSelector': {'matchLabels': {'app': 'paperless'}},
+                    'topologyKey': 'kubernetes.io/hostname',
+                },
+            ],
+        }
+        pod_spec['affinity'] = typing.cast(k8s.core.v1.AffinityArgsDict, affinity)
+    return pod_spec
+
+
+def create_cron_job(
+    pod: PaperlessPod,
+    name: str,
+    schedule: str,
+    container: k8s.core.v1.ContainerArgsDict,
+    resources: ResourcesConfig,
+    opts: p.ResourceOptions,
+    extra_volumes: typing.Sequence[k8s.core.v1.VolumeArgsDict] = (),
+):
+    """
+    Runs a paperless container on a schedule, has to be called after the workloads are created.
+    """
+    labels = {'app': f'paperless-{name}'}
+    pod_spec = job_pod_spec(pod, container, resources, labels, extra_volumes)
+
+    k8s.batch.v1.CronJob(
+        f'paperless-{name}',
+        metadata={'name': f'paperless-{name}'},
+        spec={
+            'schedule': schedule,
+            'concurrency_policy': 'Forbid',
+            'successful_jobs_history_limit': 1,
+            'failed_jobs_history_limit': 3,
+            'job_template': {
                 'spec': {
-                    'containers': [
-                        {
-                            'name': 'gotenberg',
-                            'image': f'docker.io/gotenberg/gotenberg:{component_config.gotenberg.version}',
-                            # The gotenberg chromium route is used to convert .eml files. We do not
-                            # want to allow external content like tracking pixels or even javascript.
-                            'command': [
-                                'gotenberg',
-                                '--chromium-disable-javascript=true',
-                                '--chromium-allow-list=file:///tmp/.*',
-                            ],
-                            'ports': [{'container_port': GOTENBERG_PORT}],
-                        },
-                    ],
+                    'backoff_limit': 1,
+                    'template': {
+                        'metadata': {'labels': labels},
+                        'spec': pod_spec,
+                    },
                 },
             },
         },
         opts=opts,
     )
-    return k8s.core.v1.Service(
-        'gotenberg',
-        metadata={'name': 'gotenberg'},
+
+
+def create_export(pod: PaperlessPod, export_config: ExportConfig, opts: p.ResourceOptions):
+    """
+    Exports all documents to an NFS share on a schedule, skipping files exported before.
+    """
+    command = [
+        *low_priority_command(export_config.io_class, export_config.nice),
+        'python3',
+        'manage.py',
+        'document_exporter',
+        EXPORT_DIR,
+        '--no-progress-bar',
+    ]
+    if export_config.compare_checksums:
+        command.append('--compare-checksums')
+    if export_config.delete:
+        command.append('--delete')
+    if export_config.use_filename_format:
+        command.append('--use-filename-format')
+    if export_config.split_manifest:
+        command.append('--split-manifest')
+    if not export_config.thumbnails:
+        command.append('--no-thumbnail')
+
+    container = pod.container(
+        'export',
+        ('data', 'media'),
+        export_config.resources,
+        command,
+        volume_mounts=[{'name': 'export', 'mount_path': EXPORT_DIR}],
+    )
+    create_cron_job(
+        pod,
+        'export',
+        export_config.schedule,
+        container,
+        export_config.resources,
+        opts,
+        extra_volumes=[
+            nfs_volume(
+                'export', export_config.server, export_config.share, export_config.mount_options
+            ),
+        ],
+    )
+
+
+def create_maintenance(
+    pod: PaperlessPod, maintenance_config: MaintenanceConfig, opts: p.ResourceOptions
+):
+    """
+    Retrains the classifier and optimizes the search index off-peak instead of in the workers.
+
+    Both only need the data volume, including the index volume if configured. The workers pick
+    up the retrained classifier by the modification time of the model file.
+    """
+    jobs = {
+        'classifier': (maintenance_config.classifier_schedule, ['document_create_classifier']),
+        'index': (maintenance_config.index_schedule, ['document_index', 'optimize']),
+    }
+    for name, (schedule, management_command) in jobs.items():
+        if not schedule:
+            continue
+        container = pod.container(
+            name,
+            ('data',),
+            maintenance_config.resources,
+            [
+                *low_priority_command(maintenance_config.io_class, maintenance_config.nice),
+                'python3',
+                'manage.py',
+                *management_command,
+            ],
+        )
+        create_cron_job(pod, name, schedule, container, maintenance_config.resources, opts)
+
+
+def create_migration(
+    pod: PaperlessPod, migration_config: MigrationConfig, opts: p.ResourceOptions
+) -> p.CustomResource:
+    """
+    Applies the database migrations of the configured version.
+
+    The job is replaced on a version change, pulumi waits for it to complete before rolling out
+    the workloads depending on it.
+    """
+    container = pod.container(
+        'migrate', ('data', 'media'), migration_config.resources, MIGRATE_COMMAND
+    )
+    labels = {'app': 'paperless-migrate'}
+    return k8s.batch.v1.Job(
+        'paperless-migrate',
+        metadata={'name': 'paperless-migrate'},
+        spec={
+            'backoff_limit': 3,
+            'template': {
+                'metadata': {'labels': labels},
+                'spec': job_pod_spec(pod, container, migration_config.resources, labels),
+            },
+        },
+        opts=opts,
+    )
+
+
+def create_prepull(
+    component_config: ComponentConfig, prepull_config: PrepullConfig, opts: p.ResourceOptions
+) -> k8s.apps.v1.DaemonSet:
+    """
+    Pulls the pinned images on all nodes with init containers that exit right away.
+    """
+    images = {
+        'paperless': paperless_image(component_config),
+        'tika': tika_image(component_config),
+        'gotenberg': gotenberg_image(component_config),
+    }
+    resources_spec = container_resources(prepull_config.resources)
+    init_containers: list[k8s.core.v1.ContainerArgsDict] = []
+    for name, image in images.items():
+        container: k8s.core.v1.ContainerArgsDict = {
+            'name': name,
+            'image': image,
+            'command': ['/bin/true'],
+        }
+        if resources_spec:
+            container['resources'] = resources_spec
+        init_containers.append(container)
+
+    labels = {'app': 'paperless-prepull'}
+    pod_spec: k8s.core.v1.PodSpecArgsDict = {
+        'init_containers': init_containers,
+        'containers': [{'name': 'pause', 'image': PAUSE_IMAGE}],
+        'termination_grace_period_seconds': 0,
+    }
+    add_pod_scheduling(pod_spec, prepull_config.resources, labels)
+    return k8s.apps.v1.DaemonSet(
+        'paperless-prepull',
+        metadata={'name': 'paperless-prepull'},
         spec={
-            'ports': [{'port': GOTENBERG_PORT}],
-            'selector': gotenberg_sts.spec.selector.match_labels,
+            'selector': {'match_labels': labels},
+            # The pods serve nothing, all nodes can pull at the same time
+            'update_strategy': {'rolling_update': {'max_unavailable': '100%'}},
+            'template': {
+                'metadata': {'labels': labels},
+                'spec': pod_spec,
+            },
         },
         opts=opts,
     )
+
+
+def add_scratch_volume(pod: PaperlessPod, scratch_config: ScratchConfig):
+    """
+    Keeps temporary OCR, ghostscript and barcode files off the persistent volumes.
+
+    Paperless uses its scratch dir and the tools it calls use TMPDIR, both default to /tmp.
+    """
+    if scratch_config.kind == 'ephemeral':
+        volume_config = VolumeConfig.model_validate(
+            {'size': scratch_config.size, 'storage-class': scratch_config.storage_class}
+        )
+        pod.volumes.append(
+            {
+                'name': 'scratch',
+                'ephemeral': {
+                    'volume_claim_template': {'spec': claim_spec(volume_config, 'ReadWriteOnce')}
+                },
+            }
+        )
+    else:
+        empty_dir: k8s.core.v1.EmptyDirVolumeSourceArgsDict = {}
+        if scratch_config.memory:
+            empty_dir['medium'] = 'Memory'
+        if scratch_config.size:
+            empty_dir['size_limit'] = scratch_config.size
+        pod.volumes.append({'name': 'scratch', 'empty_dir': empty_dir})
+
+    pod.volume_mounts.append({'name': 'scratch', 'mount_path': '/tmp'})
+    pod.env_vars['PAPERLESS_SCRATCH_DIR'] = '/tmp/paperless'
@@ -0,0 +1,113 @@
+import pulumi as p
+import pulumi_kubernetes as k8s
+
+from paperless.config import PgBouncerConfig
+from paperless.utils import add_pod_scheduling, container_resources
+
+PGBOUNCER_PORT = 6432
+PGBOUNCER_CONFIG_DIR = '/etc/pgbouncer'
+
+
+def create_pgbouncer(
+    pgbouncer_config: PgBouncerConfig,
+    postgres_service: p.Input[str],
+    postgres_port: p.Input[int],
+    database_name: p.Input[str],
+    username: p.Input[str],
+    password: p.Input[str],
+    opts: p.ResourceOptions,
+) -> k8s.core.v1.Service:
+    """
+    Deploys PgBouncer in front of the paperless database.
+
+    Web and celery processes each keep their own database connections, PgBouncer multiplexes them
+    onto a small pool of server connections.
+    """
+    config = p.Output.format(
+        '\n'.join(
+            [
+                '[databases]',
+                '{0} = host={1} port={2} dbname={0}',
+                '',
+                '[pgbouncer]',
+                'listen_addr = 0.0.0.0',
+                f'listen_port = {PGBOUNCER_PORT}',
+                'auth_type = scram-sha-256',
+                f'auth_file = {PGBOUNCER_CONFIG_DIR}/userlist.txt',
+                f'pool_mode = {pgbouncer_config.pool_mode}',
+                f'default_pool_size = {pgbouncer_config.default_pool_size}',
+                f'min_pool_size = {pgbouncer_config.min_pool_size}',
+                f'reserve_pool_size = {pgbouncer_config.reserve_pool_size}',
+                f'max_client_conn = {pgbouncer_config.max_client_conn}',
+                'ignore_startup_parameters = extra_float_digits',
+                '',
+            ]
+        ),
+        database_name,
+        postgres_service,
+        postgres_port,
+    )
+
+    # Changes to the config create a new secret and thus roll the deployment
+    config_secret = k8s.core.v1.Secret(
+        'pgbouncer-config',
+        string_data={
+            'pgbouncer.ini': config,
+            # PgBouncer needs the plain text password to authenticate against postgres with SCRAM
+            'userlist.txt': p.Output.format('"{}" "{}"\n', username, password),
+        },
+        opts=opts,
+    )
+
+    container: k8s.core.v1.ContainerArgsDict = {
+        'name': 'pgbouncer',
+        'image': f'docker.io/edoburu/pgbouncer:{pgbouncer_config.version}',
+        'ports': [{'container_port': PGBOUNCER_PORT}],
+        'readiness_probe': {
+            'tcp_socket': {'port': PGBOUNCER_PORT},
+            'period_seconds': 10,
+        },
+        'volume_mounts': [
+            {
+                'name': 'config',
+                'mount_path': PGBOUNCER_CONFIG_DIR,
+                'read_only': True,
+            },
+        ],
+    }
+    if resources := container_resources(pgbouncer_config.resources):
+        container['resources'] = resources
+
+    app_labels = {'app': 'pgbouncer'}
+    pod_spec: k8s.core.v1.PodSpecArgsDict = {
+        'containers': [container],
+        'volumes': [
+            {
+                'name': 'config',
+                'secret': {'secret_name': config_secret.metadata.name},
+            },
+        ],
+    }
+    add_pod_scheduling(pod_spec, pgbouncer_config.resources, app_labels)
+    deployment = k8s.apps.v1.Deployment(
+        'pgbouncer',
+        metadata={'name': 'pgbouncer'},
+        spec={
+            'replicas': pgbouncer_config.replicas,
+            'selector': {'match_labels': app_labels},
+            'template': {
+                'metadata': {'labels': app_labels},
+                'spec': pod_spec,
+            },
+        },
+        opts=opts,
+    )
+    return k8s.core.v1.Service(
+        'pgbouncer',
+        metadata={'name': 'pgbouncer'},
+        spec={
+            'ports': [{'port': PGBOUNCER_PORT}],
+            'selector': deployment.spec.selector.match_labels,
+        },
+        opts=opts,
+    )
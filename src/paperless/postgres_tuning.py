@@ -0,0 +1,110 @@
+import json
+
+import pulumi as p
+import pulumi_kubernetes as k8s
+
+from paperless.config import PostgresTuningConfig
+
+# Planner and memory settings the database owner may set with ALTER DATABASE
+DATABASE_PARAMETERS = (
+    'effective_cache_size',
+    'work_mem',
+    'maintenance_work_mem',
+    'random_page_cost',
+)
+
+# Autovacuum is only configurable per table without superuser privileges
+AUTOVACUUM_PARAMETERS = ('autovacuum_vacuum_scale_factor', 'autovacuum_analyze_scale_factor')
+
+# Tables with the most churn: documents, celery task bookkeeping and the audit log, which is
+# only installed if enabled
+AUTOVACUUM_TABLES = (
+    'documents_document',
+    'documents_paperlesstask',
+    'django_celery_results_taskresult',
+    'auditlog_logentry',
+)
+
+APPLY_SCRIPT = """
+import json, os, psycopg
+with psycopg.connect(autocommit=True) as connection:
+    for statement in json.loads(os.environ['TUNING_STATEMENTS']):
+        print(statement, flush=True)
+        connection.execute(statement)
+"""
+
+
+def tuning_statements(database_name: str, parameters: dict[str, str]) -> list[str]:
+    statements = [
+        f'ALTER DATABASE "{database_name}" SET {name} = \'{parameters[name]}\''
+        for name in DATABASE_PARAMETERS
+        if name in parameters
+    ]
+    storage_parameters = ', '.join(
+        f'{name} = {parameters[name]}' for name in AUTOVACUUM_PARAMETERS if name in parameters
+    )
+    if storage_parameters:
+        statements += [
+            f'ALTER TABLE IF EXISTS {table} SET ({storage_parameters})'
+            for table in AUTOVACUUM_TABLES
+        ]
+    return statements
+
+
+def create_postgres_tuning_job(
+    tuning_config: PostgresTuningConfig,
+    image: str,
+    postgres_service: p.Input[str],
+    postgres_port: p.Input[int],
+    database_name: p.Output[str],
+    username: p.Input[str],
+    config_secret: k8s.core.v1.Secret,
+    opts: p.ResourceOptions,
+) -> k8s.batch.v1.Job:
+    """
+    Applies the tuning parameters to the paperless database as the database owner.
+
+    The job is replaced, and therefore runs again, whenever the rendered statements change. It
+    has to depend on the workloads, the tables only exist once they applied the migrations.
+    """
+    parameters = tuning_config.parameters()
+    statements = database_name.apply(lambda name: json.dumps(tuning_statements(name, parameters)))
+    return k8s.batch.v1.Job(
+        'postgres-tuning',
+        spec={
+            'backoff_limit': 3,
+            'template': {
+                'spec': {
+                    'restart_policy': 'OnFailure',
+                    'containers': [
+                        {
+                            'name': 'postgres-tuning',
+                            # The paperless image ships psycopg, no need for another image
+                            'image': image,
+                            'command': ['python3', '-c', APPLY_SCRIPT],
+                            'env': [
+                                {'name': 'PGHOST', 'value': postgres_service},
+                                {
+                                    'name': 'PGPORT',
+                                    'value': p.Output.from_input(postgres_port).apply(str),
+                                },
+                                {'name': 'PGDATABASE', 'value': database_name},
+                                {'name': 'PGUSER', 'value': username},
+                                {
+                                    'name': 'PGPASSWORD',
+                                    'value_from': {
+                                        'secret_key_ref': {
+                                            'name': config_secret.metadata.name,
+                                            'key': 'PAPERLESS_DBPASS',
+                                        },
+                                    },
+                                },
+                                {'name': 'TUNING_STATEMENTS', 'value': statements},
+                            ],
+                        },
+                    ],
+                },
+            },
+        },
+        opts=opts,
+    )
@@ -0,0 +1,96 @@
+import pulumi as p
+import pulumi_kubernetes as k8s
+
+from paperless.config import RedisServerConfig
+from paperless.utils import add_pod_scheduling, container_resources
+
+REDIS_PORT = 6379
+REDIS_CONFIG_DIR = '/usr/local/etc/redis'
+REDIS_DATA_DIR = '/data'
+
+
+def create_redis(
+    name: str,
+    version: str,
+    redis_config: RedisServerConfig,
+    opts: p.ResourceOptions,
+) -> k8s.core.v1.Service:
+    """
+    Deploys a single redis instance configured through a generated redis.conf.
+    """
+    # Changes to the config create a new config map and thus roll the statefulset
+    config_map = k8s.core.v1.ConfigMap(
+        f'{name}-config',
+        data={'redis.conf': redis_config.render()},
+        opts=opts,
+    )
+
+    container: k8s.core.v1.ContainerArgsDict = {
+        'name': 'redis',
+        'image': f'docker.io/library/redis:{version}',
+        'args': ['redis-server', f'{REDIS_CONFIG_DIR}/redis.conf'],
+        'ports': [{'container_port': REDIS_PORT}],
+        'volume_mounts': [
+            {
+                'name': 'config',
+                'mount_path': REDIS_CONFIG_DIR,
+                'read_only': True,
+            },
+            {
+                'name': 'data',
+                'mount_path': REDIS_DATA_DIR,
+            },
+        ],
+    }
+    if resources := container_resources(redis_config.resources):
+        container['resources'] = resources
+
+    volumes: list[k8s.core.v1.VolumeArgsDict] = [
+        {
+            'name': 'config',
+            'config_map': {'name': config_map.metadata.name},
+        },
+    ]
+    app_labels = {'app': name}
+    pod_spec: k8s.core.v1.PodSpecArgsDict = {
+        'containers': [container],
+        'volumes': volumes,
+    }
+    add_pod_scheduling(pod_spec, redis_config.resources, app_labels)
+    spec: k8s.apps.v1.StatefulSetSpecArgsDict = {
+        'replicas': 1,
+        'selector': {'match_labels': app_labels},
+        'service_name': f'{name}-headless',
+        'template': {
+            'metadata': {'labels': app_labels},
+            'spec': pod_spec,
+        },
+    }
+
+    if redis_config.storage:
+        claim_spec: k8s.core.v1.PersistentVolumeClaimSpecArgsDict = {
+            'access_modes': ['ReadWriteOnce'],
+            'resources': {'requests': {'storage': redis_config.storage.size}},
+        }
+        if redis_config.storage.storage_class:
+            claim_spec['storage_class_name'] = redis_config.storage.storage_class
+        spec['volume_claim_templates'] = [{'metadata': {'name': 'data'}, 'spec': claim_spec}]
+    else:
+        # Keeps snapshots across container restarts, but not across pod rescheduling
+        volumes.append({'name': 'data', 'empty_dir': {}})
+
+    redis_sts = k8s.apps.v1.StatefulSet(
+        name,
+        metadata={'name': name},
+        spec=spec,
+        opts=opts,
+    )
+    return k8s.core.v1.Service(
+        name,
+        metadata={'name': name},
+        spec={
+            'ports': [{'port': REDIS_PORT}],
+            'selector': redis_sts.spec.selector.match_labels,
+        },
+        opts=opts,
+    )
@@ -0,0 +1,40 @@
+import typing
+
+import pulumi_kubernetes as k8s
+
+from paperless.config import ResourcesConfig
+
+
+def container_resources(resources: ResourcesConfig) -> k8s.core.v1.ResourceRequirementsArgsDict:
+    spec: k8s.core.v1.ResourceRequirementsArgsDict = {}
+    if requests := resources.requests.model_dump(exclude_none=True):
+        spec['requests'] = requests
+    if resources.guaranteed:
+        spec['limits'] = requests
+    elif limits := resources.limits.model_dump(exclude_none=True):
+        spec['limits'] = limits
+    return spec
+
+
+def add_pod_scheduling(
+    spec: k8s.core.v1.PodSpecArgsDict, resources: ResourcesConfig, labels: dict[str, str]
+):
+    """
+    Adds node selection and topology spread of the pods with the given labels to a pod spec.
+    """
+    if resources.node_selector:
+        spec['node_selector'] = resources.node_selector
+    if resources.affinity:
+        # Passed through verbatim, so the keys have to be camel case
+        spec['affinity'] = typing.cast(k8s.core.v1.AffinityArgsDict, resources.affinity)
+    if resources.topology_spread != 'none':
+        spec['topology_spread_constraints'] = [
+            {
+                'max_skew': 1,
+                'topology_key': resources.topology_key,
+                'when_unsatisfiable': (
+                    'DoNotSchedule' if resources.topology_spread == 'hard' else 'ScheduleAnyway'
+                ),
+                'label_selector': {'match_labels': labels},
+            },
+        ]
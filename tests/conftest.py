@@ -0,0 +1,159 @@
+import copy
+import dataclasses
+import pathlib
+import time
+import typing
+
+import pulumi as p
+import pytest
+import yaml
+
+from paperless.config import ComponentConfig
+
+REPO_DIR = pathlib.Path(__file__).parent.parent
+
+
+class Mocks(p.runtime.Mocks):
+    """
+    Records all registered resources and echoes their inputs as outputs.
+    """
+
+    def __init__(self):
+        self.resources: list[p.runtime.MockResourceArgs] = []
+
+    def new_resource(self, args: p.runtime.MockResourceArgs) -> tuple[str, dict[str, typing.Any]]:
+        self.resources.append(args)
+        state = dict(args.inputs)
+        if args.typ == 'kubernetes:core/v1:Service' and args.resource_id:
+            state['status'] = {'loadBalancer': {'ingress': [{'ip': '10.0.0.1'}]}}
+        if args.typ.startswith('kubernetes:'):
+            metadata = dict(state.get('metadata') or {})
+            metadata.setdefault('name', args.name)
+            metadata.setdefault('namespace', 'paperless')
+            state['metadata'] = metadata
+        if args.typ == 'random:index/randomPassword:RandomPassword':
+            state['result'] = f'{args.name}-result'
+        if args.typ.startswith('postgresql:'):
+            state.setdefault('name', args.name)
+        return f'{args.name}_id', state
+
+    def call(self, args: p.runtime.MockCallArgs) -> dict[str, typing.Any]:
+        return {}
+
+
+@dataclasses.dataclass
+class Resource:
+    typ: str
+    name: str
+    inputs: dict[str, typing.Any]
+    # Set for resources read with .get() instead of being created
+    resource_id: str | None
+
+
+@dataclasses.dataclass
+class Rendered:
+    resources: list[Resource]
+    # Seconds spent constructing the program and registering all resources
+    duration: float
+
+    def find(self, typ: str, name: str) -> dict[str, typing.Any]:
+        """
+        Returns the inputs of the resource, the type is matched against the end of the token.
+        """
+        matches = [r for r in self.resources if r.typ.endswith(typ) and r.name == name]
+        assert len(matches) == 1, f'{typ} {name} not rendered exactly once'
+        return matches[0].inputs
+
+    def names(self, typ: str) -> set[str]:
+        return {r.name for r in self.resources if r.typ.endswith(typ)}
+
+    def gets(self) -> list[Resource]:
+        return [r for r in self.resources if r.resource_id]
+
+    def pod_spec(self, typ: str, name: str) -> dict[str, typing.Any]:
+        return self.find(typ, name)['spec']['template']['spec']
+
+    def container(self, typ: str, name: str, container: str) -> dict[str, typing.Any]:
+        containers = self.pod_spec(typ, name)['containers']
+        return next(c for c in containers if c['name'] == container)
+
+    def env(self, typ: str, name: str, container: str) -> dict[str, typing.Any]:
+        return {e['name']: e.get('value') for e in self.container(typ, name, container)['env']}
+
+
+def merge(base: dict[str, typing.Any], overrides: dict[str, typing.Any]) -> dict[str, typing.Any]:
+    merged = copy.deepcopy(base)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def decrypt(value: typing.Any) -> typing.Any:
+    """
+    Replaces secure values by plain text, as pulumi passes them to the program.
+    """
+    if isinstance(value, dict):
+        if set(value) == {'secure'}:
+            return 'secret'
+        return {key: decrypt(item) for key, item in value.items()}
+    return value
+
+
+@pytest.fixture(scope='session')
+def prod_config() -> dict[str, typing.Any]:
+    stack = yaml.safe_load((REPO_DIR / 'Pulumi.prod.yaml').read_text())
+    return decrypt(stack['config']['paperless:config'])
+
+
+@pytest.fixture
+def make_config(prod_config: dict[str, typing.Any]) -> typing.Callable[..., ComponentConfig]:
+    """
+    Returns the prod stack config with the given overrides merged in.
+    """
+
+    def make(overrides: dict[str, typing.Any] | None = None) -> ComponentConfig:
+        return ComponentConfig.model_validate(merge(prod_config, overrides or {}))
+
+    return make
+
+
+@pytest.fixture
+def render(make_config: typing.Callable[..., ComponentConfig]) -> typing.Callable[..., Rendered]:
+    """
+    Constructs the paperless component offline and returns the registered resources.
+    """
+
+    def render(overrides: dict[str, typing.Any] | None = None) -> Rendered:
+        import pulumi_kubernetes as k8s
+        import pulumi_postgresql as postgresql
+
+        from paperless.paperless import Paperless
+
+        component_config = make_config(overrides)
+        mocks = Mocks()
+        p.runtime.set_mocks(mocks, project='paperless', stack='prod', preview=False)
+
+        @p.runtime.test
+        def construct():
+            Paperless(
+                component_config,
+                'paperless',
+                k8s.Provider('k8s', kubeconfig='kubeconfig'),
+                postgresql.Provider('postgres'),
+                'postgres',
+                5432,
+            )
+
+        start = time.perf_counter()
+        construct()
+        duration = time.perf_counter() - start
+
+        return Rendered(
+            [Resource(r.typ, r.name, r.inputs, r.resource_id or None) for r in mocks.resources],
+            duration,
+        )
+
+    return render
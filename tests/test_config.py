@@ -0,0 +1,224 @@
+import json
+
+import pydantic
+import pytest
+import yaml
+
+from paperless.config import (
+    NfsMountOptionsConfig,
+    OcrConfig,
+    PostgresTuningConfig,
+    RedisCacheConfig,
+    RedisServerConfig,
+    ResourcesConfig,
+    ScratchConfig,
+    VolumeConfig,
+)
+
+
+def test_prod_config_validates(make_config):
+    component_config = make_config()
+    assert component_config.paperless.mode == 'single'
+    assert component_config.monitoring is None
+
+
+def test_nfs_mount_options_compat_default():
+    assert NfsMountOptionsConfig().render() == 'nfsvers=4.1,sec=sys'
+
+
+def test_nfs_mount_options_preset_with_overrides():
+    options = NfsMountOptionsConfig.model_validate({'preset': 'throughput', 'nconnect': 4})
+    rendered = options.render().split(',')
+    assert 'nconnect=4' in rendered
+    assert 'hard' in rendered
+    assert 'rsize=1048576' in rendered
+
+
+def test_nfs_mount_options_parses_legacy_string():
+    options = NfsMountOptionsConfig.model_validate('vers=4.2,soft,timeo=100')
+    assert options.nfsvers == '4.2'
+    assert options.hard is False
+    assert options.timeo == 100
+    assert options.render() == 'nfsvers=4.2,sec=sys,soft,timeo=100'
+
+
+@pytest.mark.parametrize(('nfsvers', 'expected'), [('4.1', '4.1'), ('4', '4'), ('4.0', '4.0')])
+def test_nfs_mount_options_accept_unquoted_versions(nfsvers, expected):
+    options = NfsMountOptionsConfig.model_validate(yaml.safe_load(f'nfsvers: {nfsvers}'))
+    assert options.nfsvers == expected
+    assert options.render().startswith(f'nfsvers={expected},')
+
+
+def test_nfs_mount_options_reject_unknown_versions():
+    with pytest.raises(pydantic.ValidationError):
+        NfsMountOptionsConfig.model_validate({'nfsvers': 5})
+
+
+def test_postgres_tuning_explicit_values_take_precedence():
+    tuning = PostgresTuningConfig.model_validate({'preset': 'medium', 'work-mem': '8MB'})
+    parameters = tuning.parameters()
+    assert parameters['work_mem'] == '8MB'
+    assert parameters['effective_cache_size'] == '2GB'
+
+
+def test_postgres_tuning_rejects_invalid_memory():
+    with pytest.raises(pydantic.ValidationError):
+        PostgresTuningConfig.model_validate({'work-mem': '1G'})
+
+
+def test_ocr_defaults_only_set_language():
+    assert OcrConfig().env_vars() == {'PAPERLESS_OCR_LANGUAGE': 'deu+eng'}
+
+
+def test_ocr_profile_env_vars():
+    env_vars = OcrConfig.model_validate(
+        {'profile': 'fast', 'pages': 5, 'user-args': {'optimize': 1}}
+    ).env_vars()
+    assert env_vars['PAPERLESS_OCR_MODE'] == 'skip'
+    assert env_vars['PAPERLESS_OCR_PAGES'] == '5'
+    assert env_vars['PAPERLESS_OCR_DESKEW'] == 'false'
+    assert json.loads(env_vars['PAPERLESS_OCR_USER_ARGS']) == {
+        'optimize': 1,
+        'skip_big': 50,
+        'tesseract_timeout': 120,
+    }
+
+
+@pytest.mark.parametrize(
+    'ocr',
+    [
+        {'mode': 'redo', 'deskew': True},
+        {'profile': 'archival', 'mode': 'redo'},
+    ],
+)
+def test_ocr_redo_rejects_image_changes(ocr):
+    with pytest.raises(pydantic.ValidationError, match='redo'):
+        OcrConfig.model_validate(ocr)
+
+
+def test_ocr_redo_with_overridden_profile():
+    ocr = OcrConfig.model_validate({'profile': 'balanced', 'mode': 'redo', 'deskew': False})
+    assert ocr.options()['mode'] == 'redo'
+
+
+def test_redis_broker_defaults():
+    rendered = RedisServerConfig().render().splitlines()
+    assert 'maxmemory-policy noeviction' in rendered
+    assert 'appendonly no' in rendered
+    assert not [line for line in rendered if line.startswith('maxmemory ')]
+
+
+def test_redis_aof():
+    rendered = RedisServerConfig.model_validate(
+        {'persistence': 'aof', 'appendfsync': 'always', 'io-threads': 4}
+    ).render()
+    assert 'appendonly yes\nappendfsync always\n' in rendered
+    assert 'io-threads 4\n' in rendered
+
+
+def test_redis_cache_defaults():
+    rendered = RedisCacheConfig().render().splitlines()
+    assert 'maxmemory 256mb' in rendered
+    assert 'maxmemory-policy allkeys-lru' in rendered
+    assert 'save ""' in rendered
+
+
+def test_redis_rejects_invalid_memory():
+    with pytest.raises(pydantic.ValidationError):
+        RedisServerConfig.model_validate({'maxmemory': '1 GB'})
+
+
+@pytest.mark.parametrize(
+    ('resources', 'cores'),
+    [
+        ({}, None),
+        ({'requests': {'cpu': '500m'}}, 1),
+        ({'requests': {'cpu': '2'}}, 2),
+        ({'requests': {'cpu': '1'}, 'limits': {'cpu': '3500m'}}, 3),
+    ],
+)
+def test_resources_cpu_cores(resources, cores):
+    assert ResourcesConfig.model_validate(resources).cpu_cores() == cores
+
+
+@pytest.mark.parametrize('cpu', ['1Gi', '500 m', '1.5m', '1.', '-1', ''])
+def test_resources_reject_invalid_cpu(cpu):
+    with pytest.raises(pydantic.ValidationError, match='requests.cpu'):
+        ResourcesConfig.model_validate({'requests': {'cpu': cpu}})
+
+
+def test_resources_accept_unquoted_cpu():
+    resources = ResourcesConfig.model_validate({'requests': {'cpu': 2}, 'limits': {'cpu': 0.5}})
+    assert resources.requests.cpu == '2'
+    assert resources.limits.cpu == '0.5'
+
+
+def test_resources_guaranteed_requires_requests():
+    with pytest.raises(pydantic.ValidationError, match='guaranteed'):
+        ResourcesConfig.model_validate({'guaranteed': True, 'requests': {'cpu': '1'}})
+
+
+def test_resources_guaranteed_rejects_limits():
+    with pytest.raises(pydantic.ValidationError, match='guaranteed'):
+        ResourcesConfig.model_validate(
+            {
+                'guaranteed': True,
+                'requests': {'cpu': '1', 'memory': '1Gi'},
+                'limits': {'cpu': '2'},
+            }
+        )
+
+
+def test_scratch_ephemeral_requires_size():
+    with pytest.raises(pydantic.ValidationError, match='size'):
+        ScratchConfig.model_validate({'kind': 'ephemeral'})
+
+
+def test_worker_autoscaling_requires_split_mode(make_config):
+    with pytest.raises(pydantic.ValidationError, match='split'):
+        make_config({'paperless': {'worker': {'autoscaling': {'max-replicas': 4}}}})
+
+
+def test_mail_worker_requires_split_mode(make_config):
+    with pytest.raises(pydantic.ValidationError, match='split'):
+        make_config({'paperless': {'mail-worker': {}}})
+
+
+def test_migration_requires_split_mode(make_config):
+    with pytest.raises(pydantic.ValidationError, match='split'):
+        make_config({'paperless': {'migration': {}}})
+
+
+def test_splitter_requires_split_mode(make_config):
+    with pytest.raises(pydantic.ValidationError, match='split'):
+        make_config({'paperless': {'splitter': {}}})
+
+
+@pytest.mark.parametrize(
+    'paperless',
+    [
+        {'webserver': {'replicas': 2}},
+        {'webserver': {'resources': {'requests': {'cpu': '1'}}}},
+        {'worker': {'replicas': 2}},
+        {'worker': {'resources': {'requests': {'cpu': '1'}}}},
+        {'consumer': {'resources': {'requests': {'cpu': '1'}}}},
+    ],
+)
+def test_workload_settings_require_split_mode(make_config, paperless):
+    with pytest.raises(pydantic.ValidationError, match='require split mode'):
+        make_config({'paperless': paperless})
+
+
+def test_single_resources_rejected_in_split_mode(make_config):
+    with pytest.raises(pydantic.ValidationError, match='require single mode'):
+        make_config({'paperless': {'mode': 'split', 'resources': {'requests': {'cpu': '1'}}}})
+
+
+def test_conversion_service_autoscaling_requires_cpu_request(make_config):
+    with pytest.raises(pydantic.ValidationError, match='cpu request'):
+        make_config({'tika': {'max-replicas': 3}})
+
+
+def test_existing_claim_rejects_claim_settings():
+    with pytest.raises(pydantic.ValidationError, match='existing claims'):
+        VolumeConfig.model_validate({'existing-claim': 'media', 'storage-class': 'fast'})
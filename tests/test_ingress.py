@@ -0,0 +1,67 @@
+import pydantic
+import pytest
+
+from paperless.config import IngressConfig
+from paperless.ingress import ingress_routes, middleware_specs
+
+SERVICE = {'name': 'paperless', 'namespace': 'paperless', 'port': 8000}
+
+
+def route_middlewares(routes) -> list[list[str]]:
+    return [[m['name'] for m in route.get('middlewares', [])] for route in routes]
+
+
+def test_default_middlewares():
+    specs = middleware_specs(IngressConfig())
+    assert set(specs) == {'compress', 'static-cache', 'thumbnail-cache'}
+    static_headers = specs['static-cache']['headers']['customResponseHeaders']
+    thumbnail_headers = specs['thumbnail-cache']['headers']['customResponseHeaders']
+    assert static_headers['Cache-Control'] == 'public, max-age=86400'
+    assert thumbnail_headers['Cache-Control'] == 'private, max-age=3600'
+
+
+def test_default_routes():
+    routes = ingress_routes('paperless.example.com', SERVICE, IngressConfig())
+    assert [route['match'] for route in routes] == [
+        'Host(`paperless.example.com`) && PathPrefix(`/static/`)',
+        'Host(`paperless.example.com`) && PathRegexp(`^/api/documents/[0-9]+/thumb/$`)',
+        'Host(`paperless.example.com`)',
+    ]
+    assert route_middlewares(routes) == [
+        ['compress', 'static-cache'],
+        ['thumbnail-cache'],
+        ['compress'],
+    ]
+    assert all(route['services'] == [SERVICE] for route in routes)
+
+
+def test_custom_max_ages():
+    specs = middleware_specs(
+        IngressConfig.model_validate({'static-max-age': 600, 'thumbnail-max-age': 60})
+    )
+    static_headers = specs['static-cache']['headers']['customResponseHeaders']
+    thumbnail_headers = specs['thumbnail-cache']['headers']['customResponseHeaders']
+    assert static_headers['Cache-Control'] == 'public, max-age=600'
+    assert thumbnail_headers['Cache-Control'] == 'private, max-age=60'
+
+
+def test_negative_max_age_is_rejected():
+    with pytest.raises(pydantic.ValidationError):
+        IngressConfig.model_validate({'thumbnail-max-age': -1})
+
+
+def test_disabled_middlewares_are_not_referenced():
+    ingress_config = IngressConfig.model_validate(
+        {'compress': False, 'static-max-age': 0, 'thumbnail-max-age': 0}
+    )
+    assert middleware_specs(ingress_config) == {}
+    routes = ingress_routes('paperless.example.com', SERVICE, ingress_config)
+    assert all('middlewares' not in route for route in routes)
+
+
+def test_rendered_ingress_depends_on_middlewares(render):
+    rendered = render({'paperless': {'ingress': {'compress': False}}})
+    assert rendered.names('Middleware') == {'static-cache', 'thumbnail-cache'}
+    routes = rendered.find('IngressRoute', 'ingress')['spec']['routes']
+    assert route_middlewares(routes) == [['static-cache'], ['thumbnail-cache'], []]
+    assert routes[-1]['services'] == [{'name': 'paperless', 'namespace': 'paperless', 'port': 8000}]
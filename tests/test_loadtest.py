@@ -0,0 +1,176 @@
+import email
+import itertools
+import random
+import struct
+import zlib
+
+import pytest
+
+from paperless.loadtest import barcode
+from paperless.loadtest.fixtures import (
+    SEPARATOR_BARCODE,
+    Fixture,
+    FixtureSpec,
+    document_pages,
+    generate,
+)
+from paperless.loadtest.runner import Submission, report, update
+from paperless.loadtest.split_benchmark import Result, format_results
+from paperless.loadtest.stats import Summary, percentile, throughput
+
+
+def test_percentile_interpolates():
+    values = [4.0, 1.0, 3.0, 2.0]
+    assert percentile(values, 0) == 1.0
+    assert percentile(values, 50) == 2.5
+    assert percentile(values, 100) == 4.0
+
+
+def test_percentile_rejects_empty():
+    with pytest.raises(ValueError):
+        percentile([], 50)
+
+
+def test_summary():
+    summary = Summary.of([1.0, 2.0, 3.0])
+    assert summary.count == 3
+    assert summary.mean == 2.0
+    assert summary.max == 3.0
+
+
+def test_throughput():
+    assert throughput(30, 0, 60) == 30
+    assert throughput(30, 60, 60) == 0
+
+
+def test_barcode_symbols():
+    # Start B, the characters, the weighted checksum modulo 103 and stop
+    assert barcode.symbols('PJJ123C') == [104, 48, 42, 42, 17, 18, 19, 35, 55, 106]
+
+
+def test_barcode_rejects_unsupported_characters():
+    with pytest.raises(ValueError):
+        barcode.symbols('ä')
+
+
+def test_barcode_modules():
+    modules = barcode.modules(SEPARATOR_BARCODE)
+    # Every symbol is 11 modules wide, the stop pattern 13
+    assert len(modules) == 2 * barcode.QUIET_ZONE + 11 * (len(SEPARATOR_BARCODE) + 2) + 13
+    assert not any(modules[: barcode.QUIET_ZONE])
+    assert modules[barcode.QUIET_ZONE]
+
+
+def test_document_pages_with_separators_and_asns():
+    spec = FixtureSpec(pages=2, documents=3, asn=True)
+    pages = document_pages(spec, 'title', random.Random(0), itertools.count(7))
+    assert [page.barcode for page in pages] == [
+        'ASN00007',
+        None,
+        SEPARATOR_BARCODE,
+        'ASN00008',
+        None,
+        SEPARATOR_BARCODE,
+        'ASN00009',
+        None,
+    ]
+
+
+@pytest.mark.parametrize('kind', ['pdf', 'scan'])
+def test_generate_pdf(kind):
+    fixture = generate(FixtureSpec(kind, pages=2, documents=2), 'name', random.Random(0), iter([]))
+    assert fixture.name == 'name.pdf'
+    assert fixture.documents == 2
+    assert fixture.data.startswith(b'%PDF-1.7')
+    assert fixture.data.rstrip().endswith(b'%%EOF')
+    # Two pages per document and one separator page
+    assert b'/Count 5 >>' in fixture.data
+
+
+def test_generate_png():
+    fixture = generate(FixtureSpec('png'), 'name', random.Random(0), iter([]))
+    assert fixture.data.startswith(b'\x89PNG\r\n\x1a\n')
+    length, kind = struct.unpack('>I4s', fixture.data[8:16])
+    header = fixture.data[16 : 16 + length]
+    assert kind == b'IHDR'
+    assert struct.unpack('>I', fixture.data[16 + length : 20 + length])[0] == zlib.crc32(
+        kind + header
+    )
+
+
+def test_generate_eml_attaches_remaining_pages():
+    fixture = generate(FixtureSpec('eml', pages=3), 'name', random.Random(0), iter([]))
+    message = email.message_from_bytes(fixture.data)
+    attachments = [part.get_filename() for part in message.walk() if part.get_filename()]
+    assert fixture.documents == 1
+    assert message['Subject'] == 'name'
+    assert attachments == ['name.pdf']
+
+
+def test_generate_is_unique():
+    rng = random.Random(0)
+    first = generate(FixtureSpec(), 'name', rng, iter([]))
+    second = generate(FixtureSpec(), 'name', rng, iter([]))
+    assert first.data != second.data
+
+
+def task(name: str, status: str, created: str, done: str | None = None, started=None):
+    return {
+        'task_file_name': name,
+        'status': status,
+        'date_created': created,
+        'date_started': started,
+        'date_done': done,
+        'related_document': '1' if status == 'SUCCESS' else None,
+        'result': 'error' if status == 'FAILURE' else None,
+    }
+
+
+def test_update_waits_for_all_documents():
+    submission = Submission(Fixture('run-00001.pdf', b'', 2), submitted=0)
+    tasks = [
+        task('run-00001_1.pdf', 'SUCCESS', '1970-01-01T00:00:05+00:00', '1970-01-01T00:01:00+00:00')
+    ]
+    update(submission, tasks)
+    assert not submission.done
+
+    tasks.append(
+        task(
+            'run-00001_2.pdf',
+            'SUCCESS',
+            '1970-01-01T00:00:06+00:00',
+            '1970-01-01T00:01:30+00:00',
+            started='1970-01-01T00:00:10+00:00',
+        )
+    )
+    update(submission, tasks)
+    assert submission.done
+    assert submission.stages == {'pickup': 5, 'queue': 5, 'processing': 80, 'total': 90}
+
+
+def test_update_failure():
+    submission = Submission(Fixture('run-00001.pdf', b'', 1), submitted=0)
+    update(submission, [task('run-00001.pdf', 'FAILURE', '1970-01-01T00:00:05+00:00')])
+    assert submission.done
+    assert submission.error == 'error'
+
+
+def test_report():
+    done = Submission(Fixture('a.pdf', b'', 2), 0, {'pickup': 1, 'total': 60}, done=True)
+    failed = Submission(Fixture('b.pdf', b'', 1), 0, error='timeout', done=True)
+    result = report([done, failed])
+    assert result['documents'] == 2
+    assert result['failures'] == {'b.pdf': 'timeout'}
+    assert result['documents_per_minute'] == 2
+    assert set(result['stages']) == {'pickup', 'total'}
+
+
+def test_format_split_benchmark():
+    results = [
+        Result(1, 20, 10.0, Summary.of([2.0, 3.0]), []),
+        Result(4, 20, 2.5, Summary.of([0.5, 1.0]), ['split-00001.pdf']),
+    ]
+    lines = format_results(results).splitlines()
+    assert lines[1].split() == ['1', '2.0', '1.0x', '2.5s', '3.0s']
+    assert lines[2].split()[:3] == ['4', '8.0', '4.0x']
+    assert lines[3] == 'mismatch with 4 processes: split-00001.pdf'
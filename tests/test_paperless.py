@@ -0,0 +1,651 @@
+import json
+
+from paperless.django_settings import MAIL_ROUTER
+from paperless.paperless import (
+    CONSUMER_COMMAND,
+    CONSUMER_IGNORE_PATTERNS,
+    MIGRATE_COMMAND,
+    SCHEDULER_COMMAND,
+    WEBSERVER_COMMAND,
+    WORKER_COMMAND,
+)
+
+# Offline construction of the whole program takes well below a second. A real preview adds a
+# round trip to the cluster for every resource read with .get() on top, so these are counted
+# separately instead of being hidden in the budget.
+CONSTRUCTION_BUDGET_SECONDS = 5
+LOOKUPS = ['traefik-service']
+
+MONITORING = {
+    'celery-exporter': {'version': '0.10.14'},
+    'redis-exporter': {'version': '1.67.0'},
+    'postgres-exporter': {'version': '0.16.0'},
+    'statsd-exporter': {'version': '0.28.0'},
+    'jmx-exporter': {'version': '1.1.0'},
+}
+
+ALL_FEATURES = {
+    'paperless': {
+        'mode': 'split',
+        'consume-watcher': {'python-version': '3.13'},
+        'splitter': {},
+        'scratch': {'kind': 'ephemeral', 'size': '10Gi'},
+        'worker': {'autoscaling': {'max-replicas': 4}},
+        'mail-worker': {'autoscaling': {'max-replicas': 2}},
+        'maintenance': {},
+        'migration': {},
+    },
+    'postgres': {'pgbouncer': {'version': '1.24.0'}, 'tuning': {'preset': 'small'}},
+    'redis': {'cache': {}, 'storage': {}},
+    'prepull': {},
+    'tika': {'max-replicas': 3, 'resources': {'requests': {'cpu': '1'}}},
+    'monitoring': MONITORING,
+}
+
+
+def test_construction_budget(render):
+    rendered = render()
+    assert rendered.duration < CONSTRUCTION_BUDGET_SECONDS
+    assert [r.name for r in rendered.gets()] == LOOKUPS
+
+
+def test_construction_budget_all_features(render):
+    rendered = render(ALL_FEATURES)
+    assert rendered.duration < CONSTRUCTION_BUDGET_SECONDS
+    assert [r.name for r in rendered.gets()] == LOOKUPS
+
+
+def test_default_resources(render):
+    rendered = render()
+    assert rendered.names('StatefulSet') == {'paperless', 'redis'}
+    assert rendered.names('Deployment') == {'tika', 'gotenberg'}
+    assert rendered.names('Service') >= {'paperless', 'redis', 'tika', 'gotenberg'}
+    assert not rendered.names('HorizontalPodAutoscaler')
+    assert not rendered.names('ServiceMonitor')
+
+
+def test_single_workload_env(render):
+    env = render().env('StatefulSet', 'paperless', 'paperless')
+    assert env['PAPERLESS_REDIS'] == 'redis://redis:6379'
+    assert env['PAPERLESS_TIKA_ENDPOINT'] == 'http://tika:9998'
+    assert env['PAPERLESS_TIKA_GOTENBERG_ENDPOINT'] == 'http://gotenberg:3000'
+    assert env['PAPERLESS_DBHOST'] == 'postgres'
+    assert env['PAPERLESS_DBPORT'] == '5432'
+    assert env['PAPERLESS_URL'] == 'https://paperless.tobiash.net'
+    assert env['PAPERLESS_CONSUMER_POLLING'] == '30'
+    assert env['PAPERLESS_OCR_LANGUAGE'] == 'deu+eng'
+    assert json.loads(env['PAPERLESS_CONSUMER_IGNORE_PATTERNS']) == CONSUMER_IGNORE_PATTERNS
+    assert 'DJANGO_SETTINGS_MODULE' not in env
+
+
+def test_prod_worker_counts(render):
+    # Prod allocates no CPU and keeps the counts it ran with before they were derived
+    env = render().env('StatefulSet', 'paperless', 'paperless')
+    assert env['PAPERLESS_WEBSERVER_WORKERS'] == '4'
+    assert env['PAPERLESS_TASK_WORKERS'] == '4'
+    assert env['PAPERLESS_THREADS_PER_WORKER'] == '4'
+
+
+def test_single_workload_volumes(render):
+    rendered = render()
+    pod_spec = rendered.pod_spec('StatefulSet', 'paperless')
+    mounts = {m['name']: m['mountPath'] for m in pod_spec['containers'][0]['volumeMounts']}
+    assert mounts == {
+        'data': '/usr/src/paperless/data',
+        'media': '/usr/src/paperless/media',
+        'consume': '/usr/src/paperless/consume',
+    }
+    consume = next(v for v in pod_spec['volumes'] if v['name'] == 'consume')
+    assert consume['csi']['volumeAttributes'] == {
+        'server': 'synology.tobiash.net',
+        'share': '/volume2/paperless',
+        'mountOptions': 'nfsvers=4.1,sec=sys',
+    }
+    claims = rendered.find('StatefulSet', 'paperless')['spec']['volumeClaimTemplates']
+    assert [c['metadata']['name'] for c in claims] == ['data', 'media']
+
+
+def test_workers_derived_from_cpu(render):
+    env = render(
+        {'paperless': {'resources': {'requests': {'cpu': '8'}}, 'worker': {'workers': 2}}}
+    ).env('StatefulSet', 'paperless', 'paperless')
+    assert env['PAPERLESS_WEBSERVER_WORKERS'] == '8'
+    assert env['PAPERLESS_TASK_WORKERS'] == '2'
+    assert env['PAPERLESS_THREADS_PER_WORKER'] == '4'
+
+
+def test_ocr_profile(render):
+    env = render({'paperless': {'ocr': {'profile': 'fast'}}}).env(
+        'StatefulSet', 'paperless', 'paperless'
+    )
+    assert env['PAPERLESS_OCR_MODE'] == 'skip'
+    assert env['PAPERLESS_OCR_SKIP_ARCHIVE_FILE'] == 'with_text'
+
+
+def test_split_workloads(render):
+    rendered = render({'paperless': {'mode': 'split'}})
+    assert rendered.names('StatefulSet') == {'redis'}
+    assert rendered.names('Deployment') >= {
+        'paperless-webserver',
+        'paperless-worker',
+        'paperless-consumer',
+    }
+    assert rendered.names('PersistentVolumeClaim') == {'paperless-data', 'paperless-media'}
+    assert rendered.find('Service', 'paperless')['spec']['selector'] == {
+        'app': 'paperless',
+        'component': 'webserver',
+    }
+
+    webserver_env = rendered.env('Deployment', 'paperless-webserver', 'webserver')
+    assert webserver_env['PAPERLESS_SCRATCH_DIR'] == '/usr/src/paperless/data/scratch'
+    assert 'PAPERLESS_TASK_WORKERS' not in webserver_env
+    worker_env = rendered.env('Deployment', 'paperless-worker', 'worker')
+    assert 'PAPERLESS_WEBSERVER_WORKERS' not in worker_env
+    consumer = rendered.pod_spec('Deployment', 'paperless-consumer')
+    assert [c['name'] for c in consumer['containers']] == ['consumer', 'scheduler']
+
+
+def test_split_commands(render):
+    rendered = render(ALL_FEATURES | {'paperless': ALL_FEATURES['paperless'] | {'export': EXPORT}})
+    containers = {
+        name: rendered.container('Deployment', f'paperless-{name}', name)
+        for name in ('webserver', 'worker', 'mail-worker')
+    }
+    for name in ('consumer', 'scheduler'):
+        containers[name] = rendered.container('Deployment', 'paperless-consumer', name)
+    containers['migrate'] = rendered.pod_spec('Job', 'paperless-migrate')['containers'][0]
+    for name in ('export', 'classifier', 'index'):
+        cron_job = rendered.find('CronJob', f'paperless-{name}')
+        containers[name] = cron_job['spec']['jobTemplate']['spec']['template']['spec'][
+            'containers'
+        ][0]
+
+    commands = {name: container['command'] for name, container in containers.items()}
+    assert commands['webserver'] == WEBSERVER_COMMAND
+    assert commands['worker'] == WORKER_COMMAND
+    assert commands['mail-worker'] == [*WORKER_COMMAND, '--queues', 'mail']
+    assert commands['consumer'] == CONSUMER_COMMAND
+    assert commands['scheduler'] == SCHEDULER_COMMAND
+    assert commands['migrate'] == MIGRATE_COMMAND
+    for name in ('export', 'classifier', 'index'):
+        assert commands[name][:2] == ['/usr/bin/ionice', '-c']
+        assert commands[name][commands[name].index('python3') + 1] == 'manage.py'
+
+    # The image entrypoint would start all services in every container
+    for container in containers.values():
+        assert 'args' not in container
+        assert container['workingDir'] == '/usr/src/paperless/src'
+        assert container['securityContext'] == {'runAsUser': 1000, 'runAsGroup': 1000}
+        assert not any('gosu' in arg for arg in container['command'])
+
+
+def test_single_entrypoint(render):
+    paperless = render().container('StatefulSet', 'paperless', 'paperless')
+    assert 'command' not in paperless
+    assert 'args' not in paperless
+
+
+def test_worker_autoscaling(render):
+    autoscaling = {'max-replicas': 4, 'queue-length': 3}
+    rendered = render(
+        {'paperless': {'mode': 'split', 'worker': {'replicas': 2, 'autoscaling': autoscaling}}}
+    )
+    # The replicas are owned by the HPA KEDA creates
+    worker = rendered.find('Deployment', 'paperless-worker')
+    assert 'replicas' not in worker['spec']
+    # Running tasks are not killed before they time out
+    assert worker['spec']['template']['spec']['terminationGracePeriodSeconds'] == 1860
+    env = rendered.env('Deployment', 'paperless-worker', 'worker')
+    assert env['PAPERLESS_WORKER_TIMEOUT'] == '1800'
+
+    scaled_object = rendered.find('ScaledObject', 'paperless-worker')
+    assert scaled_object['apiVersion'] == 'keda.sh/v1alpha1'
+    assert scaled_object['spec'] == {
+        'scaleTargetRef': {'name': 'paperless-worker'},
+        'minReplicaCount': 1,
+        'maxReplicaCount': 4,
+        'pollingInterval': 15,
+        'cooldownPeriod': 300,
+        'advanced': {
+            'horizontalPodAutoscalerConfig': {
+                'behavior': {
+                    'scaleDown': {
+                        'stabilizationWindowSeconds': 600,
+                        'policies': [{'type': 'Pods', 'value': 1, 'periodSeconds': 60}],
+                    },
+                },
+            },
+        },
+        'triggers': [
+            {
+                'type': 'redis',
+                'metadata': {
+                    'address': 'redis.paperless.svc.cluster.local:6379',
+                    'listName': 'celery',
+                    'listLength': '3',
+                    'activationListLength': '0',
+                },
+            },
+        ],
+    }
+
+
+def test_worker_replicas_without_autoscaling(render):
+    rendered = render(
+        {'paperless': {'mode': 'split', 'worker': {'replicas': 2, 'task-timeout': 3600}}}
+    )
+    worker = rendered.find('Deployment', 'paperless-worker')
+    assert worker['spec']['replicas'] == 2
+    assert worker['spec']['template']['spec']['terminationGracePeriodSeconds'] == 3660
+    assert not rendered.names('ScaledObject')
+
+
+def test_mail_worker(render):
+    rendered = render(
+        {
+            'paperless': {
+                'mode': 'split',
+                'mail-worker': {'workers': 1, 'autoscaling': {'max-replicas': 2}},
+            },
+            'monitoring': {'redis-exporter': {'version': '1.67.0'}},
+        }
+    )
+    worker = rendered.container('Deployment', 'paperless-worker', 'worker')
+    assert worker['command'] == WORKER_COMMAND
+    mail_worker = rendered.container('Deployment', 'paperless-mail-worker', 'mail-worker')
+    assert mail_worker['command'] == [*WORKER_COMMAND, '--queues', 'mail']
+    assert (
+        rendered.env('Deployment', 'paperless-mail-worker', 'mail-worker')['PAPERLESS_TASK_WORKERS']
+        == '1'
+    )
+
+    scaled_object = rendered.find('ScaledObject', 'paperless-mail-worker')
+    assert scaled_object['spec']['triggers'][0]['metadata']['listName'] == 'mail'
+    settings = rendered.find('ConfigMap', 'paperless-settings')['data']['settings_override.py']
+    assert 'CELERY_TASK_ROUTES = (route_task,)' in settings
+    exporter = rendered.env('Deployment', 'redis-exporter', 'redis-exporter')
+    assert exporter['REDIS_EXPORTER_CHECK_SINGLE_KEYS'] == 'celery,mail'
+
+
+def test_mail_router():
+    namespace = {}
+    exec(MAIL_ROUTER, namespace)
+    route_task = namespace['route_task']
+    assert route_task('paperless_mail.tasks.process_mail_accounts', (), {}, {}) == {'queue': 'mail'}
+    assert route_task('documents.tasks.train_classifier', (), {}, {}) is None
+
+
+def test_pgbouncer(render):
+    rendered = render({'postgres': {'pgbouncer': {'version': '1.24.0'}}})
+    env = rendered.env('StatefulSet', 'paperless', 'paperless')
+    assert env['PAPERLESS_DBHOST'] == 'pgbouncer'
+    assert env['PAPERLESS_DBPORT'] == '6432'
+    assert 'pgbouncer' in rendered.names('Deployment')
+
+
+def test_consume_watcher(render):
+    rendered = render({'paperless': {'consume-watcher': {'python-version': '3.13'}}})
+    env = rendered.env('StatefulSet', 'paperless', 'paperless')
+    assert env['PAPERLESS_CONSUMER_POLLING'] == '0'
+    assert 'PAPERLESS_CONSUMER_POLLING_DELAY' not in env
+
+    paperless = rendered.container('StatefulSet', 'paperless', 'paperless')
+    consume_mount = next(
+        m for m in paperless['volumeMounts'] if m['mountPath'] == '/usr/src/paperless/consume'
+    )
+    assert consume_mount == {
+        'name': 'data',
+        'mountPath': '/usr/src/paperless/consume',
+        'subPath': 'consume',
+    }
+
+    watcher = rendered.container('StatefulSet', 'paperless', 'consume-watcher')
+    assert watcher['image'] == 'docker.io/library/python:3.13'
+    assert watcher['command'][:3] == ['python', '-m', 'ingest.watcher']
+    assert {m['name'] for m in watcher['volumeMounts']} == {'ingest', 'consume', 'data'}
+    # The mocks drop keys starting with __ like pulumi internal properties, so no __init__.py
+    assert 'watcher.py' in rendered.find('ConfigMap', 'ingest')['data']
+
+
+def test_scratch_volume(render):
+    rendered = render({'paperless': {'scratch': {'memory': True, 'size': '2Gi'}}})
+    pod_spec = rendered.pod_spec('StatefulSet', 'paperless')
+    scratch = next(v for v in pod_spec['volumes'] if v['name'] == 'scratch')
+    assert scratch['emptyDir'] == {'medium': 'Memory', 'sizeLimit': '2Gi'}
+    env = rendered.env('StatefulSet', 'paperless', 'paperless')
+    assert env['PAPERLESS_SCRATCH_DIR'] == '/tmp/paperless'
+
+
+def test_ephemeral_scratch_volume(render):
+    scratch_config = {'kind': 'ephemeral', 'size': '10Gi', 'storage-class': 'local-path'}
+    pod_spec = render({'paperless': {'scratch': scratch_config}}).pod_spec(
+        'StatefulSet', 'paperless'
+    )
+    scratch = next(v for v in pod_spec['volumes'] if v['name'] == 'scratch')
+    assert scratch['ephemeral']['volumeClaimTemplate']['spec'] == {
+        'accessModes': ['ReadWriteOnce'],
+        'resources': {'requests': {'storage': '10Gi'}},
+        'storageClassName': 'local-path',
+    }
+
+
+def test_redis(render):
+    rendered = render()
+    config = rendered.find('ConfigMap', 'redis-config')['data']['redis.conf']
+    assert 'maxmemory-policy noeviction\n' in config
+    redis = rendered.container('StatefulSet', 'redis', 'redis')
+    assert redis['args'] == ['redis-server', '/usr/local/etc/redis/redis.conf']
+    assert 'volumeClaimTemplates' not in rendered.find('StatefulSet', 'redis')['spec']
+
+
+def test_redis_storage(render):
+    rendered = render({'redis': {'storage': {'size': '5Gi', 'storage-class': 'fast'}}})
+    claims = rendered.find('StatefulSet', 'redis')['spec']['volumeClaimTemplates']
+    assert claims[0]['spec']['resources']['requests']['storage'] == '5Gi'
+    assert claims[0]['spec']['storageClassName'] == 'fast'
+
+
+def test_redis_cache(render):
+    rendered = render({'redis': {'cache': {'maxmemory': '64mb'}}})
+    assert rendered.names('StatefulSet') == {'paperless', 'redis', 'redis-cache'}
+    config = rendered.find('ConfigMap', 'redis-cache-config')['data']['redis.conf']
+    assert 'maxmemory 64mb\n' in config
+    env = rendered.env('StatefulSet', 'paperless', 'paperless')
+    assert env['PAPERLESS_CACHE_REDIS'] == 'redis://redis-cache:6379'
+    assert env['DJANGO_SETTINGS_MODULE'] == 'paperless.settings_override'
+    settings = rendered.find('ConfigMap', 'paperless-settings')['data']
+    assert "os.environ['PAPERLESS_CACHE_REDIS']" in next(iter(settings.values()))
+
+
+def test_tika(render):
+    rendered = render()
+    tika = rendered.container('Deployment', 'tika', 'tika')
+    assert tika['image'] == 'docker.io/apache/tika:3.1.0.0'
+    assert 'args' not in tika
+    assert rendered.find('Deployment', 'tika')['spec']['replicas'] == 1
+
+
+def test_tika_autoscaling(render):
+    rendered = render({'tika': {'max-replicas': 3, 'resources': {'requests': {'cpu': '1'}}}})
+    assert 'replicas' not in rendered.find('Deployment', 'tika')['spec']
+    autoscaler = rendered.find('HorizontalPodAutoscaler', 'tika')
+    assert autoscaler['spec']['maxReplicas'] == 3
+
+
+def test_gotenberg(render):
+    rendered = render({'gotenberg': {'max-queue-size': 10, 'auto-start': False}})
+    command = rendered.container('Deployment', 'gotenberg', 'gotenberg')['command']
+    assert '--chromium-disable-javascript=true' in command
+    assert '--chromium-max-queue-size=10' in command
+    assert '--libreoffice-auto-start=false' in command
+
+
+def test_ingress(render):
+    rendered = render()
+    assert rendered.names('Middleware') == {'compress', 'static-cache', 'thumbnail-cache'}
+    routes = rendered.find('IngressRoute', 'ingress')['spec']['routes']
+    assert routes[-1]['match'] == 'Host(`paperless.tobiash.net`)'
+    assert routes[-1]['services'] == [{'name': 'paperless', 'namespace': 'paperless', 'port': 8000}]
+
+
+def test_monitoring(render):
+    rendered = render(
+        {'paperless': {'mode': 'split'}, 'redis': {'cache': {}}, 'monitoring': MONITORING}
+    )
+    assert rendered.names('ServiceMonitor') == {
+        'celery-exporter',
+        'redis-exporter',
+        'redis-cache-exporter',
+        'postgres-exporter',
+    }
+    assert rendered.names('PodMonitor') == {'paperless-webserver', 'tika', 'gotenberg'}
+    assert 'paperless-dashboard' in rendered.names('ConfigMap')
+
+    tika = rendered.container('Deployment', 'tika', 'tika')
+    assert tika['args'] == ['-noFork']
+    assert [c['name'] for c in rendered.pod_spec('Deployment', 'tika')['containers']] == [
+        'tika',
+        'jmx-exporter',
+    ]
+
+    webserver_env = rendered.env('Deployment', 'paperless-webserver', 'webserver')
+    assert 'GUNICORN_CMD_ARGS' in webserver_env
+    webserver = rendered.pod_spec('Deployment', 'paperless-webserver')
+    assert [c['name'] for c in webserver['containers']] == ['webserver', 'statsd-exporter']
+
+
+EXPORT = {'server': 'nas.example.com', 'share': '/volume1/backup'}
+
+
+def test_export_single(render):
+    rendered = render({'paperless': {'export': EXPORT | {'compare-checksums': True}}})
+    cron_job = rendered.find('CronJob', 'paperless-export')
+    assert cron_job['spec']['concurrencyPolicy'] == 'Forbid'
+    pod_spec = cron_job['spec']['jobTemplate']['spec']['template']['spec']
+
+    command = pod_spec['containers'][0]['command']
+    assert command[:6] == ['/usr/bin/ionice', '-c', '3', '/usr/bin/nice', '-n', '19']
+    assert command[command.index('document_exporter') :] == [
+        'document_exporter',
+        '/export',
+        '--no-progress-bar',
+        '--compare-checksums',
+        '--delete',
+    ]
+
+    volumes = {v['name']: v for v in pod_spec['volumes']}
+    assert set(volumes) == {'data', 'media', 'export'}
+    assert volumes['data']['persistentVolumeClaim']['claimName'] == 'data-paperless-0'
+    assert volumes['export']['csi']['volumeAttributes']['share'] == '/volume1/backup'
+    # The claims of the StatefulSet are ReadWriteOnce
+    affinity = pod_spec['affinity']['podAffinity']['requiredDuringSchedulingIgnoredDuringExecution']
+    assert affinity[0]['labelSelector'] == {'matchLabels': {'app': 'paperless'}}
+
+
+def test_export_split(render):
+    rendered = render(
+        {'paperless': {'mode': 'split', 'export': EXPORT | {'io-class': 'best-effort'}}}
+    )
+    pod_spec = rendered.find('CronJob', 'paperless-export')['spec']['jobTemplate']['spec'][
+        'template'
+    ]['spec']
+    assert pod_spec['containers'][0]['command'][:5] == ['/usr/bin/ionice', '-c', '2', '-n', '7']
+    volumes = {v['name']: v for v in pod_spec['volumes']}
+    assert volumes['media']['persistentVolumeClaim']['claimName'] == 'paperless-media'
+    assert 'affinity' not in pod_spec
+
+
+def test_maintenance(render):
+    rendered = render(
+        {
+            'paperless': {
+                'maintenance': {'index-schedule': None},
+                'storage': {'index': {'storage-class': 'local-nvme'}},
+            }
+        }
+    )
+    env = rendered.env('StatefulSet', 'paperless', 'paperless')
+    assert env['PAPERLESS_TRAIN_TASK_CRON'] == 'disable'
+    assert 'PAPERLESS_INDEX_TASK_CRON' not in env
+    assert rendered.names('CronJob') == {'paperless-classifier'}
+
+    cron_job = rendered.find('CronJob', 'paperless-classifier')
+    assert cron_job['spec']['schedule'] == '15 3 * * *'
+    pod_spec = cron_job['spec']['jobTemplate']['spec']['template']['spec']
+    command = pod_spec['containers'][0]['command']
+    assert command[:5] == ['/usr/bin/ionice', '-c', '2', '-n', '7']
+    assert command[5:] == [
+        '/usr/bin/nice',
+        '-n',
+        '19',
+        'python3',
+        'manage.py',
+        'document_create_classifier',
+    ]
+    assert {v['name'] for v in pod_spec['volumes']} == {'data', 'index'}
+
+
+def test_maintenance_index_split(render):
+    rendered = render({'paperless': {'mode': 'split', 'maintenance': {}}})
+    env = rendered.env('Deployment', 'paperless-worker', 'worker')
+    assert env['PAPERLESS_INDEX_TASK_CRON'] == 'disable'
+    pod_spec = rendered.find('CronJob', 'paperless-index')['spec']['jobTemplate']['spec'][
+        'template'
+    ]['spec']
+    assert pod_spec['containers'][0]['command'][-2:] == ['document_index', 'optimize']
+    assert [v['persistentVolumeClaim']['claimName'] for v in pod_spec['volumes']] == [
+        'paperless-data'
+    ]
+
+
+def test_webserver_probes(render):
+    paperless = render().container('StatefulSet', 'paperless', 'paperless')
+    http_get = paperless['startupProbe']['httpGet']
+    assert http_get['port'] == 8000
+    assert http_get['httpHeaders'] == [{'name': 'Host', 'value': 'localhost'}]
+    assert paperless['readinessProbe']['httpGet'] == http_get
+    assert paperless['livenessProbe']['httpGet'] == http_get
+    # The image entrypoint applies the migrations before the webserver starts
+    startup_probe = paperless['startupProbe']
+    assert startup_probe['periodSeconds'] * startup_probe['failureThreshold'] == 1800
+
+
+def test_webserver_startup_timeout(render):
+    rendered = render({'paperless': {'mode': 'split'}})
+    startup_probe = rendered.container('Deployment', 'paperless-webserver', 'webserver')[
+        'startupProbe'
+    ]
+    assert startup_probe['periodSeconds'] * startup_probe['failureThreshold'] == 300
+
+    rendered = render({'paperless': {'webserver': {'startup-timeout': 3600}}})
+    startup_probe = rendered.container('StatefulSet', 'paperless', 'paperless')['startupProbe']
+    assert startup_probe['periodSeconds'] * startup_probe['failureThreshold'] == 3600
+
+
+def test_migration(render):
+    rendered = render({'paperless': {'mode': 'split', 'migration': {}}})
+    assert 'startupProbe' in rendered.container('Deployment', 'paperless-webserver', 'webserver')
+    pod_spec = rendered.pod_spec('Job', 'paperless-migrate')
+    assert pod_spec['containers'][0]['command'] == MIGRATE_COMMAND
+    assert pod_spec['restartPolicy'] == 'Never'
+    assert [v['persistentVolumeClaim']['claimName'] for v in pod_spec['volumes']] == [
+        'paperless-data',
+        'paperless-media',
+    ]
+
+
+def test_prepull(render):
+    rendered = render({'prepull': {'resources': {'node-selector': {'paperless': 'true'}}}})
+    pod_spec = rendered.pod_spec('DaemonSet', 'paperless-prepull')
+    assert [c['image'] for c in pod_spec['initContainers']] == [
+        'ghcr.io/paperless-ngx/paperless-ngx:2.14.7',
+        'docker.io/apache/tika:3.1.0.0',
+        'docker.io/gotenberg/gotenberg:8.17.3',
+    ]
+    assert pod_spec['nodeSelector'] == {'paperless': 'true'}
+
+
+def test_splitter(render):
+    rendered = render({'paperless': {'mode': 'split', 'splitter': {'replicas': 2}}})
+    env = rendered.env('Deployment', 'paperless-consumer', 'consumer')
+    assert env['PAPERLESS_CONSUMER_POLLING'] == '5'
+    assert env['PAPERLESS_CONSUMER_BARCODE_MAX_PAGES'] == '1'
+    consumer = rendered.container('Deployment', 'paperless-consumer', 'consumer')
+    assert {
+        'name': 'data',
+        'mountPath': '/usr/src/paperless/consume',
+        'subPath': 'consume',
+    } in consumer['volumeMounts']
+
+    assert rendered.find('Deployment', 'paperless-splitter')['spec']['replicas'] == 2
+    pod_spec = rendered.pod_spec('Deployment', 'paperless-splitter')
+    assert {v['name'] for v in pod_spec['volumes']} == {'ingest', 'data', 'consume'}
+    splitter = pod_spec['containers'][0]
+    assert splitter['image'] == 'ghcr.io/paperless-ngx/paperless-ngx:2.14.7'
+    assert splitter['command'][:3] == ['python', '-m', 'ingest.splitter']
+    assert '--stable-seconds=30' in splitter['command']
+    assert '--processes=4' in splitter['command']
+
+
+def test_splitter_after_watcher(render):
+    rendered = render(
+        {
+            'paperless': {
+                'mode': 'split',
+                'consume-watcher': {'python-version': '3.13'},
+                'splitter': {},
+            }
+        }
+    )
+    assert rendered.names('ConfigMap') >= {'ingest'}
+    watcher = rendered.container('Deployment', 'paperless-consumer', 'consume-watcher')
+    assert {'name': 'data', 'mountPath': '/staging', 'subPath': 'split'} in watcher['volumeMounts']
+    pod_spec = rendered.pod_spec('Deployment', 'paperless-splitter')
+    assert {v['name'] for v in pod_spec['volumes']} == {'ingest', 'data'}
+    assert '--stable-seconds=0.0' in pod_spec['containers'][0]['command']
+
+
+def test_storage_single(render):
+    rendered = render(
+        {
+            'paperless': {
+                'storage': {
+                    'media': {'existing-claim': 'paperless-media-nfs'},
+                    'index': {'size': '5Gi', 'storage-class': 'local-ssd'},
+                },
+            },
+        }
+    )
+    claims = rendered.find('StatefulSet', 'paperless')['spec']['volumeClaimTemplates']
+    assert [c['metadata']['name'] for c in claims] == ['data', 'index']
+    assert claims[1]['spec'] == {
+        'accessModes': ['ReadWriteOnce'],
+        'resources': {'requests': {'storage': '5Gi'}},
+        'storageClassName': 'local-ssd',
+    }
+
+    pod_spec = rendered.pod_spec('StatefulSet', 'paperless')
+    media = next(v for v in pod_spec['volumes'] if v['name'] == 'media')
+    assert media['persistentVolumeClaim'] == {'claimName': 'paperless-media-nfs'}
+    mounts = {m['name']: m['mountPath'] for m in pod_spec['containers'][0]['volumeMounts']}
+    assert mounts['index'] == '/usr/src/paperless/data/index'
+
+
+def test_storage_split(render):
+    rendered = render(
+        {
+            'paperless': {
+                'mode': 'split',
+                'storage': {
+                    'data': {'existing-claim': 'paperless-data-nfs'},
+                    'media': {'size': '1Ti', 'storage-class': 'cephfs'},
+                },
+            },
+        }
+    )
+    assert rendered.names('PersistentVolumeClaim') == {'paperless-media'}
+    assert rendered.find('PersistentVolumeClaim', 'paperless-media')['spec'] == {
+        'accessModes': ['ReadWriteMany'],
+        'resources': {'requests': {'storage': '1Ti'}},
+        'storageClassName': 'cephfs',
+    }
+    worker = rendered.pod_spec('Deployment', 'paperless-worker')
+    data = next(v for v in worker['volumes'] if v['name'] == 'data')
+    assert data['persistentVolumeClaim'] == {'claimName': 'paperless-data-nfs'}
+
+
+def test_export_with_index_volume(render):
+    rendered = render({'paperless': {'export': EXPORT, 'storage': {'index': {}}}})
+    pod_spec = rendered.find('CronJob', 'paperless-export')['spec']['jobTemplate']['spec'][
+        'template'
+    ]['spec']
+    volumes = {
+        v['name']: v['persistentVolumeClaim']['claimName']
+        for v in pod_spec['volumes']
+        if 'persistentVolumeClaim' in v
+    }
+    assert volumes == {
+        'data': 'data-paperless-0',
+        'media': 'media-paperless-0',
+        'index': 'index-paperless-0',
+    }
@@ -0,0 +1,55 @@
+import pytest
+
+from paperless.config import POSTGRES_TUNING_PRESETS, PostgresTuningConfig
+from paperless.postgres_tuning import AUTOVACUUM_TABLES, tuning_statements
+
+EXPECTED_STATEMENTS = {
+    'small': [
+        'ALTER DATABASE "paperless" SET effective_cache_size = \'512MB\'',
+        'ALTER DATABASE "paperless" SET work_mem = \'4MB\'',
+        'ALTER DATABASE "paperless" SET maintenance_work_mem = \'64MB\'',
+        'ALTER DATABASE "paperless" SET random_page_cost = \'1.1\'',
+        *[
+            f'ALTER TABLE IF EXISTS {table} SET (autovacuum_vacuum_scale_factor = 0.1, '
+            'autovacuum_analyze_scale_factor = 0.05)'
+            for table in AUTOVACUUM_TABLES
+        ],
+    ],
+    'medium': [
+        'ALTER DATABASE "paperless" SET effective_cache_size = \'2GB\'',
+        'ALTER DATABASE "paperless" SET work_mem = \'16MB\'',
+        'ALTER DATABASE "paperless" SET maintenance_work_mem = \'128MB\'',
+        'ALTER DATABASE "paperless" SET random_page_cost = \'1.1\'',
+        *[
+            f'ALTER TABLE IF EXISTS {table} SET (autovacuum_vacuum_scale_factor = 0.05, '
+            'autovacuum_analyze_scale_factor = 0.02)'
+            for table in AUTOVACUUM_TABLES
+        ],
+    ],
+    'large': [
+        'ALTER DATABASE "paperless" SET effective_cache_size = \'6GB\'',
+        'ALTER DATABASE "paperless" SET work_mem = \'32MB\'',
+        'ALTER DATABASE "paperless" SET maintenance_work_mem = \'512MB\'',
+        'ALTER DATABASE "paperless" SET random_page_cost = \'1.1\'',
+        *[
+            f'ALTER TABLE IF EXISTS {table} SET (autovacuum_vacuum_scale_factor = 0.02, '
+            'autovacuum_analyze_scale_factor = 0.01)'
+            for table in AUTOVACUUM_TABLES
+        ],
+    ],
+}
+
+
+@pytest.mark.parametrize('preset', POSTGRES_TUNING_PRESETS)
+def test_presets(preset):
+    parameters = PostgresTuningConfig.model_validate({'preset': preset}).parameters()
+    assert parameters == POSTGRES_TUNING_PRESETS[preset]
+    # Every parameter is applied, none needs superuser privileges
+    assert tuning_statements('paperless', parameters) == EXPECTED_STATEMENTS[preset]
+
+
+def test_without_autovacuum_parameters():
+    parameters = PostgresTuningConfig.model_validate({'work-mem': '8MB'}).parameters()
+    assert tuning_statements('paperless', parameters) == [
+        'ALTER DATABASE "paperless" SET work_mem = \'8MB\''
+    ]
@@ -0,0 +1,137 @@
+import concurrent.futures
+import concurrent.futures.process
+import os
+import pathlib
+
+import pytest
+
+from paperless.ingest import splitter
+from paperless.ingest.splitter import claim, process, recover, run, separate, unclaimed
+from paperless.paperless import CONSUMER_IGNORE_PATTERNS
+
+
+def test_separate_drops_separator_pages():
+    barcodes = [[], [], ['PATCHT'], [], ['PATCHT'], ['PATCHT']]
+    assert separate(barcodes, 'PATCHT', 'ASN') == [[0, 1], [3]]
+
+
+def test_separate_starts_documents_at_asn_barcodes():
+    barcodes = [['ASN00001'], [], ['ASN00002'], ['PATCHT'], ['ASN00003', 'other'], []]
+    assert separate(barcodes, 'PATCHT', 'ASN') == [[0, 1], [2], [4, 5]]
+
+
+def test_separate_without_barcodes():
+    assert separate([[], ['other']], 'PATCHT', 'ASN') == [[0, 1]]
+
+
+def test_claim_succeeds_once(tmp_path):
+    path = tmp_path / 'scan.pdf'
+    path.write_bytes(b'pdf')
+    claimed = claim(path)
+    assert claimed == tmp_path / '.scan.pdf.splitting'
+    assert unclaimed(claimed) == path
+    assert claim(path) is None
+
+
+def test_recover_returns_stale_claims(tmp_path):
+    path = tmp_path / 'nested' / 'scan.pdf'
+    path.parent.mkdir()
+    path.write_bytes(b'pdf')
+    claimed = claim(path)
+    assert claimed
+    mtime = claimed.stat().st_mtime
+
+    assert recover(tmp_path, 60, mtime + 30) == []
+    assert recover(tmp_path, 60, mtime + 60) == [path]
+    assert path.read_bytes() == b'pdf'
+
+
+def test_run_hands_over_other_files_unchanged(tmp_path):
+    source = tmp_path / 'source'
+    target = tmp_path / 'target'
+    (source / 'nested').mkdir(parents=True)
+    target.mkdir()
+    (source / 'nested' / 'photo.png').write_bytes(b'png')
+    (source / '.scan.pdf.partial').write_bytes(b'partial')
+    os.utime(source / 'nested' / 'photo.png', (0, 0))
+
+    run(source, target, 0, 0.01, CONSUMER_IGNORE_PATTERNS, 60, 1, iterations=2)
+    assert sorted(p.relative_to(target) for p in target.rglob('*')) == [
+        pathlib.Path('nested'),
+        pathlib.Path('nested/photo.png'),
+    ]
+    assert (target / 'nested' / 'photo.png').read_bytes() == b'png'
+    assert sorted(p.name for p in source.rglob('*')) == ['.scan.pdf.partial', 'nested']
+
+
+def claimed_scan(tmp_path: pathlib.Path) -> pathlib.Path:
+    (tmp_path / 'source').mkdir()
+    (tmp_path / 'target').mkdir()
+    path = tmp_path / 'source' / 'scan.pdf'
+    path.write_bytes(b'pdf')
+    claimed = claim(path)
+    assert claimed
+    return claimed
+
+
+def fail(*args):
+    raise RuntimeError('Unable to get page count. Is poppler installed and in PATH?')
+
+
+@pytest.mark.parametrize('step', ['page_count', 'detect', 'split'])
+def test_process_hands_over_files_that_fail_to_split(tmp_path, monkeypatch, step):
+    monkeypatch.setattr(splitter, 'page_count', lambda path: 2)
+    monkeypatch.setattr(splitter, 'detect', lambda *args: [[], ['PATCHT']])
+    monkeypatch.setattr(splitter, step, fail)
+    claimed = claimed_scan(tmp_path)
+
+    with concurrent.futures.ThreadPoolExecutor(1) as executor:
+        outputs = process(
+            claimed, tmp_path / 'source', tmp_path / 'target', executor, 300, 'PATCHT', 'ASN'
+        )
+    assert outputs == [tmp_path / 'target' / 'scan.pdf']
+    assert outputs[0].read_bytes() == b'pdf'
+    assert not claimed.exists()
+
+
+def test_process_raises_broken_pool_after_handing_over(tmp_path, monkeypatch):
+    def broken(*args):
+        raise concurrent.futures.process.BrokenProcessPool()
+
+    monkeypatch.setattr(splitter, 'page_count', lambda path: 2)
+    monkeypatch.setattr(splitter, 'detect', broken)
+    claimed = claimed_scan(tmp_path)
+
+    with concurrent.futures.ThreadPoolExecutor(1) as executor:
+        with pytest.raises(concurrent.futures.process.BrokenProcessPool):
+            process(
+                claimed, tmp_path / 'source', tmp_path / 'target', executor, 300, 'PATCHT', 'ASN'
+            )
+    assert (tmp_path / 'target' / 'scan.pdf').read_bytes() == b'pdf'
+    assert not claimed.exists()
+
+
+def test_run_replaces_a_broken_pool(tmp_path, monkeypatch):
+    executors = []
+
+    def detect(path, pages, dpi, executor):
+        executors.append(executor)
+        if len(executors) == 1:
+            raise concurrent.futures.process.BrokenProcessPool()
+        return [[]]
+
+    monkeypatch.setattr(splitter, 'page_count', lambda path: 1)
+    monkeypatch.setattr(splitter, 'detect', detect)
+    source = tmp_path / 'source'
+    target = tmp_path / 'target'
+    source.mkdir()
+    target.mkdir()
+    for name in ('first.pdf', 'second.pdf'):
+        (source / name).write_bytes(b'pdf')
+        os.utime(source / name, (0, 0))
+
+    run(source, target, 0, 0.01, [], 60, 1, iterations=2)
+    assert sorted(p.name for p in target.iterdir()) == ['first.pdf', 'second.pdf']
+    assert list(source.iterdir()) == []
+    assert len(executors) == 2
+    assert executors[0] is not executors[1]
@@ -0,0 +1,57 @@
+import json
+import os
+import subprocess
+import sys
+
+from paperless.config import get_pulumi_project
+
+# Importing the program takes below a second, most of it in pulumi, the kubernetes core API
+# group and pydantic. Measured in a fresh interpreter as every preview starts one.
+IMPORT_BUDGET_SECONDS = 5
+
+# Only needed by optional features or by the last resources of the program
+DEFERRED_MODULES = [
+    'deploy_base.opnsense',
+    'paperless.consume',
+    'paperless.monitoring',
+    'paperless.pgbouncer',
+    'paperless.postgres_tuning',
+    'pulumi_kubernetes.autoscaling.v2',
+    'pulumi_kubernetes.batch.v1',
+]
+
+
+def import_program() -> tuple[float, list[str]]:
+    script = (
+        'import json, sys, time\n'
+        'start = time.perf_counter()\n'
+        'import paperless.paperless\n'
+        'print(json.dumps([time.perf_counter() - start, sorted(sys.modules)]))\n'
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', script],
+        env={**os.environ, 'PYTHONPATH': os.pathsep.join(sys.path)},
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    duration, modules = json.loads(result.stdout)
+    return duration, modules
+
+
+def test_import_budget():
+    duration, _ = import_program()
+    assert duration < IMPORT_BUDGET_SECONDS
+
+
+def test_import_defers_optional_modules():
+    _, modules = import_program()
+    loaded = [m for m in DEFERRED_MODULES if any(n == m or n.startswith(f'{m}.') for n in modules)]
+    assert loaded == []
+
+
+def test_pulumi_project_is_cached():
+    get_pulumi_project.cache_clear()
+    project = get_pulumi_project()
+    assert get_pulumi_project() == project
+    assert get_pulumi_project.cache_info().hits == 1
@@ -0,0 +1,114 @@
+import hashlib
+import os
+import pathlib
+
+from paperless.ingest.watcher import (
+    CHECKSUM_CHUNK_SIZE,
+    PARTIAL_SUFFIX,
+    FileState,
+    StabilityTracker,
+    checksum,
+    run,
+    scan,
+    transfer,
+    unique_destination,
+)
+from paperless.paperless import CONSUMER_IGNORE_PATTERNS
+
+
+def test_tracker_reports_files_after_window():
+    tracker = StabilityTracker(window=30)
+    path = pathlib.Path('scan.pdf')
+    assert tracker.update({path: FileState(10, 1)}, now=0) == []
+    assert tracker.update({path: FileState(10, 1)}, now=29) == []
+    assert tracker.update({path: FileState(10, 1)}, now=30) == [path]
+
+
+def test_tracker_restarts_window_on_change():
+    tracker = StabilityTracker(window=30)
+    path = pathlib.Path('scan.pdf')
+    tracker.update({path: FileState(10, 1)}, now=0)
+    assert tracker.update({path: FileState(20, 2)}, now=30) == []
+    assert tracker.update({path: FileState(20, 2)}, now=60) == [path]
+
+
+def test_tracker_forgets_removed_files():
+    tracker = StabilityTracker(window=30)
+    path = pathlib.Path('scan.pdf')
+    tracker.update({path: FileState(10, 1)}, now=0)
+    tracker.update({}, now=10)
+    assert tracker.update({path: FileState(10, 1)}, now=30) == []
+
+
+def test_scan_skips_ignored_and_empty_files(tmp_path):
+    (tmp_path / 'scan.pdf').write_bytes(b'pdf')
+    (tmp_path / 'empty.pdf').touch()
+    (tmp_path / '._scan.pdf').write_bytes(b'resource fork')
+    (tmp_path / '@eaDir').mkdir()
+    (tmp_path / '@eaDir' / 'thumb.jpg').write_bytes(b'thumbnail')
+    (tmp_path / 'nested').mkdir()
+    (tmp_path / 'nested' / 'letter.pdf').write_bytes(b'pdf')
+
+    files = scan(tmp_path, CONSUMER_IGNORE_PATTERNS)
+    assert sorted(path.relative_to(tmp_path).as_posix() for path in files) == [
+        'nested/letter.pdf',
+        'scan.pdf',
+    ]
+
+
+def test_unique_destination(tmp_path):
+    (tmp_path / 'scan.pdf').touch()
+    (tmp_path / 'scan-1.pdf').touch()
+    assert unique_destination(tmp_path / 'scan.pdf') == tmp_path / 'scan-2.pdf'
+    assert unique_destination(tmp_path / 'other.pdf') == tmp_path / 'other.pdf'
+
+
+def test_checksum_spans_chunks(tmp_path):
+    data = os.urandom(CHECKSUM_CHUNK_SIZE * 2 + 1)
+    path = tmp_path / 'scan.pdf'
+    path.write_bytes(data)
+    assert checksum(path) == hashlib.sha256(data).hexdigest()
+    empty = tmp_path / 'empty.pdf'
+    empty.touch()
+    assert checksum(empty) == hashlib.sha256().hexdigest()
+
+
+def test_transfer_keeps_relative_path(tmp_path):
+    source = tmp_path / 'source'
+    target = tmp_path / 'target'
+    path = source / 'nested' / 'scan.pdf'
+    path.parent.mkdir(parents=True)
+    path.write_bytes(b'pdf')
+
+    destination = transfer(path, source, target, FileState.from_stat(path.stat()), True)
+    assert destination == target / 'nested' / 'scan.pdf'
+    assert destination.read_bytes() == b'pdf'
+    assert not path.exists()
+
+
+def test_transfer_leaves_changed_files(tmp_path):
+    source = tmp_path / 'source'
+    target = tmp_path / 'target'
+    source.mkdir()
+    path = source / 'scan.pdf'
+    path.write_bytes(b'pdf')
+    state = FileState.from_stat(path.stat())
+    path.write_bytes(b'pdf with another page')
+
+    assert transfer(path, source, target, state, True) is None
+    assert path.exists()
+    assert not [p for p in target.iterdir() if p.name.endswith(PARTIAL_SUFFIX)]
+
+
+def test_run_hands_over_stable_files(tmp_path):
+    source = tmp_path / 'source'
+    target = tmp_path / 'target'
+    source.mkdir()
+    target.mkdir()
+    path = source / 'scan.pdf'
+    path.write_bytes(b'pdf')
+    os.utime(path, (0, 0))
+
+    run(source, target, 0.01, 0.02, CONSUMER_IGNORE_PATTERNS, True, iterations=2)
+    assert (target / 'scan.pdf').read_bytes() == b'pdf'
+    assert not path.exists()